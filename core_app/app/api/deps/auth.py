@@ -1,5 +1,11 @@
 from fastapi import HTTPException, status, Request, Depends
 from app.core.security.jwt import decode_token
+from app.core.security.token_cache import access_claims_cache
+from app.core.security.permissions import decode_permissions
+from app.db.repositories.revocations import access_denylist
+
+def _revoked():
+    return HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Token has been revoked")
 
 def get_bearer_token(req: Request) -> str:
     auth = req.headers.get("Authorization", "")
@@ -8,17 +14,29 @@ def get_bearer_token(req: Request) -> str:
     return auth.split(" ", 1)[1]
 
 def get_current_user(token: str = Depends(get_bearer_token)):
+    cached = access_claims_cache.get(token)
+    if cached is not None:
+        # Revocation can land after a token was cached, so the denylist is consulted on every hit.
+        claims, user = cached
+        if access_denylist.is_revoked(claims):
+            raise _revoked()
+        return dict(user)
     try:
         payload = decode_token(token)
         if payload.get("type") != "access":
             raise ValueError("Wrong token type")
-        return {
+        user = {
             "id": payload["sub"],
             "roles": payload.get("roles", []),
-            "permissions": payload.get("perms", []),
+            "permissions": decode_permissions(payload),
         }
     except Exception:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid or expired token")
+    claims = {"sub": payload["sub"], "jti": payload.get("jti"), "iat": payload.get("iat", 0)}
+    if access_denylist.is_revoked(claims):
+        raise _revoked()
+    access_claims_cache.put(token, payload["exp"], (claims, user))
+    return dict(user)
 
 REFRESH_COOKIE_NAME = "refresh_token"
 
@@ -1,15 +1,13 @@
+import hmac
 from fastapi import Depends, HTTPException, status
-from app.api.deps.auth import get_current_user
-from app.db.models.role import Role
+from app.api.deps.auth import get_bearer_token, get_current_user
+from app.core.config.settings import settings
+from app.db.repositories.roles import role_cache
 
-async def _permissions_from_roles(role_slugs: list[str]) -> set[str]:
+async def _permissions_from_roles(role_slugs: list[str]) -> frozenset[str]:
     if not role_slugs:
-        return set()
-    roles = await Role.find(Role.slug.in_(role_slugs)).to_list()
-    perms: set[str] = set()
-    for r in roles:
-        perms.update(r.permissions or [])
-    return perms
+        return frozenset()
+    return await role_cache.permissions_for(role_slugs)
 
 def require_roles(required: list[str], *, fresh: bool = False):
     async def dep(user=Depends(get_current_user)):
@@ -21,13 +19,22 @@ def require_roles(required: list[str], *, fresh: bool = False):
     return dep
 
 def require_perms(required: list[str], *, fresh: bool = False):
+    required_set = frozenset(required)
+
     async def dep(user=Depends(get_current_user)):
         token_perms = set(user.get("permissions", []))
         if fresh:
-            # Recompute from DB to avoid stale token permissions
+            # Recompute from current role definitions to avoid stale token permissions
             token_roles = user.get("roles", [])
             token_perms = await _permissions_from_roles(token_roles)
-        if not set(required).issubset(token_perms):
+        if not required_set.issubset(token_perms):
             raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Missing required permission")
         return user
     return dep
+
+def require_metrics_access(token: str = Depends(get_bearer_token)):
+    # Scrapers present METRICS_TOKEN; people need an access token carrying metrics:read.
+    if settings.METRICS_TOKEN and hmac.compare_digest(token.encode(), settings.METRICS_TOKEN.encode()):
+        return
+    if "metrics:read" not in get_current_user(token)["permissions"]:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Missing required permission")
@@ -4,11 +4,13 @@ from .auth import router as auth_router
 from .users import router as users_router
 from .admin import router as admin_router
 from .dev import router as dev_router  # <-- make sure this line exists
-from .google_oauth import router as google_router 
+from .oidc import router as oidc_router
+from .wellknown import router as wellknown_router
 
 api_router = APIRouter()
 api_router.include_router(auth_router)
 api_router.include_router(users_router)
 api_router.include_router(admin_router)
 api_router.include_router(dev_router)   # <-- and this one too
-api_router.include_router(google_router) 
\ No newline at end of file
+api_router.include_router(oidc_router)  # after auth_router: /auth/{provider}/... is a catch-all
+api_router.include_router(wellknown_router) 
\ No newline at end of file
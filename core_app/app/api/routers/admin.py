@@ -1,7 +1,8 @@
 from fastapi import APIRouter, HTTPException, Depends
 from app.api.deps.rbac import require_perms
 from app.db.models.role import Role
-from app.db.models.user import User
+from app.db.repositories.roles import role_cache
+from app.db.repositories.users import UsersRepo
 
 router = APIRouter(prefix="/admin", tags=["admin"])
 
@@ -13,6 +14,7 @@ async def create_role(slug: str, permissions: list[str]):
         raise HTTPException(status_code=409, detail="Role already exists")
     r = Role(slug=slug, permissions=permissions)
     await r.insert()
+    await role_cache.invalidate()
     return {"id": str(r.id), "slug": r.slug, "permissions": r.permissions}
 
 @router.get("/roles", dependencies=[Depends(require_perms(["roles:manage"]))])
@@ -22,19 +24,14 @@ async def list_roles():
 
 @router.post("/users/{user_id}/roles:add", dependencies=[Depends(require_perms(["roles:manage"]))])
 async def add_role_to_user(user_id: str, slug: str):
-    user = await User.get(user_id)
-    if not user:
+    roles = await UsersRepo().add_role(user_id, slug)
+    if roles is None:
         raise HTTPException(status_code=404, detail="User not found")
-    if slug not in (user.roles or []):
-        user.roles = (user.roles or []) + [slug]
-        await user.save()
-    return {"id": user.id, "roles": user.roles}
+    return {"id": user_id, "roles": roles}
 
 @router.post("/users/{user_id}/roles:remove", dependencies=[Depends(require_perms(["roles:manage"]))])
 async def remove_role_from_user(user_id: str, slug: str):
-    user = await User.get(user_id)
-    if not user:
+    roles = await UsersRepo().remove_role(user_id, slug)
+    if roles is None:
         raise HTTPException(status_code=404, detail="User not found")
-    user.roles = [s for s in (user.roles or []) if s != slug]
-    await user.save()
-    return {"id": user.id, "roles": user.roles}
+    return {"id": user_id, "roles": roles}
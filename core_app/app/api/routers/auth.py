@@ -1,9 +1,20 @@
 # app/api/routers/auth.py
+import asyncio
+import logging
 from fastapi import APIRouter, Depends, HTTPException, Response, Request, status, Query
 from datetime import datetime, timezone
+from pymongo.errors import DuplicateKeyError, PyMongoError
 from app.db.repositories.users import UsersRepo
 from app.db.repositories.refresh_tokens import RefreshTokensRepo
-from app.core.security.passwords import verify_password, hash_password
+from app.db.repositories.revocations import access_denylist
+from app.db.repositories.login_throttle import login_throttle
+from app.db.repositories.email_outbox import EmailOutboxRepo
+from app.core.security.passwords import (
+    PasswordHasherBusy,
+    verify_password_async,
+    hash_password_async,
+    needs_rehash,
+)
 from app.core.security.jwt import (
     create_access_token,
     create_refresh_token,
@@ -17,75 +28,96 @@ from app.schemas.auth import (
     VerifyRequestIn, ForgotPasswordIn, ResetPasswordIn,
 )
 from app.api.deps.auth import REFRESH_COOKIE_NAME, get_refresh_cookie
+from app.api.sessions import cookie_opts, issue_session
 from app.core.ratelimit.limiter import rate_limit
-from app.utils.emails import get_email_sender, build_frontend_link
-from app.utils.password_strength import validate_password_strength, PasswordTooWeak
-from app.db.models import User
+from app.utils.emails import build_frontend_link
+from app.utils.email_queue import EmailQueueFull, email_queue
+from app.utils.password_strength import validate_password_strength_async, PasswordTooWeak
+from app.utils.background import spawn
 
 router = APIRouter(prefix="/auth", tags=["auth"])
+log = logging.getLogger(__name__)
 
-def cookie_opts():
-    samesite = settings.COOKIE_SAMESITE.lower()
-    return dict(
-        httponly=True,
-        samesite=("none" if samesite == "none" else "lax" if samesite == "lax" else "strict"),
-        secure=bool(settings.COOKIE_SECURE),
-        domain=settings.COOKIE_DOMAIN,
-        max_age=settings.REFRESH_TOKEN_TTL_DAYS * 86400,
-        path="/",
-    )
+async def _send_email(**msg):
+    if settings.EMAIL_DELIVERY == "outbox":
+        await EmailOutboxRepo().add(**msg)  # durable; scripts/email_worker.py sends it
+    else:
+        email_queue.enqueue(**msg)
+
+async def _rehash_password(user_id: str, raw: str, old_hash: str):
+    try:
+        new_hash = await hash_password_async(raw)
+    except PasswordHasherBusy:
+        return  # try again on the next login
+    await UsersRepo().set_password_hash(user_id, new_hash, expected=old_hash)
 
 @router.post("/signup", status_code=201, dependencies=[Depends(rate_limit(settings.RATE_LIMIT_SIGNUP, "signup"))])
 async def signup(payload: SignupIn):
     users = UsersRepo()
-    existing = await users.get_by_email(payload.email)
-    if existing:
+    if await users.email_exists(payload.email, anonymous=True):
         raise HTTPException(status_code=409, detail="Email already in use")
 
     try:
-        validate_password_strength(payload.password, user_inputs=[payload.email, payload.full_name])
+        await validate_password_strength_async(payload.password, user_inputs=[payload.email, payload.full_name])
     except PasswordTooWeak as e:
         raise HTTPException(status_code=400, detail={"message": str(e), "score": e.score, "feedback": e.feedback})
 
-    user = await users.create(email=payload.email, password=payload.password, full_name=payload.full_name)
+    try:
+        user = await users.create(email=payload.email, password=payload.password, full_name=payload.full_name)
+    except DuplicateKeyError:
+        # Lost a race with a concurrent signup, or the email filter had not seen it yet.
+        raise HTTPException(status_code=409, detail="Email already in use")
 
     token = create_verify_email_token(sub=user.id, email=user.email)
     link_fe = build_frontend_link(settings.VERIFY_PATH, token)
     link_be = f"/auth/verify/confirm?token={token}"
-    sender = get_email_sender()
-    await sender.send(
-        to=user.email,
-        subject="Verify your email",
-        html=f"<p>Welcome {user.full_name}!</p><p>Verify: <a href='{link_fe}'>{link_fe}</a></p><p>Or direct (backend): <code>{link_be}</code></p>",
-        text=f"Welcome {user.full_name}! Verify: {link_fe}",
-    )
+    try:
+        await _send_email(
+            to=user.email,
+            subject="Verify your email",
+            html=f"<p>Welcome {user.full_name}!</p><p>Verify: <a href='{link_fe}'>{link_fe}</a></p><p>Or direct (backend): <code>{link_be}</code></p>",
+            text=f"Welcome {user.full_name}! Verify: {link_fe}",
+        )
+    except EmailQueueFull:
+        # The account exists now; a 503 would only turn the client's retry into a 409.
+        log.warning("Email queue full; verification email for %s not sent", user.id)
+    except PyMongoError:
+        log.exception("Outbox insert failed; verification email for %s not sent", user.id)
 
     return {"id": user.id, "email": user.email, "full_name": user.full_name}
 
 @router.post("/login", response_model=LoginOut, dependencies=[Depends(rate_limit(settings.RATE_LIMIT_LOGIN, "login"))])
 async def login(payload: LoginIn, request: Request, response: Response):
     users = UsersRepo()
-    rtrepo = RefreshTokensRepo()
-    user = await users.get_by_email(payload.email)
-    if not user or not verify_password(payload.password, user.hashed_password):
+    # Per-account lockout comes before any lookup or hashing; unknown emails are throttled the same way.
+    throttle_key = login_throttle.key(payload.email)
+    wait = login_throttle.acquire(throttle_key)
+    if wait:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Too many failed login attempts",
+            headers={"Retry-After": str(max(1, int(wait + 0.999)))},
+        )
+    failed = None
+    try:
+        user = await users.get_by_email(payload.email)
+        # Passwordless (OAuth-only) accounts have no hash to check.
+        failed = not user or not user.hashed_password \
+            or not await verify_password_async(payload.password, user.hashed_password)
+    finally:
+        login_throttle.release(throttle_key, failed)
+    if failed:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid credentials")
 
     if settings.LOGIN_REQUIRE_VERIFIED and not user.email_verified_at:
         raise HTTPException(status_code=403, detail="Email not verified")
 
-    roles = await users.get_roles(user.id)
-    perms = await users.get_permissions(user.id)
-    access = create_access_token(sub=user.id, roles=roles, perms=perms)
-
-    refresh = create_refresh_token(sub=user.id)
-    r_payload = decode_token(refresh)
-    exp_dt = datetime.fromtimestamp(r_payload["exp"], tz=timezone.utc)
+    # Only logins that will get tokens pay for a rehash.
+    if settings.BCRYPT_REHASH_ON_LOGIN and needs_rehash(user.hashed_password):
+        spawn(_rehash_password(user.id, payload.password, user.hashed_password), name="bcrypt-rehash")
 
-    ua = request.headers.get("user-agent", "")
-    ip = request.client.host if request.client else None
-    await rtrepo.store(jti=r_payload["jti"], user_id=user.id, raw_token=refresh, expires_at=exp_dt, user_agent=ua, ip=ip)
-
-    response.set_cookie(REFRESH_COOKIE_NAME, refresh, **cookie_opts())
+    _, roles, perms = await users.get_identity(user.id)
+    access = await issue_session(request, response, user.id, roles, perms)
     return {
         "access_token": access,
         "user": {
@@ -111,15 +143,9 @@ async def refresh(request: Request, response: Response):
         raise HTTPException(status_code=401, detail="Invalid refresh token")
 
     rtrepo = RefreshTokensRepo()
-    rec = await rtrepo.get_valid(payload["jti"])
-    if not rec or not rtrepo.matches(rec, cookie):
-        raise HTTPException(status_code=401, detail="Refresh token not found or revoked")
-
-    await rtrepo.revoke(payload["jti"])
-
     new_refresh = create_refresh_token(sub=payload["sub"])
     new_payload = decode_token(new_refresh)
-    await rtrepo.store(
+    new_rec = rtrepo.build(
         jti=new_payload["jti"],
         user_id=payload["sub"],
         raw_token=new_refresh,
@@ -128,10 +154,16 @@ async def refresh(request: Request, response: Response):
         ip=request.client.host if request.client else None,
     )
 
-    users = UsersRepo()
-    roles = await users.get_roles(payload["sub"])
-    perms = await users.get_permissions(payload["sub"])
-    access = create_access_token(sub=payload["sub"], roles=roles, perms=perms)
+    # Rotation and the identity read are independent: run them side by side.
+    rotated, identity = await asyncio.gather(
+        rtrepo.rotate(payload["jti"], cookie, new_rec),
+        UsersRepo().get_identity(payload["sub"]),
+    )
+    if not rotated:
+        raise HTTPException(status_code=401, detail="Refresh token not found or revoked")
+    if not identity:
+        raise HTTPException(status_code=401, detail="User not found")
+    access = create_access_token(sub=payload["sub"], roles=identity.roles, perms=identity.permissions)
 
     response.set_cookie(REFRESH_COOKIE_NAME, new_refresh, **cookie_opts())
     return {"access_token": access}
@@ -147,6 +179,15 @@ async def logout(request: Request, response: Response):
                 await rtrepo.revoke(payload["jti"])
         except Exception:
             pass
+    # The access token would otherwise stay usable until it expires.
+    auth = request.headers.get("Authorization", "")
+    if auth.startswith("Bearer "):
+        try:
+            payload = decode_token(auth.split(" ", 1)[1])
+            if payload.get("type") == "access":
+                await access_denylist.revoke_token(payload["jti"], payload["exp"])
+        except Exception:
+            pass
     response.delete_cookie(REFRESH_COOKIE_NAME, path="/", domain=settings.COOKIE_DOMAIN)
 
 # ----- Email verification -----
@@ -154,18 +195,23 @@ async def logout(request: Request, response: Response):
 @router.post("/verify/request", dependencies=[Depends(rate_limit(settings.RATE_LIMIT_VERIFY_REQUEST, "verify_request"))])
 async def verify_request(payload: VerifyRequestIn):
     users = UsersRepo()
-    user = await users.get_by_email(payload.email)
+    user = await users.get_by_email(payload.email, anonymous=True)
     if user and not user.email_verified_at:
         token = create_verify_email_token(sub=user.id, email=user.email)
         link_fe = build_frontend_link(settings.VERIFY_PATH, token)
         link_be = f"/auth/verify/confirm?token={token}"
-        sender = get_email_sender()
-        await sender.send(
-            to=user.email,
-            subject="Verify your email",
-            html=f"<p>Verify your email:</p><p><a href='{link_fe}'>{link_fe}</a></p><p>Or backend direct: <code>{link_be}</code></p>",
-            text=f"Verify your email: {link_fe}",
-        )
+        try:
+            await _send_email(
+                to=user.email,
+                subject="Verify your email",
+                html=f"<p>Verify your email:</p><p><a href='{link_fe}'>{link_fe}</a></p><p>Or backend direct: <code>{link_be}</code></p>",
+                text=f"Verify your email: {link_fe}",
+            )
+        except EmailQueueFull:
+            # Same answer as for an unknown address: an error here would reveal that the account exists.
+            log.warning("Email queue full; verification email for %s not sent", user.id)
+        except PyMongoError:
+            log.exception("Outbox insert failed; verification email for %s not sent", user.id)
     return {"ok": True}
 
 @router.get("/verify/confirm")
@@ -177,13 +223,8 @@ async def verify_confirm(token: str = Query(...)):
     except Exception:
         raise HTTPException(status_code=400, detail="Invalid or expired token")
 
-    uid = payload["sub"]
-    user = await User.get(uid)
-    if not user:
+    if not await UsersRepo().mark_email_verified(payload["sub"]):
         raise HTTPException(status_code=404, detail="User not found")
-    if not user.email_verified_at:
-        user.email_verified_at = datetime.utcnow()
-        await user.save()
     return {"verified": True}
 
 # ----- Password reset -----
@@ -191,18 +232,22 @@ async def verify_confirm(token: str = Query(...)):
 @router.post("/password/forgot", dependencies=[Depends(rate_limit(settings.RATE_LIMIT_FORGOT, "forgot"))])
 async def password_forgot(payload: ForgotPasswordIn):
     users = UsersRepo()
-    user = await users.get_by_email(payload.email)
+    user = await users.get_by_email(payload.email, anonymous=True)
     if user:
         token = create_reset_password_token(sub=user.id)
         link_fe = build_frontend_link(settings.RESET_PATH, token)
         link_be = f"/auth/password/reset?token={token}&new_password=<your_new_password>"
-        sender = get_email_sender()
-        await sender.send(
-            to=user.email,
-            subject="Reset your password",
-            html=f"<p>Reset password:</p><p><a href='{link_fe}'>{link_fe}</a></p><p>Dev direct (backend): <code>{link_be}</code></p>",
-            text=f"Reset password: {link_fe}",
-        )
+        try:
+            await _send_email(
+                to=user.email,
+                subject="Reset your password",
+                html=f"<p>Reset password:</p><p><a href='{link_fe}'>{link_fe}</a></p><p>Dev direct (backend): <code>{link_be}</code></p>",
+                text=f"Reset password: {link_fe}",
+            )
+        except EmailQueueFull:
+            log.warning("Email queue full; password reset email for %s not sent", user.id)
+        except PyMongoError:
+            log.exception("Outbox insert failed; password reset email for %s not sent", user.id)
     return {"ok": True}
 
 @router.post("/password/reset")
@@ -215,20 +260,17 @@ async def password_reset(payload: ResetPasswordIn):
         raise HTTPException(status_code=400, detail="Invalid or expired token")
 
     try:
-        validate_password_strength(payload.new_password)
+        await validate_password_strength_async(payload.new_password)
     except PasswordTooWeak as e:
         raise HTTPException(status_code=400, detail={"message": str(e), "score": e.score, "feedback": e.feedback})
 
     uid = decoded["sub"]
-    user = await User.get(uid)
-    if not user:
+    users = UsersRepo()
+    if not await users.get_by_id(uid):
         raise HTTPException(status_code=404, detail="User not found")
-
-    user.hashed_password = hash_password(payload.new_password)
-    user.updated_at = datetime.utcnow()
-    await user.save()
+    await users.set_password_hash(uid, await hash_password_async(payload.new_password))
 
     rtrepo = RefreshTokensRepo()
-    await rtrepo.revoke_all_for_user(uid)
+    await asyncio.gather(rtrepo.revoke_all_for_user(uid), access_denylist.revoke_user(uid))
 
     return {"reset": True}
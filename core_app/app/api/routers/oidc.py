@@ -0,0 +1,91 @@
+# app/api/routers/oidc.py
+import httpx
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+
+from app.api.sessions import issue_session
+from app.core.ratelimit.limiter import rate_limit
+from app.core.security.oidc import OIDCError, OIDCProvider, OIDCUnavailable, providers
+from app.db.repositories.oauth_accounts import OAuthAccountsRepo
+from app.db.repositories.users import UsersRepo
+from app.utils.ids import new_uuid
+from app.utils.oauth_state import make_oauth_state, parse_oauth_state
+
+router = APIRouter(prefix="/auth", tags=["auth:oidc"])
+
+def _provider(name: str) -> OIDCProvider:
+    provider = providers.get(name)
+    if provider is None:
+        raise HTTPException(status_code=404, detail="Unknown login provider")
+    return provider
+
+@router.get("/{provider}/start", dependencies=[Depends(rate_limit("30/min", "oidc_start"))])
+async def oidc_start(provider: str):
+    """
+    Returns the provider's authorization URL (we do not redirect automatically to keep it API-friendly).
+    """
+    p = _provider(provider)
+    nonce = new_uuid()
+    state = make_oauth_state(nonce=nonce, provider=p.name)
+    try:
+        auth_url = await p.authorization_url(state, nonce)
+    except Exception:
+        raise HTTPException(status_code=503, detail="Login provider unavailable")
+    return {"auth_url": auth_url, "state": state}
+
+@router.get("/{provider}/callback", dependencies=[Depends(rate_limit("60/min", "oidc_callback"))])
+async def oidc_callback(provider: str, request: Request, response: Response, code: str = Query(...), state: str = Query(...)):
+    """
+    Handles the provider's callback: exchange code->tokens, validate id_token, link or create user, issue our JWTs.
+    """
+    p = _provider(provider)
+
+    # 1) Validate state (signed by our backend, bound to this provider)
+    try:
+        state_payload = parse_oauth_state(state)
+        if state_payload.get("provider") != p.name:
+            raise ValueError("state issued for another provider")
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid state")
+
+    # 2) Exchange code for tokens, 3) validate id_token signature & claims
+    try:
+        tokens = await p.exchange_code(code)
+        if not tokens.get("id_token"):
+            raise OIDCError("No id_token in token response")
+        claims = await p.verify_id_token(tokens["id_token"], nonce=state_payload.get("nonce"))
+    except OIDCError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except (OIDCUnavailable, httpx.HTTPError):
+        # Discovery, token endpoint or JWKS unreachable: same answer as /start.
+        raise HTTPException(status_code=503, detail="Login provider unavailable")
+
+    email = claims.get("email")
+    if not email or not claims.get("email_verified"):
+        raise HTTPException(status_code=403, detail="Provider email not verified")
+
+    # 4) Link or create local user (passwordless, verified at insert)
+    user = await OAuthAccountsRepo().link_or_create_user(
+        provider=p.name,
+        provider_sub=claims["sub"],
+        email=email,
+        name=claims.get("name"),
+        picture=claims.get("picture"),
+        allow_signup=p.allow_signup,
+    )
+    if not user:
+        raise HTTPException(status_code=403, detail=f"Signup via {p.name} disabled")
+
+    # 5) Issue our tokens (same flow as /login)
+    _, roles, perms = await UsersRepo().get_identity(user.id)
+    access = await issue_session(request, response, user.id, roles, perms)
+    return {
+        "access_token": access,
+        "user": {
+            "id": user.id,
+            "email": user.email,
+            "name": claims.get("name") or user.full_name,
+            "roles": roles,
+            "permissions": perms,
+            "provider": p.name,
+        },
+    }
@@ -1,8 +1,27 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, HTTPException, Query
 from app.api.deps.auth import get_current_user
+from app.db.repositories.refresh_tokens import RefreshTokensRepo
+from app.schemas.user import SessionsPage
 
 router = APIRouter(prefix="/users", tags=["users"])
 
 @router.get("/me")
 async def me(user = Depends(get_current_user)):
     return user
+
+@router.get("/me/sessions", response_model=SessionsPage)
+async def my_sessions(
+    user = Depends(get_current_user),
+    limit: int = Query(20, ge=1, le=100),
+    cursor: str | None = Query(None),
+):
+    try:
+        docs, next_cursor = await RefreshTokensRepo().list_active_for_user(user["id"], limit=limit, cursor=cursor)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return {"items": docs, "next_cursor": next_cursor}
+
+@router.delete("/me/sessions/{jti}", status_code=204)
+async def revoke_my_session(jti: str, user = Depends(get_current_user)):
+    if not await RefreshTokensRepo().revoke_for_user(user["id"], jti):
+        raise HTTPException(status_code=404, detail="Session not found")
@@ -0,0 +1,16 @@
+from fastapi import APIRouter, Request, Response
+from app.core.config.settings import settings
+from app.core.security.keys import keyring
+
+router = APIRouter(prefix="/.well-known", tags=["well-known"])
+
+@router.get("/jwks.json")
+async def jwks(request: Request):
+    """
+    Public signing keys so other services can verify our access tokens locally.
+    """
+    body, etag = keyring.jwks()
+    headers = {"Cache-Control": f"public, max-age={settings.JWKS_MAX_AGE}", "ETag": etag}
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
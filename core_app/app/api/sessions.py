@@ -0,0 +1,36 @@
+# app/api/sessions.py
+"""Refresh-cookie settings and session issuing shared by password and provider logins."""
+from datetime import datetime, timezone
+
+from fastapi import Request, Response
+
+from app.api.deps.auth import REFRESH_COOKIE_NAME
+from app.core.config.settings import settings
+from app.core.security.jwt import create_access_token, create_refresh_token, decode_token
+from app.db.repositories.refresh_tokens import RefreshTokensRepo
+
+def cookie_opts():
+    samesite = settings.COOKIE_SAMESITE.lower()
+    return dict(
+        httponly=True,
+        samesite=("none" if samesite == "none" else "lax" if samesite == "lax" else "strict"),
+        secure=bool(settings.COOKIE_SECURE),
+        domain=settings.COOKIE_DOMAIN,
+        max_age=settings.REFRESH_TOKEN_TTL_DAYS * 86400,
+        path="/",
+    )
+
+async def issue_session(request: Request, response: Response, user_id: str, roles: list[str], perms: list[str]) -> str:
+    """Store a new refresh token, set its cookie, and return a fresh access token."""
+    access = create_access_token(sub=user_id, roles=roles, perms=perms)
+
+    refresh = create_refresh_token(sub=user_id)
+    r_payload = decode_token(refresh)
+    exp_dt = datetime.fromtimestamp(r_payload["exp"], tz=timezone.utc)
+
+    ua = request.headers.get("user-agent", "")
+    ip = request.client.host if request.client else None
+    await RefreshTokensRepo().store(jti=r_payload["jti"], user_id=user_id, raw_token=refresh, expires_at=exp_dt, user_agent=ua, ip=ip)
+
+    response.set_cookie(REFRESH_COOKIE_NAME, refresh, **cookie_opts())
+    return access
@@ -40,14 +40,27 @@ class Settings(BaseSettings):
     APP_NAME: str = "core_app"
     ENV: str = "dev"
     API_PREFIX: str = Field("/api", validation_alias="API_PREFIX")  # legacy: api_prefix handled below
+    # /metrics needs an access token with metrics:read, or this shared secret as the bearer token (scrapers)
+    METRICS_TOKEN: Optional[str] = None
 
     # --- Security / JWT ---
     # Keep a dev default to avoid crashes; you can remove default to force requirement in prod
     JWT_SECRET: str = "change-this-in-prod"
     JWT_ALG: str = Field("HS256", validation_alias="JWT_ALG")  # legacy: jwt_alg handled below
+    # Asymmetric signing (JWT_ALG=EdDSA|ES256): PEM files named <kid>.pem, see app/core/security/keys.py
+    JWT_KEYS_DIR: Optional[str] = None
+    JWT_ACTIVE_KID: Optional[str] = None      # default: lexicographically last private key
+    # Migration window for kid-less HS256 tokens after switching to EdDSA/ES256: only tokens
+    # issued before the cutover (unix time) with a normal lifetime verify, so the window
+    # closes on its own one refresh TTL later. Off unless both are set.
+    JWT_ACCEPT_LEGACY_HS256: bool = False
+    JWT_LEGACY_HS256_CUTOVER: Optional[int] = None
+    JWKS_MAX_AGE: int = 300                   # Cache-Control for /.well-known/jwks.json
     ACCESS_TOKEN_TTL_MIN: int = 20
     REFRESH_TOKEN_TTL_DAYS: int = 7
+    REFRESH_REUSE_GRACE_SECONDS: int = 10  # replaying a rotated refresh token after this revokes its family
     LOGIN_REQUIRE_VERIFIED: bool = False
+    ACCESS_TOKEN_CACHE_SIZE: int = 10_000  # verified access tokens kept in memory; 0 disables
     # Legacy seconds (optional) — if set, they override the minute/day fields
     ACCESS_TTL_SECONDS: Optional[int] = Field(default=None, validation_alias="ACCESS_TTL_SECONDS")
     REFRESH_TTL_SECONDS: Optional[int] = Field(default=None, validation_alias="REFRESH_TTL_SECONDS")
@@ -62,10 +75,47 @@ class Settings(BaseSettings):
     # --- Database (Mongo) ---
     MONGO_URI: str
     MONGO_DB_NAME: str = "core_db"
+    # Connection pool / wire settings (these override the same options given in MONGO_URI)
+    MONGO_MAX_POOL_SIZE: int = 100            # per server, per worker process
+    MONGO_MIN_POOL_SIZE: int = 0              # >0 keeps warm connections through idle periods
+    MONGO_MAX_IDLE_TIME_MS: Optional[int] = None
+    MONGO_COMPRESSORS: str = "zstd,snappy,zlib"  # in preference order; missing libraries are skipped
+    MONGO_READ_PREFERENCE: str = "primary"    # primaryPreferred | secondaryPreferred | nearest ...
+    MONGO_SERVER_SELECTION_TIMEOUT_MS: int = 5000
+    MONGO_CONNECT_TIMEOUT_MS: int = 5000
+    MONGO_SOCKET_TIMEOUT_MS: Optional[int] = None
+    MONGO_READY_TIMEOUT_SECONDS: float = 2    # /readyz ping budget
+    MONGO_READY_MAX_SATURATION: float = 1.0   # /readyz fails when in-use/max reaches this with callers queued
+    ID_STORAGE: str = "string"      # string | binary (BSON UUID subtype 4) for user ids
+    ID_UUID_VERSION: int = 4        # 4 = random, 7 = time-ordered (better insert locality)
+    ID_READ_LEGACY: bool = False    # match both id forms while scripts/migrate_ids.py runs
     
     GOOGLE_CLIENT_ID: Optional[str] = None
     GOOGLE_CLIENT_SECRET: Optional[str] = None
     GOOGLE_REDIRECT_URI: Optional[str] = None
+    # More OpenID Connect providers, as JSON: {"microsoft": {"issuer": "https://login.microsoftonline.com/<tenant>/v2.0",
+    #   "client_id": "...", "client_secret": "...", "redirect_uri": "...", "scopes": "openid email profile"}}
+    # Optional "algorithms": ["RS256", ...] pins id_token algorithms (default: the signing key's own).
+    # Each gets /auth/<name>/start and /auth/<name>/callback; see app/core/security/oidc.py.
+    OIDC_PROVIDERS: dict[str, dict] = {}
+    # Provider discovery documents and JWKS: max-age from Cache-Control, clamped
+    JWKS_CACHE_DEFAULT_SECONDS: int = 3600    # when the response has no max-age
+    JWKS_CACHE_MIN_SECONDS: int = 60
+    JWKS_CACHE_MAX_SECONDS: int = 86400
+    JWKS_REFRESH_AHEAD_SECONDS: int = 60      # background refresh this long before expiry
+    JWKS_MIN_REFETCH_SECONDS: float = 30      # floor between refetches on unknown kid
+    JWKS_FETCH_TIMEOUT: float = 10
+
+    # --- Outbound HTTP (one pooled client per process, app/core/http.py) ---
+    HTTP_CLIENT_HTTP2: bool = True
+    HTTP_CLIENT_MAX_CONNECTIONS: int = 100
+    HTTP_CLIENT_MAX_KEEPALIVE: int = 20
+    HTTP_CLIENT_KEEPALIVE_EXPIRY: float = 60
+    HTTP_CLIENT_PER_HOST: int = 10            # concurrent requests per host; extra callers queue
+    HTTP_CONNECT_TIMEOUT: float = 3
+    HTTP_READ_TIMEOUT: float = 10
+    HTTP_WRITE_TIMEOUT: float = 10
+    HTTP_POOL_TIMEOUT: float = 5              # waiting for a free pooled connection
     OAUTH_ALLOW_SIGNUP: bool = True
     # --- Frontend deep links ---
     FRONTEND_URL: str = "http://localhost:3000"
@@ -80,16 +130,76 @@ class Settings(BaseSettings):
     SMTP_USER: Optional[str] = None
     SMTP_PASS: Optional[str] = None
     SMTP_TLS: bool = True
+    SMTP_TIMEOUT: float = 10
+    # "queue": handlers enqueue in-process and this API worker sends (nothing else to run).
+    # "outbox": handlers write to email_outbox and `python -m scripts.email_worker` sends (durable);
+    # opt in only where that worker is deployed, otherwise nothing is sent.
+    EMAIL_DELIVERY: str = "queue"
+    EMAIL_OUTBOX_LEASE_SECONDS: float = 60    # a claimed message is reclaimable after this
+    EMAIL_OUTBOX_POLL_SECONDS: float = 1      # worker idle sleep when nothing is due
+    EMAIL_OUTBOX_KEEP_DAYS: int = 7           # sent/failed messages are purged after this
+    # EMAIL_SENDERS senders, each with its own long-lived connection (in-process queue or email worker).
+    EMAIL_QUEUE_MAX: int = 1000               # "queue" mode; beyond this, enqueue fails with 503
+    EMAIL_SENDERS: int = 2
+    EMAIL_SEND_RETRIES: int = 4               # after the first attempt
+    EMAIL_RETRY_BASE_SECONDS: float = 1       # doubles per retry
+    EMAIL_RETRY_MAX_SECONDS: float = 60
+    EMAIL_DRAIN_SECONDS: float = 10           # how long shutdown waits for queued mail
 
     # --- Rate limits (count/window_seconds) ---
     RATE_LIMIT_LOGIN: str = "5/300"
     RATE_LIMIT_SIGNUP: str = "3/1800"
     RATE_LIMIT_FORGOT: str = "3/900"
     RATE_LIMIT_VERIFY_REQUEST: str = "5/1800"
+    # Where counters live: "memory" (per process), "shared" (one host, all workers), "mongo" (all hosts)
+    RATE_LIMIT_BACKEND: str = "memory"
+    RATE_LIMIT_SHM_NAME: str = "core_app_ratelimit"
+    RATE_LIMIT_SHM_SLOTS: int = 1 << 16       # shared hash table size (16 bytes per slot)
+    RATE_LIMIT_SHM_STRIPES: int = 64          # lock stripes over the table
+    RATE_LIMIT_LOCAL_FRACTION: float = 0.1    # share of a limit a worker may reserve and spend locally
+    RATE_LIMIT_LOCAL_TTL: float = 1.0         # seconds a local reservation may be spent
+
+    # --- Per-account login lockout (checked before bcrypt) ---
+    LOGIN_LOCKOUT_THRESHOLD: int = 5          # failures before the first lockout
+    LOGIN_LOCKOUT_BASE_SECONDS: float = 30    # first lockout; doubles with each further failure
+    LOGIN_LOCKOUT_MAX_SECONDS: float = 3600
+    LOGIN_FAILURE_RESET_SECONDS: float = 3600 # failures are forgotten after this long without new ones
+    LOGIN_THROTTLE_SYNC_SECONDS: float = 2    # flush local failures / pull other workers'
+
+    # --- Role -> permission cache ---
+    ROLE_CACHE_POLL_SECONDS: float = 5        # how often workers check the roles version marker
+    ROLE_CACHE_MAX_AGE_SECONDS: float = 300   # full reload even without a marker bump
+    ROLE_CACHE_CHANGE_STREAM: bool = False    # needs a replica set / Atlas
+
+    # --- Access-token denylist ---
+    DENYLIST_SYNC_SECONDS: float = 2          # how often workers pull new revocations
+    DENYLIST_REBUILD_SECONDS: float = 600     # full reload, dropping expired entries
+    DENYLIST_BLOOM_CAPACITY: int = 100_000    # sized for live revocations; rebuilt larger when exceeded
+    DENYLIST_BLOOM_ERROR_RATE: float = 0.001
+
+    # --- Known-email filter (anonymous endpoints skip Mongo for unknown addresses) ---
+    EMAIL_FILTER_ENABLED: bool = True
+    EMAIL_FILTER_CAPACITY: int = 1_000_000    # grown on rebuild if the user count passes it
+    EMAIL_FILTER_ERROR_RATE: float = 0.001
+    EMAIL_FILTER_SYNC_SECONDS: float = 5      # pick up users created by other workers
+    EMAIL_FILTER_REBUILD_SECONDS: float = 3600
 
     # --- Password policy ---
     MIN_PASSWORD_LENGTH: int = 8
     MIN_PASSWORD_SCORE: int = 3
+    MAX_PASSWORD_LENGTH: int = 128
+    PASSWORD_SCORE_MAX_CHARS: int = 72        # zxcvbn only scores this prefix
+    PASSWORD_SCORE_WORKERS: int = 1
+    PASSWORD_SCORE_CACHE_SECONDS: int = 60
+
+    # --- Password hashing (bcrypt runs off the event loop) ---
+    PASSWORD_HASH_WORKERS: int = 2        # process pool size; 0 = default thread pool
+    PASSWORD_HASH_MAX_PENDING: int = 32   # queued hash/verify jobs before we answer 503
+    BCRYPT_ROUNDS: Optional[int] = None   # pinned cost; wins over calibration (default 12)
+    BCRYPT_TARGET_MS: int = 100           # latency budget per hash for calibration
+    BCRYPT_MIN_ROUNDS: int = 10           # calibration never goes below this
+    BCRYPT_CALIBRATE_ON_STARTUP: bool = False
+    BCRYPT_REHASH_ON_LOGIN: bool = True   # rehash stored hashes whose cost differs
 
     # ---------- Validators / Legacy mapping ----------
 
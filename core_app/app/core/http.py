@@ -0,0 +1,108 @@
+import asyncio
+import time
+
+import httpx
+
+from app.core.config.settings import settings
+
+class HostStats:
+    __slots__ = ("requests", "errors", "in_flight", "waiting", "total_seconds", "wait_seconds")
+
+    def __init__(self):
+        self.requests = self.errors = self.in_flight = self.waiting = 0
+        self.total_seconds = self.wait_seconds = 0.0
+
+    def as_dict(self) -> dict:
+        n = self.requests or 1
+        return {
+            "requests": self.requests,
+            "errors": self.errors,
+            "in_flight": self.in_flight,
+            "waiting": self.waiting,
+            "avg_ms": round(self.total_seconds / n * 1000, 1),
+            "avg_wait_ms": round(self.wait_seconds / n * 1000, 1),
+        }
+
+class HttpClient:
+    """
+    The process's one outbound HTTP client (OAuth token exchange, JWKS, discovery).
+
+    Connections are pooled and kept alive across requests (HTTP/2 where the server
+    speaks it), so a login does not pay DNS + TCP + TLS each time. httpx caps the pool
+    as a whole; a semaphore per host adds HTTP_CLIENT_PER_HOST so one slow provider
+    cannot take every connection. Started on app startup and closed on shutdown;
+    scripts that never call `start()` get a client on first use.
+    """
+    def __init__(self, *, transport: httpx.AsyncBaseTransport | None = None):
+        self._transport = transport  # tests pass an httpx.MockTransport
+        self._client: httpx.AsyncClient | None = None
+        self._hosts: dict[str, asyncio.Semaphore] = {}
+        self._stats: dict[str, HostStats] = {}
+
+    def start(self):
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                transport=self._transport,
+                http2=settings.HTTP_CLIENT_HTTP2,
+                limits=httpx.Limits(
+                    max_connections=settings.HTTP_CLIENT_MAX_CONNECTIONS,
+                    max_keepalive_connections=settings.HTTP_CLIENT_MAX_KEEPALIVE,
+                    keepalive_expiry=settings.HTTP_CLIENT_KEEPALIVE_EXPIRY,
+                ),
+                timeout=httpx.Timeout(
+                    connect=settings.HTTP_CONNECT_TIMEOUT,
+                    read=settings.HTTP_READ_TIMEOUT,
+                    write=settings.HTTP_WRITE_TIMEOUT,
+                    pool=settings.HTTP_POOL_TIMEOUT,
+                ),
+            )
+
+    async def aclose(self):
+        client, self._client = self._client, None
+        self._hosts.clear()
+        if client is not None:
+            await client.aclose()
+
+    async def request(self, method: str, url: str, **kwargs) -> httpx.Response:
+        self.start()
+        host = httpx.URL(url).host
+        sem = self._hosts.get(host)
+        if sem is None:
+            sem = self._hosts[host] = asyncio.Semaphore(settings.HTTP_CLIENT_PER_HOST)
+        stats = self._stats.get(host)
+        if stats is None:
+            stats = self._stats[host] = HostStats()
+
+        queued = time.perf_counter()
+        stats.waiting += 1
+        async with sem:
+            stats.waiting -= 1
+            started = time.perf_counter()
+            stats.wait_seconds += started - queued
+            stats.in_flight += 1
+            try:
+                return await self._client.request(method, url, **kwargs)
+            except httpx.HTTPError:
+                stats.errors += 1
+                raise
+            finally:
+                stats.in_flight -= 1
+                stats.requests += 1
+                stats.total_seconds += time.perf_counter() - started
+
+    async def get(self, url: str, **kwargs) -> httpx.Response:
+        return await self.request("GET", url, **kwargs)
+
+    async def post(self, url: str, **kwargs) -> httpx.Response:
+        return await self.request("POST", url, **kwargs)
+
+    def stats(self) -> dict:
+        pool = getattr(getattr(self._client, "_transport", None), "_pool", None)
+        connections = getattr(pool, "connections", None)
+        return {
+            "open": self._client is not None,
+            "connections": len(connections) if connections is not None else None,
+            "hosts": {host: s.as_dict() for host, s in self._stats.items()},
+        }
+
+http_client = HttpClient()
@@ -1,13 +1,26 @@
 import time
-import threading
 import re
-from collections import defaultdict
+from abc import ABC, abstractmethod
+from collections import OrderedDict
 from fastapi import HTTPException, Request, status
+from app.core.config.settings import settings
 
-class MemoryRateLimiter:
-    """
-    Very simple in-memory rate limiter for a single-process dev server.
+def _unit_to_seconds(unit: str) -> int:
+    unit = unit.lower()
+    if unit in ("s", "sec", "secs", "second", "seconds"):
+        return 1
+    if unit in ("m", "min", "mins", "minute", "minutes"):
+        return 60
+    if unit in ("h", "hr", "hrs", "hour", "hours"):
+        return 3600
+    if unit in ("d", "day", "days"):
+        return 86400
+    if unit.isdigit():
+        return int(unit)
+    raise ValueError(f"Unknown time unit: {unit}")
 
+def parse_limit(limit_str: str) -> tuple[int, int]:
+    """
     Limit formats:
       - "N/SECONDS" (e.g., "30/60")
       - "N/s", "N/sec"
@@ -16,71 +29,211 @@ class MemoryRateLimiter:
       - "N/d", "N/day"
       - "N/5m", "N/10s", etc.
     """
-    def __init__(self):
-        self._buckets = defaultdict(list)  # key -> [timestamps]
-        self._lock = threading.Lock()
-
-    @staticmethod
-    def _unit_to_seconds(unit: str) -> int:
-        unit = unit.lower()
-        if unit in ("s", "sec", "secs", "second", "seconds"):
-            return 1
-        if unit in ("m", "min", "mins", "minute", "minutes"):
-            return 60
-        if unit in ("h", "hr", "hrs", "hour", "hours"):
-            return 3600
-        if unit in ("d", "day", "days"):
-            return 86400
-        if unit.isdigit():
-            return int(unit)
-        raise ValueError(f"Unknown time unit: {unit}")
-
-    def parse_limit(self, limit_str: str) -> tuple[int, int]:
-        try:
-            count_part, window_part = limit_str.split("/", 1)
-            count = int(count_part.strip())
-
-            m = re.fullmatch(r"\s*(\d+)?\s*([a-zA-Z]+)?\s*", window_part)
-            if not m:
-                window = int(window_part)
-                return count, window
-
-            num, unit = m.groups()
-            if unit:
-                if num is None:
-                    window = self._unit_to_seconds(unit)
-                else:
-                    window = int(num) * self._unit_to_seconds(unit)
-            else:
-                window = int(num)
+    try:
+        count_part, window_part = limit_str.split("/", 1)
+        count = int(count_part.strip())
 
+        m = re.fullmatch(r"\s*(\d+)?\s*([a-zA-Z]+)?\s*", window_part)
+        if not m:
+            window = int(window_part)
             return count, window
-        except Exception:
-            raise ValueError(
-                "Invalid rate limit format. Expected 'count/seconds' or units like '30/min', '100/5m'."
-            )
-
-    def hit(self, key: str, limit_str: str):
-        count, window = self.parse_limit(limit_str)
-        now = time.time()
-        with self._lock:
-            q = self._buckets[key]
-            while q and (now - q[0]) > window:
-                q.pop(0)
-            if len(q) >= count:
-                raise HTTPException(status_code=status.HTTP_429_TOO_MANY_REQUESTS, detail="Rate limit exceeded")
-            q.append(now)
-
-limiter = MemoryRateLimiter()
+
+        num, unit = m.groups()
+        if unit:
+            if num is None:
+                window = _unit_to_seconds(unit)
+            else:
+                window = int(num) * _unit_to_seconds(unit)
+        else:
+            window = int(num)
+
+        return count, window
+    except Exception:
+        raise ValueError(
+            "Invalid rate limit format. Expected 'count/seconds' or units like '30/min', '100/5m'."
+        )
+
+class Limit:
+    """
+    A parsed "count/window" limit, compiled once for GCRA.
+
+    `interval` is the spacing one request "costs"; `burst` is the GCRA tolerance: how
+    far ahead of now a request's arrival slot may be and still be admitted, so that
+    `count` back-to-back requests fit (burst + interval == window).
+    """
+    __slots__ = ("spec", "count", "window", "interval", "burst")
+
+    def __init__(self, spec: str):
+        count, window = parse_limit(spec)
+        if count <= 0 or window <= 0:
+            raise ValueError(f"Rate limit must be positive: {spec!r}")
+        self.spec = spec
+        self.count = count
+        self.window = float(window)
+        self.interval = self.window / count
+        self.burst = self.window - self.interval
+
+    def __repr__(self):
+        return f"Limit({self.spec!r})"
+
+class RateLimited(HTTPException):
+    def __init__(self, retry_after: float):
+        super().__init__(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Rate limit exceeded",
+            headers={"Retry-After": str(max(1, int(retry_after + 0.999)))},
+        )
+
+def gcra(tat: float, now: float, limit: Limit, n: int = 1) -> tuple[float, float]:
+    """
+    One GCRA step for `n` requests at once: returns (new_tat, 0.0) when admitted, or
+    (tat, wait) when refused -- a refusal leaves the stored state untouched.
+    """
+    new_tat = max(tat, now) + n * limit.interval
+    # The last of the n requests is due at new_tat - interval; admit it within `burst` of now
+    # (the epsilon absorbs float error when burst + interval == window exactly).
+    wait = (new_tat - now) - (limit.burst + limit.interval)
+    if wait > 1e-9:
+        return tat, wait
+    return new_tat, 0.0
+
+class RateLimitBackend(ABC):
+    """Where limiter state lives. `acquire` takes `n` requests for `key` or reports the wait."""
+    @abstractmethod
+    async def acquire(self, key: str, limit: Limit, n: int = 1) -> float:
+        ...
+
+class MemoryRateLimiter(RateLimitBackend):
+    """
+    In-process GCRA limiter: one float (theoretical arrival time, TAT) per key.
+
+    Each limit has its own table ordered by last update. A key whose TAT has passed
+    is indistinguishable from a fresh one, and every key's TAT is at most `window`
+    past its last update, so sweeping from the old end keeps each table bounded by
+    the keys seen in the last window. All work per hit is O(1) amortised.
+
+    Not thread-safe; it is only touched from the event loop.
+    """
+    def __init__(self, clock=time.monotonic):
+        self._clock = clock
+        self._tables: dict[str, "OrderedDict[str, float]"] = {}  # limit spec -> key -> TAT
+
+    def check(self, key: str, limit: Limit, n: int = 1) -> float:
+        """Record `n` hits; returns 0 if admitted, else seconds until they would be."""
+        now = self._clock()
+        table = self._tables.get(limit.spec)
+        if table is None:
+            table = self._tables[limit.spec] = OrderedDict()
+        _sweep(table, now)
+
+        tat, wait = gcra(table.get(key, now), now, limit, n)
+        if wait:
+            return wait
+        table[key] = tat
+        table.move_to_end(key)
+        return 0.0
+
+    async def acquire(self, key: str, limit: Limit, n: int = 1) -> float:
+        return self.check(key, limit, n)
+
+    def size(self) -> int:
+        return sum(len(t) for t in self._tables.values())
+
+def _sweep(table: OrderedDict, now: float):
+    """Drop entries from the old end of `table` whose deadline has passed."""
+    while table:
+        oldest_key, deadline = next(iter(table.items()))
+        if deadline > now:
+            break
+        del table[oldest_key]
+
+class RateLimiter:
+    """
+    Front for a backend that may be shared across processes or hosts.
+
+    Two local shortcuts keep most decisions off the backend: a refused key is refused
+    locally until its wait is over (the backend would say the same), and when a limit
+    is roomy the worker reserves a slice of it at once (`local_fraction` of the count)
+    and spends it locally for up to `local_ttl` seconds. Reserved-but-unspent
+    requests are simply lost, so the shortcut can only make a limit stricter.
+    """
+    def __init__(self, backend: RateLimitBackend, *, local_fraction: float = 0.0,
+                 local_ttl: float = 1.0, clock=time.monotonic):
+        self.backend = backend
+        self.local_fraction = local_fraction
+        self.local_ttl = local_ttl
+        self._clock = clock
+        self._denied: "OrderedDict[str, float]" = OrderedDict()                # key -> refused until
+        self._credit: "OrderedDict[str, tuple[float, int]]" = OrderedDict()    # key -> (expires, left)
+        self.local_decisions = 0
+        self.backend_calls = 0
+
+    async def hit(self, key: str, limit: Limit):
+        now = self._clock()
+        slot = f"{limit.spec}|{key}"
+        _sweep(self._denied, now)
+        until = self._denied.get(slot)
+        if until is not None:
+            self.local_decisions += 1
+            raise RateLimited(until - now)
+
+        while self._credit and next(iter(self._credit.values()))[0] <= now:
+            self._credit.popitem(last=False)
+        credit = self._credit.get(slot)
+        if credit is not None and credit[1] > 0:
+            self._credit[slot] = (credit[0], credit[1] - 1)
+            self.local_decisions += 1
+            return
+
+        batch = max(1, int(limit.count * self.local_fraction))
+        self.backend_calls += 1
+        wait = await self.backend.acquire(key, limit, batch)
+        if wait and batch > 1:
+            batch = 1
+            self.backend_calls += 1
+            wait = await self.backend.acquire(key, limit, 1)
+        if wait:
+            self._denied[slot] = now + wait
+            self._denied.move_to_end(slot)
+            raise RateLimited(wait)
+        if batch > 1:
+            self._credit.pop(slot, None)
+            self._credit[slot] = (now + self.local_ttl, batch - 1)
+
+    def stats(self) -> dict:
+        return {
+            "backend": type(self.backend).__name__,
+            "backend_calls": self.backend_calls,
+            "local_decisions": self.local_decisions,
+        }
+
+def build_limiter() -> RateLimiter:
+    backend = settings.RATE_LIMIT_BACKEND.lower()
+    if backend == "memory":
+        return RateLimiter(MemoryRateLimiter())
+    if backend == "shared":
+        from app.core.ratelimit.shared import SharedMemoryRateLimiter
+        store = SharedMemoryRateLimiter(
+            settings.RATE_LIMIT_SHM_NAME, settings.RATE_LIMIT_SHM_SLOTS, settings.RATE_LIMIT_SHM_STRIPES,
+        )
+    elif backend == "mongo":
+        from app.core.ratelimit.mongo import MongoRateLimiter
+        store = MongoRateLimiter()
+    else:
+        raise ValueError(f"Unknown RATE_LIMIT_BACKEND: {settings.RATE_LIMIT_BACKEND!r}")
+    return RateLimiter(store, local_fraction=settings.RATE_LIMIT_LOCAL_FRACTION, local_ttl=settings.RATE_LIMIT_LOCAL_TTL)
+
+limiter = build_limiter()
 
 def rate_limit(limit_str: str, scope: str):
     """
     Use in routes like:
-      @router.get(..., dependencies=[Depends(rate_limit("30/min", "google_start"))])
+      @router.get(..., dependencies=[Depends(rate_limit("30/min", "oidc_start"))])
     Returns a callable dependency (NOT a Depends).
     """
-    def dep(req: Request):
+    limit = Limit(limit_str)  # parsed once, at route definition
+
+    async def dep(req: Request):
         ip = getattr(req.client, "host", "unknown")
-        key = f"{ip}:{scope}"
-        limiter.hit(key, limit_str)
+        await limiter.hit(f"{ip}:{scope}", limit)
     return dep
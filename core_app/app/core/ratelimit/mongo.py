@@ -0,0 +1,58 @@
+import time
+from datetime import datetime, timedelta
+
+from pymongo import ReturnDocument
+
+from app.core.config.settings import settings
+from app.core.ratelimit.limiter import Limit, RateLimitBackend
+from app.db.mongo import get_client
+
+COLLECTION = "rate_limits"
+
+class MongoRateLimiter(RateLimitBackend):
+    """
+    Sliding-window counters in Mongo, shared by every worker on every host.
+
+    One document per (limit, key) holds the counts for the current and previous
+    fixed window; the estimate is `prev * (share of prev still in the window) + cur`.
+    Each decision is a single atomic pipeline upsert that rolls the windows forward
+    and increments in one step. Refused increments are taken back, so a client that
+    keeps hammering is not pushed further out than the limit says. Documents expire
+    via a TTL index on `expires_at` two windows after their last write.
+    """
+    def __init__(self, collection: str = COLLECTION, clock=time.time):
+        self._collection = collection
+        self._clock = clock
+
+    def _coll(self):
+        return get_client()[settings.MONGO_DB_NAME][self._collection]
+
+    async def acquire(self, key: str, limit: Limit, n: int = 1) -> float:
+        now = self._clock()
+        bucket = int(now // limit.window)
+        elapsed = now / limit.window - bucket  # share of the current window already gone
+        same = {"$eq": ["$b", bucket]}
+        doc = await self._coll().find_one_and_update(
+            {"_id": f"{limit.spec}|{key}"},
+            [{"$set": {
+                # Every expression sees the document as it was before this update.
+                "prev": {"$cond": [same, "$prev", {"$cond": [{"$eq": ["$b", bucket - 1]}, "$cur", 0]}]},
+                "cur": {"$add": [{"$cond": [same, "$cur", 0]}, n]},
+                "b": bucket,
+                "expires_at": datetime.utcfromtimestamp((bucket + 2) * limit.window) + timedelta(seconds=1),
+            }}],
+            upsert=True,
+            return_document=ReturnDocument.AFTER,
+            projection={"prev": 1, "cur": 1},
+        )
+        prev, cur = doc.get("prev") or 0, doc["cur"]
+        if prev * (1 - elapsed) + cur <= limit.count:
+            return 0.0
+
+        await self._coll().update_one({"_id": doc["_id"], "b": bucket}, {"$inc": {"cur": -n}})
+        room = limit.count - cur  # what the previous window's weight must shrink to
+        if prev and room >= 0:
+            wait = (1 - room / prev - elapsed) * limit.window
+        else:
+            wait = (1 - elapsed) * limit.window  # not before the next window opens
+        return max(wait, 0.001)
@@ -0,0 +1,111 @@
+import fcntl
+import hashlib
+import os
+import struct
+import tempfile
+import time
+from multiprocessing import resource_tracker, shared_memory
+
+from app.core.ratelimit.limiter import Limit, RateLimitBackend, gcra
+
+_SLOT = struct.Struct("<Qd")  # key hash (0 = empty), TAT
+PROBES = 8
+
+class SharedMemoryRateLimiter(RateLimitBackend):
+    """
+    GCRA state in a POSIX shared-memory hash table, shared by every worker on the host.
+
+    The table is split into `stripes` contiguous regions; a key hashes to one region
+    and probes at most PROBES slots inside it, under an fcntl byte-range lock on that
+    stripe. Slots whose TAT has passed count as free. When all probed slots are live,
+    the one closest to expiry is overwritten, so a table that is far too small fails
+    open for the evicted key rather than growing.
+
+    The segment outlives any one worker on purpose; `unlink()` removes it.
+    """
+    def __init__(self, name: str, slots: int, stripes: int, clock=time.monotonic):
+        if slots % stripes:
+            raise ValueError("RATE_LIMIT_SHM_SLOTS must be a multiple of RATE_LIMIT_SHM_STRIPES")
+        self.name = name
+        self.slots = slots
+        self.stripes = stripes
+        self.stripe_size = slots // stripes
+        self._clock = clock  # CLOCK_MONOTONIC is system-wide, so workers agree on it
+        self._shm: shared_memory.SharedMemory | None = None
+        self._lock_fd: int | None = None
+
+    def _attach(self):
+        size = self.slots * _SLOT.size
+        try:
+            shm = shared_memory.SharedMemory(self.name, create=True, size=size)  # zero-filled
+        except FileExistsError:
+            shm = shared_memory.SharedMemory(self.name)
+            if shm.size < size:
+                shm.close()
+                raise RuntimeError(
+                    f"Shared rate-limit table {self.name!r} is smaller than configured; "
+                    "stop all workers and unlink it, or use a new RATE_LIMIT_SHM_NAME"
+                )
+        # The resource tracker would unlink the segment when this worker exits,
+        # pulling it out from under the others.
+        resource_tracker.unregister(shm._name, "shared_memory")
+        self._lock_fd = os.open(os.path.join(tempfile.gettempdir(), f"{self.name}.lock"), os.O_RDWR | os.O_CREAT, 0o600)
+        self._shm = shm
+
+    @staticmethod
+    def _hash(key: str, limit: Limit) -> int:
+        digest = hashlib.blake2b(f"{limit.spec}|{key}".encode("utf-8"), digest_size=8).digest()
+        return int.from_bytes(digest, "little") | 1
+
+    def check(self, key: str, limit: Limit, n: int = 1) -> float:
+        if self._shm is None:
+            self._attach()
+        buf = self._shm.buf
+        h = self._hash(key, limit)
+        stripe = h % self.stripes
+        base = stripe * self.stripe_size
+        start = (h >> 32) % self.stripe_size
+
+        fcntl.lockf(self._lock_fd, fcntl.LOCK_EX, 1, stripe)
+        try:
+            now = self._clock()
+            match = free = victim = None
+            victim_tat = float("inf")
+            for i in range(PROBES):
+                offset = (base + (start + i) % self.stripe_size) * _SLOT.size
+                slot_hash, tat = _SLOT.unpack_from(buf, offset)
+                if slot_hash == h:
+                    match = offset
+                    break
+                if free is None and (slot_hash == 0 or tat <= now):
+                    free = offset
+                elif tat < victim_tat:
+                    victim, victim_tat = offset, tat
+
+            if match is not None:
+                offset, stored = match, _SLOT.unpack_from(buf, match)[1]
+            else:
+                offset, stored = (free if free is not None else victim), now
+            tat, wait = gcra(stored, now, limit, n)
+            if not wait:
+                _SLOT.pack_into(buf, offset, h, tat)
+            return wait
+        finally:
+            fcntl.lockf(self._lock_fd, fcntl.LOCK_UN, 1, stripe)
+
+    async def acquire(self, key: str, limit: Limit, n: int = 1) -> float:
+        # A few syscalls and a struct read; not worth a thread hop.
+        return self.check(key, limit, n)
+
+    def close(self):
+        if self._shm is not None:
+            self._shm.close()
+            os.close(self._lock_fd)
+            self._shm = self._lock_fd = None
+
+    def unlink(self):
+        if self._shm is None:
+            self._attach()
+        resource_tracker.register(self._shm._name, "shared_memory")  # unlink() unregisters it again
+        self._shm.unlink()
+        self.close()
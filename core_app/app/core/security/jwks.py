@@ -0,0 +1,120 @@
+import asyncio
+import logging
+import re
+import time
+
+from jwt import PyJWK, PyJWKClientConnectionError, PyJWKClientError
+from jwt.exceptions import InvalidKeyError
+
+from app.core.config.settings import settings
+from app.core.http import HttpClient, http_client
+from app.utils.background import start_forever
+
+log = logging.getLogger(__name__)
+
+_MAX_AGE = re.compile(r"(?:^|,)\s*max-age\s*=\s*(\d+)", re.IGNORECASE)
+
+def cache_seconds(cache_control: str | None) -> float:
+    """max-age from a Cache-Control header, clamped to the JWKS_CACHE_* bounds."""
+    m = _MAX_AGE.search(cache_control or "")
+    ttl = int(m.group(1)) if m else settings.JWKS_CACHE_DEFAULT_SECONDS
+    return float(min(max(ttl, settings.JWKS_CACHE_MIN_SECONDS), settings.JWKS_CACHE_MAX_SECONDS))
+
+def key_algorithm(key: PyJWK) -> str:
+    """The one algorithm a key verifies: its JWK `alg`, else PyJWT's default for its kty/crv."""
+    name = getattr(key, "algorithm_name", None)  # PyJWT >= 2.9
+    if name is None:
+        name = next(n for n, alg in key._algorithms.items() if alg is key.Algorithm)
+    return name
+
+class RemoteJWKS:
+    """
+    Process-wide cache of a remote JSON Web Key Set (an identity provider's signing keys).
+
+    Keys are kept for the response's Cache-Control max-age and refreshed in the
+    background shortly before that runs out, so verification normally does no I/O.
+    An unknown `kid` (the provider rotated keys) triggers one refetch, shared by every
+    caller that is waiting at that moment and allowed at most once per
+    JWKS_MIN_REFETCH_SECONDS so forged kids cannot turn into a fetch per request.
+    """
+    def __init__(self, url: str, *, http: HttpClient = http_client, clock=time.monotonic):
+        self.url = url
+        self._http = http
+        self._clock = clock
+        self._keys: dict[str, PyJWK] = {}
+        self._expires_at = 0.0
+        self._fetched_at = float("-inf")
+        self._inflight: asyncio.Future | None = None
+        self.fetches = 0
+
+    @property
+    def fresh(self) -> bool:
+        return bool(self._keys) and self._clock() < self._expires_at
+
+    async def _fetch(self):
+        res = await self._http.get(self.url, timeout=settings.JWKS_FETCH_TIMEOUT)
+        res.raise_for_status()
+        keys = {}
+        for data in res.json().get("keys", []):
+            try:
+                key = PyJWK(data)
+            except InvalidKeyError:
+                continue  # unsupported key types are skipped, as PyJWKSet does
+            if key.key_id and key.public_key_use in (None, "sig"):
+                keys[key.key_id] = key
+        if not keys:
+            raise PyJWKClientConnectionError(f"No usable signing keys at {self.url}")
+        self.fetches += 1
+        self._keys = keys
+        self._fetched_at = self._clock()
+        self._expires_at = self._fetched_at + cache_seconds(res.headers.get("cache-control"))
+
+    async def refresh(self):
+        """Fetch the key set; concurrent callers share one request."""
+        if self._inflight is None:
+            self._inflight = asyncio.ensure_future(self._fetch())
+            self._inflight.add_done_callback(self._clear_inflight)
+        await asyncio.shield(self._inflight)
+
+    def _clear_inflight(self, fut: asyncio.Future):
+        self._inflight = None
+        if not fut.cancelled():
+            fut.exception()  # retrieved by whoever awaited it; silence "never retrieved"
+
+    async def get_key(self, kid: str) -> PyJWK:
+        if not self.fresh:
+            try:
+                await self.refresh()
+            except Exception:
+                if not self._keys:
+                    raise
+                log.warning("JWKS refresh from %s failed; using keys past their max-age", self.url, exc_info=True)
+        key = self._keys.get(kid)
+        if key is None and self._clock() - self._fetched_at >= settings.JWKS_MIN_REFETCH_SECONDS:
+            await self.refresh()
+            key = self._keys.get(kid)
+        if key is None:
+            raise PyJWKClientError(f'Unable to find a signing key that matches: "{kid}"')
+        return key
+
+    async def _keep_fresh(self):
+        delay = 0.0
+        while True:
+            await asyncio.sleep(delay)
+            try:
+                await self.refresh()
+                delay = max(self._expires_at - self._clock() - settings.JWKS_REFRESH_AHEAD_SECONDS, 1.0)
+            except Exception:
+                log.warning("JWKS refresh from %s failed", self.url, exc_info=True)
+                delay = settings.JWKS_MIN_REFETCH_SECONDS
+
+    def start(self):
+        """Prewarm now and keep the keys fresh until shutdown."""
+        start_forever(self._keep_fresh(), name=f"jwks:{self.url}")
+
+    def stats(self) -> dict:
+        return {
+            "keys": len(self._keys),
+            "fetches": self.fetches,
+            "ttl_seconds": round(max(self._expires_at - self._clock(), 0.0), 1),
+        }
@@ -2,25 +2,32 @@ from datetime import datetime, timedelta, timezone
 from typing import Any, Dict, List
 import jwt
 from app.core.config.settings import settings
+from app.core.security.keys import SYMMETRIC_ALGS, keyring
+from app.core.security.permissions import encode_permissions
 from app.utils.ids import new_uuid
 
-ALGO = "HS256"
-
 def _now():
     return datetime.now(timezone.utc)
 
+def _encode(payload: Dict[str, Any]) -> str:
+    key = keyring.active
+    return jwt.encode(payload, key.signing_key, algorithm=key.alg, headers={"kid": key.kid})
+
 def create_access_token(sub: str, roles: List[str], perms: List[str]) -> str:
-    exp = _now() + timedelta(minutes=settings.ACCESS_TOKEN_TTL_MIN)
+    now = _now()
+    exp = now + timedelta(minutes=settings.ACCESS_TOKEN_TTL_MIN)
     payload: Dict[str, Any] = {
         "sub": sub,
         "roles": roles,
-        "perms": perms,
+        **encode_permissions(perms),
         "type": "access",
         "jti": new_uuid(),
-        "iat": int(_now().timestamp()),
+        # Millisecond iat (NumericDate may be fractional) so a token issued right after a
+        # per-user revocation (access_denylist.revoke_user) is not caught by its cutoff.
+        "iat": round(now.timestamp(), 3),
         "exp": int(exp.timestamp()),
     }
-    return jwt.encode(payload, settings.JWT_SECRET, algorithm=ALGO)
+    return _encode(payload)
 
 def create_refresh_token(sub: str, jti: str | None = None, days: int | None = None) -> str:
     exp = _now() + timedelta(days=days or settings.REFRESH_TOKEN_TTL_DAYS)
@@ -31,7 +38,7 @@ def create_refresh_token(sub: str, jti: str | None = None, days: int | None = No
         "iat": int(_now().timestamp()),
         "exp": int(exp.timestamp()),
     }
-    return jwt.encode(payload, settings.JWT_SECRET, algorithm=ALGO)
+    return _encode(payload)
 
 def create_verify_email_token(sub: str, email: str, hours: int = 24) -> str:
     exp = _now() + timedelta(hours=hours)
@@ -43,7 +50,7 @@ def create_verify_email_token(sub: str, email: str, hours: int = 24) -> str:
         "iat": int(_now().timestamp()),
         "exp": int(exp.timestamp()),
     }
-    return jwt.encode(payload, settings.JWT_SECRET, algorithm=ALGO)
+    return _encode(payload)
 
 def create_reset_password_token(sub: str, hours: int = 1) -> str:
     exp = _now() + timedelta(hours=hours)
@@ -54,7 +61,27 @@ def create_reset_password_token(sub: str, hours: int = 1) -> str:
         "iat": int(_now().timestamp()),
         "exp": int(exp.timestamp()),
     }
-    return jwt.encode(payload, settings.JWT_SECRET, algorithm=ALGO)
+    return _encode(payload)
+
+def _decode_legacy_hs256(token: str) -> dict:
+    cutover = settings.JWT_LEGACY_HS256_CUTOVER
+    if not settings.JWT_ACCEPT_LEGACY_HS256 or cutover is None:
+        raise jwt.InvalidTokenError("Missing kid")
+    payload = jwt.decode(token, settings.JWT_SECRET, algorithms=["HS256"], options={"require": ["iat", "exp"]})
+    max_ttl = max(timedelta(days=settings.REFRESH_TOKEN_TTL_DAYS), timedelta(hours=24)).total_seconds()
+    if payload["iat"] >= cutover or payload["exp"] - payload["iat"] > max_ttl:
+        raise jwt.InvalidTokenError("Legacy token outside the migration window")
+    return payload
 
 def decode_token(token: str) -> dict:
-    return jwt.decode(token, settings.JWT_SECRET, algorithms=[ALGO])
+    kid = jwt.get_unverified_header(token).get("kid")
+    if kid is None:
+        # Tokens minted before kid headers existed: HS256 with the shared secret.
+        if settings.JWT_ALG in SYMMETRIC_ALGS:
+            return jwt.decode(token, settings.JWT_SECRET, algorithms=["HS256"])
+        return _decode_legacy_hs256(token)
+    key = keyring.get(kid)
+    if key is None:
+        raise jwt.InvalidTokenError("Unknown kid")
+    # Pin the algorithm to the key so a token can't pick its own (alg confusion).
+    return jwt.decode(token, key.verify_key, algorithms=[key.alg])
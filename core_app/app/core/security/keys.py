@@ -0,0 +1,110 @@
+# app/core/security/keys.py
+"""
+JWT signing keyring.
+
+Asymmetric algorithms (EdDSA, ES256, ...) load PEM files from JWT_KEYS_DIR; the file
+stem is the `kid`. Private keys can sign, public-only files just verify, which is how a
+retired key stays valid until the tokens it signed expire. Rotation:
+
+  1. drop the new private key in the dir and deploy (it is published but not used yet),
+  2. wait longer than JWKS_MAX_AGE, then point JWT_ACTIVE_KID at it,
+  3. after REFRESH_TOKEN_TTL_DAYS replace the old private key with its public half,
+  4. later remove it entirely.
+
+HS* algorithms keep using JWT_SECRET and publish nothing.
+"""
+import hashlib
+import json
+import logging
+from pathlib import Path
+
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import ec, ed25519
+from jwt.algorithms import get_default_algorithms
+
+from app.core.config.settings import settings
+
+log = logging.getLogger(__name__)
+
+SYMMETRIC_ALGS = {"HS256", "HS384", "HS512"}
+
+class SigningKey:
+    __slots__ = ("kid", "alg", "signing_key", "verify_key", "jwk")
+
+    def __init__(self, kid: str, alg: str, signing_key, verify_key, jwk: dict | None):
+        self.kid = kid
+        self.alg = alg
+        self.signing_key = signing_key  # None for verify-only (retired) keys
+        self.verify_key = verify_key
+        self.jwk = jwk                  # public JWK; None for symmetric keys
+
+class Keyring:
+    def __init__(self, keys: list[SigningKey], active_kid: str):
+        self._keys = {k.kid: k for k in keys}
+        if active_kid not in self._keys or self._keys[active_kid].signing_key is None:
+            raise RuntimeError(f"JWT signing key '{active_kid}' not found or has no private key")
+        self.active = self._keys[active_kid]
+        self._jwks_body = json.dumps(
+            {"keys": [k.jwk for k in keys if k.jwk is not None]}, separators=(",", ":")
+        ).encode("utf-8")
+        self._jwks_etag = '"' + hashlib.sha256(self._jwks_body).hexdigest()[:32] + '"'
+
+    def get(self, kid: str) -> SigningKey | None:
+        return self._keys.get(kid)
+
+    def jwks(self) -> tuple[bytes, str]:
+        """
+        Pre-serialized JWKS document and its ETag.
+        """
+        return self._jwks_body, self._jwks_etag
+
+    @classmethod
+    def from_settings(cls) -> "Keyring":
+        alg = settings.JWT_ALG
+        if alg in SYMMETRIC_ALGS:
+            secret = settings.JWT_SECRET
+            return cls([SigningKey("hs", alg, secret, secret, None)], "hs")
+
+        keys = _load_dir(alg, settings.JWT_KEYS_DIR) if settings.JWT_KEYS_DIR else []
+        if not keys:
+            if (settings.ENV or "").lower() != "dev":
+                raise RuntimeError(f"JWT_ALG={alg} requires signing keys in JWT_KEYS_DIR")
+            log.warning("No JWT keys configured; using an ephemeral %s key (dev only, single worker)", alg)
+            keys = [_key_from_private(alg, "dev-ephemeral", generate_private_key(alg))]
+        signers = sorted(k.kid for k in keys if k.signing_key is not None)
+        active = settings.JWT_ACTIVE_KID or (signers[-1] if signers else "")
+        return cls(keys, active)
+
+def generate_private_key(alg: str):
+    if alg == "EdDSA":
+        return ed25519.Ed25519PrivateKey.generate()
+    if alg == "ES256":
+        return ec.generate_private_key(ec.SECP256R1())
+    if alg == "ES384":
+        return ec.generate_private_key(ec.SECP384R1())
+    raise ValueError(f"Unsupported JWT algorithm for key generation: {alg}")
+
+def _jwk(alg: str, kid: str, public_key) -> dict:
+    jwk = get_default_algorithms()[alg].to_jwk(public_key, as_dict=True)
+    jwk.update({"kid": kid, "alg": alg, "use": "sig"})
+    return jwk
+
+def _key_from_private(alg: str, kid: str, private_key) -> SigningKey:
+    algo = get_default_algorithms()[alg]
+    algo.prepare_key(private_key)  # rejects keys that don't match the algorithm
+    public_key = private_key.public_key()
+    return SigningKey(kid, alg, private_key, public_key, _jwk(alg, kid, public_key))
+
+def _load_dir(alg: str, path: str) -> list[SigningKey]:
+    keys: list[SigningKey] = []
+    for f in sorted(Path(path).glob("*.pem")):
+        data = f.read_bytes()
+        if b"PRIVATE KEY" in data:
+            keys.append(_key_from_private(alg, f.stem, serialization.load_pem_private_key(data, password=None)))
+        else:
+            public_key = serialization.load_pem_public_key(data)
+            get_default_algorithms()[alg].prepare_key(public_key)
+            keys.append(SigningKey(f.stem, alg, None, public_key, _jwk(alg, f.stem, public_key)))
+    return keys
+
+keyring = Keyring.from_settings()
@@ -0,0 +1,184 @@
+import asyncio
+import logging
+import time
+from urllib.parse import urlencode
+
+import httpx
+import jwt
+
+from app.core.config.settings import settings
+from app.core.http import HttpClient, http_client
+from app.core.security.jwks import RemoteJWKS, cache_seconds, key_algorithm
+
+log = logging.getLogger(__name__)
+
+class OIDCError(Exception):
+    """The login attempt is invalid (bad code, token or claims). Messages are safe to return."""
+
+class OIDCUnavailable(Exception):
+    """The provider's discovery, token or key endpoints could not be used right now."""
+
+class OIDCProvider:
+    """
+    One OpenID Connect identity provider, configured by issuer URL and client credentials.
+
+    Endpoints come from the issuer's `.well-known/openid-configuration`, cached for its
+    Cache-Control max-age (clamped like JWKS) and kept past expiry if a refetch fails;
+    signing keys come from a RemoteJWKS for the advertised `jwks_uri`. After
+    `prewarm()`, a login does no metadata or key fetches.
+    """
+    def __init__(
+        self, name: str, *, issuer: str, client_id: str, redirect_uri: str,
+        client_secret: str | None = None, scopes: str = "openid email profile",
+        auth_params: dict | None = None, extra_issuers: tuple = (), algorithms: tuple = (),
+        allow_signup: bool | None = None, http: HttpClient = http_client, clock=time.monotonic,
+    ):
+        self.name = name
+        self.issuer = issuer.rstrip("/")
+        self.client_id = client_id
+        self.client_secret = client_secret
+        self.redirect_uri = redirect_uri
+        self.scopes = scopes
+        self.auth_params = auth_params or {}
+        self.extra_issuers = set(extra_issuers)
+        # id_token algorithms we accept; empty = exactly the signing key's own algorithm.
+        # Never taken from discovery, so the issuer's metadata can't widen it.
+        self.algorithms = list(algorithms)
+        self.allow_signup = settings.OAUTH_ALLOW_SIGNUP if allow_signup is None else allow_signup
+        self._http = http
+        self._clock = clock
+        self._metadata: dict | None = None
+        self._expires_at = 0.0
+        self._lock = asyncio.Lock()
+        self.jwks: RemoteJWKS | None = None
+
+    @property
+    def discovery_url(self) -> str:
+        return f"{self.issuer}/.well-known/openid-configuration"
+
+    async def _fetch_metadata(self):
+        res = await self._http.get(self.discovery_url)
+        res.raise_for_status()
+        metadata = res.json()
+        for field in ("authorization_endpoint", "token_endpoint", "jwks_uri"):
+            if field not in metadata:
+                raise OIDCUnavailable(f"{self.name}: discovery document has no {field}")
+        if self.jwks is None or self.jwks.url != metadata["jwks_uri"]:
+            self.jwks = RemoteJWKS(metadata["jwks_uri"], http=self._http, clock=self._clock)
+        self._metadata = metadata
+        self._expires_at = self._clock() + cache_seconds(res.headers.get("cache-control"))
+
+    async def metadata(self) -> dict:
+        if self._metadata is None or self._clock() >= self._expires_at:
+            async with self._lock:  # one fetch however many logins are waiting
+                if self._metadata is None or self._clock() >= self._expires_at:
+                    try:
+                        await self._fetch_metadata()
+                    except Exception:
+                        if self._metadata is None:
+                            raise
+                        log.warning("%s: discovery refresh failed; keeping cached metadata", self.name, exc_info=True)
+                        self._expires_at = self._clock() + settings.JWKS_MIN_REFETCH_SECONDS
+        return self._metadata
+
+    async def prewarm(self):
+        try:
+            await self.metadata()
+        except Exception:
+            log.warning("%s: discovery prewarm failed; will retry on first login", self.name, exc_info=True)
+            return
+        self.jwks.start()
+
+    async def authorization_url(self, state: str, nonce: str) -> str:
+        params = {
+            "client_id": self.client_id,
+            "redirect_uri": self.redirect_uri,
+            "response_type": "code",
+            "scope": self.scopes,
+            "state": state,
+            "nonce": nonce,
+            **self.auth_params,
+        }
+        return f"{(await self.metadata())['authorization_endpoint']}?{urlencode(params)}"
+
+    async def exchange_code(self, code: str) -> dict:
+        data = {
+            "code": code,
+            "client_id": self.client_id,
+            "redirect_uri": self.redirect_uri,
+            "grant_type": "authorization_code",
+        }
+        # Public clients using PKCE from a SPA have no secret.
+        if self.client_secret:
+            data["client_secret"] = self.client_secret
+        res = await self._http.post((await self.metadata())["token_endpoint"], data=data)
+        if res.status_code != 200:
+            log.info("%s: token exchange failed (%s): %s", self.name, res.status_code, res.text[:500])
+            raise OIDCError("Token exchange failed")
+        return res.json()
+
+    async def verify_id_token(self, id_token: str, nonce: str | None = None) -> dict:
+        metadata = await self.metadata()
+        try:
+            kid = jwt.get_unverified_header(id_token).get("kid")
+        except jwt.PyJWTError:
+            raise OIDCError("Malformed id_token")
+        try:
+            key = await self.jwks.get_key(kid)
+        except (httpx.HTTPError, jwt.PyJWKClientConnectionError) as e:
+            raise OIDCUnavailable(f"{self.name}: signing keys unavailable") from e
+        except jwt.PyJWKClientError:
+            raise OIDCError("Unknown id_token signing key")
+        try:
+            claims = jwt.decode(
+                id_token,
+                key.key,
+                algorithms=self.algorithms or [key_algorithm(key)],
+                audience=self.client_id,
+                options={"require": ["exp", "iat", "aud", "iss", "sub"]},
+            )
+        except jwt.PyJWTError as e:
+            log.info("%s: id_token rejected: %s", self.name, e)
+            raise OIDCError("id_token validation failed")
+        if claims["iss"] not in {metadata.get("issuer", self.issuer)} | self.extra_issuers:
+            raise OIDCError("Untrusted issuer")
+        if nonce is not None and claims.get("nonce") != nonce:
+            raise OIDCError("Nonce mismatch")
+        return claims
+
+    def stats(self) -> dict:
+        return {
+            "discovered": self._metadata is not None,
+            "jwks": self.jwks.stats() if self.jwks else None,
+        }
+
+class ProviderRegistry:
+    def __init__(self, providers: list[OIDCProvider] = ()):
+        self._providers = {p.name: p for p in providers}
+
+    def get(self, name: str) -> OIDCProvider | None:
+        return self._providers.get(name)
+
+    def __iter__(self):
+        return iter(self._providers.values())
+
+    @classmethod
+    def from_settings(cls) -> "ProviderRegistry":
+        providers = []
+        if settings.GOOGLE_CLIENT_ID and settings.GOOGLE_REDIRECT_URI:
+            providers.append(OIDCProvider(
+                "google",
+                issuer="https://accounts.google.com",
+                client_id=settings.GOOGLE_CLIENT_ID,
+                client_secret=settings.GOOGLE_CLIENT_SECRET,
+                redirect_uri=settings.GOOGLE_REDIRECT_URI,
+                auth_params={"access_type": "offline", "prompt": "consent"},
+                extra_issuers=("accounts.google.com",),  # Google still issues the bare host sometimes
+            ))
+        for name, conf in settings.OIDC_PROVIDERS.items():
+            conf = dict(conf)
+            extra = tuple(conf.pop("extra_issuers", ()))
+            providers.append(OIDCProvider(name, extra_issuers=extra, **conf))
+        return cls(providers)
+
+providers = ProviderRegistry.from_settings()
@@ -1,10 +1,145 @@
+import asyncio
+import logging
+import multiprocessing
+import statistics
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor
+
 import bcrypt
+from app.core.config.settings import settings
+
+log = logging.getLogger(__name__)
+
+DEFAULT_BCRYPT_ROUNDS = 12  # bcrypt.gensalt() default
+MAX_BCRYPT_ROUNDS = 20      # calibration ceiling (~1 min per hash on current hardware)
 
-def hash_password(raw: str) -> str:
-    return bcrypt.hashpw(raw.encode("utf-8"), bcrypt.gensalt()).decode("utf-8")
+class PasswordHasherBusy(Exception):
+    """
+    Raised when PASSWORD_HASH_MAX_PENDING hash/verify jobs are already queued.
+    Mapped to 503 in app.main so callers fail fast instead of piling up.
+    """
+
+def hash_password(raw: str, rounds: int | None = None) -> str:
+    # rounds is passed explicitly to pool workers: they never see the calibrated value
+    salt = bcrypt.gensalt(rounds=rounds or get_bcrypt_rounds())
+    return bcrypt.hashpw(raw.encode("utf-8"), salt).decode("utf-8")
 
 def verify_password(raw: str, hashed: str) -> bool:
     try:
         return bcrypt.checkpw(raw.encode("utf-8"), hashed.encode("utf-8"))
     except Exception:
         return False
+
+# ----- Cost (work factor) -----
+
+_rounds: int | None = None
+
+def get_bcrypt_rounds() -> int:
+    if settings.BCRYPT_ROUNDS:
+        return settings.BCRYPT_ROUNDS
+    return _rounds or DEFAULT_BCRYPT_ROUNDS
+
+def set_bcrypt_rounds(rounds: int):
+    global _rounds
+    _rounds = rounds
+
+def bcrypt_rounds_of(hashed: str) -> int | None:
+    # "$2b$12$<salt+hash>" -> 12
+    try:
+        return int(hashed.split("$")[2])
+    except (AttributeError, IndexError, ValueError):
+        return None
+
+def needs_rehash(hashed: str) -> bool:
+    cost = bcrypt_rounds_of(hashed)
+    return cost is not None and cost != get_bcrypt_rounds()
+
+def measure_bcrypt_ms(rounds: int, samples: int = 3) -> float:
+    salt = bcrypt.gensalt(rounds=rounds)
+    timings = []
+    for _ in range(samples):
+        start = time.perf_counter()
+        bcrypt.hashpw(b"calibration-password", salt)
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings)
+
+def calibrate_bcrypt_rounds(target_ms: float | None = None, min_rounds: int | None = None) -> int:
+    """
+    Highest cost whose median hash time on this machine stays under target_ms.
+    Never goes below min_rounds, even on slow hardware.
+    """
+    target_ms = target_ms if target_ms is not None else settings.BCRYPT_TARGET_MS
+    rounds = min_rounds if min_rounds is not None else settings.BCRYPT_MIN_ROUNDS
+    elapsed = measure_bcrypt_ms(rounds)
+    # Each extra round doubles the work; stop before the next one would blow the budget.
+    while rounds < MAX_BCRYPT_ROUNDS and elapsed * 2 <= target_ms:
+        rounds += 1
+        elapsed = measure_bcrypt_ms(rounds)
+        if elapsed > target_ms:
+            rounds -= 1
+            break
+    return rounds
+
+def configure_bcrypt_rounds() -> int:
+    """
+    Startup hook. A pinned BCRYPT_ROUNDS always wins; otherwise calibrate if enabled.
+    Prefer pinning the value from scripts/calibrate_bcrypt.py for a fleet: workers that
+    calibrate independently can disagree and keep rehashing each other's hashes.
+    """
+    if not settings.BCRYPT_ROUNDS and settings.BCRYPT_CALIBRATE_ON_STARTUP:
+        set_bcrypt_rounds(calibrate_bcrypt_rounds())
+    rounds = get_bcrypt_rounds()
+    log.info("bcrypt cost set to %s", rounds)
+    return rounds
+
+# ----- Off-loop hashing -----
+
+_pool: Executor | None = None
+_pending = 0
+
+def _get_pool() -> Executor | None:
+    # PASSWORD_HASH_WORKERS=0 -> default thread pool (bcrypt releases the GIL; handy for dev/tests)
+    global _pool
+    if _pool is None and settings.PASSWORD_HASH_WORKERS > 0:
+        _pool = ProcessPoolExecutor(
+            max_workers=settings.PASSWORD_HASH_WORKERS,
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+    return _pool
+
+async def _run(fn, *args):
+    global _pending
+    if _pending >= settings.PASSWORD_HASH_MAX_PENDING:
+        raise PasswordHasherBusy("Password hashing pool saturated")
+    _pending += 1
+    try:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(_get_pool(), fn, *args)
+    finally:
+        _pending -= 1
+
+async def hash_password_async(raw: str) -> str:
+    return await _run(hash_password, raw, get_bcrypt_rounds())
+
+async def verify_password_async(raw: str, hashed: str) -> bool:
+    return await _run(verify_password, raw, hashed)
+
+def pending_hash_jobs() -> int:
+    return _pending
+
+def init_password_pool():
+    """
+    Create the pool at startup so the first login doesn't pay for process spawn.
+    """
+    pool = _get_pool()
+    if isinstance(pool, ProcessPoolExecutor):
+        # Workers are spawned on demand; one no-op job per worker starts them all.
+        jobs = [pool.submit(verify_password, "", "") for _ in range(settings.PASSWORD_HASH_WORKERS)]
+        for j in jobs:
+            j.result()
+
+def shutdown_password_pool():
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
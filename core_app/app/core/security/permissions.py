@@ -0,0 +1,60 @@
+# app/core/security/permissions.py
+"""
+Permission registry for compact access tokens.
+
+A permission's index in PERMISSION_REGISTRY is its bit in the token's `pb` bitmap, so the
+tuple is append-only: never reorder or remove entries, and bump PERMISSION_REGISTRY_VERSION
+when appending. Permissions missing from the registry still travel as a plain `perms` list.
+"""
+import base64
+from typing import Any, Iterable
+
+PERMISSION_REGISTRY: tuple[str, ...] = (
+    "users:read",
+    "users:write",
+    "roles:manage",
+    "metrics:read",
+)
+PERMISSION_REGISTRY_VERSION = 2
+
+_BIT = {perm: i for i, perm in enumerate(PERMISSION_REGISTRY)}
+
+# _DECODE[byte_index][byte_value] -> permissions set in that byte
+_DECODE: tuple[tuple[tuple[str, ...], ...], ...] = tuple(
+    tuple(
+        tuple(PERMISSION_REGISTRY[i * 8 + b] for b in range(8) if value >> b & 1 and i * 8 + b < len(PERMISSION_REGISTRY))
+        for value in range(256)
+    )
+    for i in range((len(PERMISSION_REGISTRY) + 7) // 8)
+)
+
+def encode_permissions(perms: Iterable[str]) -> dict[str, Any]:
+    """
+    Token claims for a permission set: {"pv": version, "pb": base64url bitmap[, "perms": unregistered]}.
+    """
+    mask = 0
+    extras: list[str] = []
+    for p in perms:
+        bit = _BIT.get(p)
+        if bit is None:
+            extras.append(p)
+        else:
+            mask |= 1 << bit
+    raw = mask.to_bytes((mask.bit_length() + 7) // 8, "little")
+    claims: dict[str, Any] = {
+        "pv": PERMISSION_REGISTRY_VERSION,
+        "pb": base64.urlsafe_b64encode(raw).rstrip(b"=").decode("ascii"),
+    }
+    if extras:
+        claims["perms"] = sorted(extras)
+    return claims
+
+def decode_permissions(claims: dict) -> list[str]:
+    perms = list(claims.get("perms") or [])  # unregistered perms, or a pre-bitmap token
+    pb = claims.get("pb")
+    if pb:
+        raw = base64.urlsafe_b64decode(pb + "=" * (-len(pb) % 4))
+        # Bytes past our table come from a newer registry: unknown to us, so ignored.
+        for i, value in enumerate(raw[: len(_DECODE)]):
+            perms.extend(_DECODE[i][value])
+    return perms
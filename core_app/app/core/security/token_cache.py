@@ -0,0 +1,67 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from app.core.config.settings import settings
+
+class VerifiedClaimsCache:
+    """
+    Bounded LRU of already-verified access tokens.
+
+    Keyed by SHA-256 of the full token (signature included), so only a byte-identical
+    token can hit. Entries die at the token's own `exp`; an expired entry is never served.
+    """
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self._entries: "OrderedDict[bytes, tuple[int, object]]" = OrderedDict()  # digest -> (exp, value)
+        self._lock = threading.Lock()  # sync dependencies run in the threadpool
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _key(token: str) -> bytes:
+        return hashlib.sha256(token.encode("utf-8")).digest()
+
+    def get(self, token: str):
+        if self.maxsize <= 0:
+            return None
+        key = self._key(token)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            exp, value = entry
+            if time.time() >= exp:
+                del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, token: str, exp: int, value):
+        if self.maxsize <= 0:
+            return
+        key = self._key(token)
+        with self._lock:
+            self._entries[key] = (exp, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": (self.hits / total) if total else 0.0,
+        }
+
+access_claims_cache = VerifiedClaimsCache(settings.ACCESS_TOKEN_CACHE_SIZE)
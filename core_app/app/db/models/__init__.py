@@ -2,5 +2,7 @@ from .user import User
 from .refresh_token import RefreshToken
 from .role import Role
 from .oauth_account import OAuthAccount
+from .token_revocation import TokenRevocation
+from .email_outbox import EmailOutbox
 
-__all__ = ["User", "RefreshToken", "Role", "OAuthAccount"]
+__all__ = ["User", "RefreshToken", "Role", "OAuthAccount", "TokenRevocation", "EmailOutbox"]
@@ -0,0 +1,28 @@
+from datetime import datetime
+from typing import Optional
+
+from beanie import Document
+from pydantic import Field
+from pymongo import ASCENDING, IndexModel
+
+class EmailOutbox(Document):
+    to: str
+    subject: str
+    html: str
+    text: Optional[str] = None
+    status: str = "pending"            # pending | sending | sent | failed
+    attempts: int = 0
+    # pending: not before this; sending: the lease expires here and the message is claimable again
+    next_attempt_at: datetime = Field(default_factory=datetime.utcnow)
+    lease_owner: Optional[str] = None
+    last_error: Optional[str] = None
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+    sent_at: Optional[datetime] = None
+    purge_at: Optional[datetime] = None  # set once sent/failed; TTL
+
+    class Settings:
+        name = "email_outbox"
+        indexes = [
+            IndexModel([("status", ASCENDING), ("next_attempt_at", ASCENDING)], name="claimable"),
+            IndexModel([("purge_at", ASCENDING)], name="purge", expireAfterSeconds=0),
+        ]
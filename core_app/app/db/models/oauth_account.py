@@ -2,11 +2,13 @@
 from datetime import datetime
 from typing import Optional
 from beanie import Document, Indexed
+from pymongo import ASCENDING, IndexModel
+from app.utils.ids import UserId, encode_user_id
 
 class OAuthAccount(Document):
     provider: str                 # "google"
     provider_sub: Indexed(str)    # Google's stable user id (sub)
-    user_id: str                  # your local User.id
+    user_id: UserId               # your local User.id
 
     # cached profile bits (optional)
     email: Optional[str] = None
@@ -18,7 +20,9 @@ class OAuthAccount(Document):
 
     class Settings:
         name = "oauth_accounts"
+        bson_encoders = {UserId: encode_user_id}
         indexes = [
-            [("provider", 1), ("provider_sub", 1)],  # compound index
+            # unique: concurrent first logins race into one link, see OAuthAccountsRepo.link_or_create_user
+            IndexModel([("provider", ASCENDING), ("provider_sub", ASCENDING)], name="provider_sub_unique", unique=True),
             "user_id",
         ]
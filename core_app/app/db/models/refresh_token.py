@@ -1,19 +1,39 @@
 from datetime import datetime
 from typing import Optional
 
-from beanie import Document, Indexed
-from pydantic import Field
+from beanie import Document
+from pydantic import Field, PrivateAttr
+from pymongo import ASCENDING, DESCENDING, IndexModel
+from app.utils.ids import UserId, encode_user_id
 
 class RefreshToken(Document):
-    # Keep a separate indexed JTI field (not using it as _id)
-    jti: Indexed(str, unique=True)
-    user_id: str
-    token_hash: str
-    user_agent: Optional[str] = None
+    # The JTI is the _id: no second unique index, no unused ObjectId.
+    id: str  # Mongo _id == jti
+    user_id: UserId
+    token_hash: bytes                 # raw 32-byte SHA-256, stored as BSON binary
+    ua_id: Optional[bytes] = None     # -> user_agents._id (interned user agent)
     ip: Optional[str] = None
     expires_at: datetime  # TTL index created in init_mongo()
     revoked_at: Optional[datetime] = None
+    replaced_by: Optional[str] = None  # jti of the token this one was rotated into
+    family: Optional[str] = None       # jti of the login that started this rotation chain
     created_at: datetime = Field(default_factory=datetime.utcnow)
 
+    # Not persisted: the repo interns it into user_agents alongside the insert.
+    _user_agent: Optional[str] = PrivateAttr(default=None)
+
+    @property
+    def jti(self) -> str:
+        return self.id
+
     class Settings:
         name = "refresh_tokens"
+        bson_encoders = {UserId: encode_user_id}
+        indexes = [
+            # revoke_all_for_user hits the (user_id, revoked_at) prefix; session listing
+            # walks the rest in order, _id making the pagination cursor unique.
+            IndexModel(
+                [("user_id", ASCENDING), ("revoked_at", ASCENDING), ("expires_at", DESCENDING), ("_id", DESCENDING)],
+                name="user_active_sessions",
+            ),
+        ]
@@ -0,0 +1,21 @@
+from datetime import datetime
+from typing import Optional
+
+from beanie import Document
+from pydantic import Field
+from pymongo import ASCENDING, IndexModel
+
+class TokenRevocation(Document):
+    # "jti:<jti>" revokes one access token; "user:<id>" revokes everything issued before not_before.
+    id: str
+    kind: str                          # "jti" | "user"
+    not_before: Optional[float] = None  # user watermark: tokens with iat < not_before are revoked
+    expires_at: datetime               # no access token can outlive this -> TTL
+    updated_at: datetime = Field(default_factory=datetime.utcnow)
+
+    class Settings:
+        name = "token_revocations"
+        indexes = [
+            IndexModel([("updated_at", ASCENDING)], name="sync_cursor"),
+            IndexModel([("expires_at", ASCENDING)], name="ttl", expireAfterSeconds=0),
+        ]
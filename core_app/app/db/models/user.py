@@ -2,13 +2,14 @@ from datetime import datetime
 from typing import Optional
 from beanie import Document, Indexed
 from pydantic import Field, EmailStr
-from app.utils.ids import new_uuid
+from pymongo import ASCENDING, IndexModel
+from app.utils.ids import UserId, encode_user_id, new_user_id
 
 class User(Document):
-    id: str = Field(default_factory=new_uuid)  # Mongo _id
+    id: UserId = Field(default_factory=new_user_id)  # Mongo _id; str or binary UUID, see ID_STORAGE
     email: Indexed(EmailStr, unique=True)
     full_name: str
-    hashed_password: str
+    hashed_password: Optional[str] = None  # None: passwordless (OAuth-only) account
     is_active: bool = True
     email_verified_at: Optional[datetime] = None
     roles: list[str] = Field(default_factory=lambda: ["user"])  # NEW: role slugs
@@ -17,3 +18,7 @@ class User(Document):
 
     class Settings:
         name = "users"
+        indexes = [
+            IndexModel([("created_at", ASCENDING)], name="created_at"),  # known_emails sync cursor
+        ]
+        bson_encoders = {UserId: encode_user_id}
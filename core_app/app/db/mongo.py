@@ -1,4 +1,7 @@
 # app/db/mongo.py
+import asyncio
+import importlib.util
+import time
 from typing import Optional
 
 from motor.motor_asyncio import AsyncIOMotorClient
@@ -9,9 +12,36 @@ from app.db.models.user import User
 from app.db.models.refresh_token import RefreshToken
 from app.db.models.oauth_account import OAuthAccount
 from app.db.models.role import Role  # keep if you actually have this model
+from app.db.models.token_revocation import TokenRevocation
+from app.db.models.email_outbox import EmailOutbox
+from app.db.pool_metrics import pool_metrics
 
 _mongo_client: Optional[AsyncIOMotorClient] = None
 
+_COMPRESSOR_MODULES = {"zstd": "zstandard", "snappy": "snappy", "zlib": "zlib"}
+
+def _compressors() -> list[str]:
+    # pymongo drops unavailable compressors with a warning per client; skip them quietly instead.
+    wanted = [c.strip() for c in settings.MONGO_COMPRESSORS.split(",") if c.strip()]
+    return [c for c in wanted if c in _COMPRESSOR_MODULES and importlib.util.find_spec(_COMPRESSOR_MODULES[c])]
+
+def client_options() -> dict:
+    opts = dict(
+        uuidRepresentation="standard",  # decodes binary subtype-4 user ids (ID_STORAGE=binary) as uuid.UUID
+        maxPoolSize=settings.MONGO_MAX_POOL_SIZE,
+        minPoolSize=settings.MONGO_MIN_POOL_SIZE,
+        readPreference=settings.MONGO_READ_PREFERENCE,
+        serverSelectionTimeoutMS=settings.MONGO_SERVER_SELECTION_TIMEOUT_MS,
+        connectTimeoutMS=settings.MONGO_CONNECT_TIMEOUT_MS,
+        socketTimeoutMS=settings.MONGO_SOCKET_TIMEOUT_MS,
+        maxIdleTimeMS=settings.MONGO_MAX_IDLE_TIME_MS,
+        event_listeners=[pool_metrics],
+    )
+    compressors = _compressors()
+    if compressors:
+        opts["compressors"] = ",".join(compressors)
+    return opts
+
 
 async def init_mongo() -> None:
     """
@@ -19,9 +49,15 @@ async def init_mongo() -> None:
     Call this once on app startup.
     """
     global _mongo_client
-    _mongo_client = AsyncIOMotorClient(settings.MONGO_URI)
+    _mongo_client = AsyncIOMotorClient(settings.MONGO_URI, **client_options())
     db = _mongo_client[settings.MONGO_DB_NAME]
 
+    # (provider, provider_sub) used to be a plain index; its unique replacement has the same
+    # key pattern, which Mongo refuses while the old one exists.
+    old = (await db["oauth_accounts"].index_information()).get("provider_1_provider_sub_1")
+    if old and not old.get("unique"):
+        await db["oauth_accounts"].drop_index("provider_1_provider_sub_1")
+
     await init_beanie(
         database=db,
         document_models=[
@@ -29,14 +65,54 @@ async def init_mongo() -> None:
             RefreshToken,
             OAuthAccount,
             Role,  # or comment out if not using
+            TokenRevocation,
+            EmailOutbox,
         ],
     )
 
     # TTL index for refresh tokens
     await db["refresh_tokens"].create_index("expires_at", expireAfterSeconds=0)
 
+    # TTL index for shared rate-limit counters (RATE_LIMIT_BACKEND=mongo)
+    await db["rate_limits"].create_index("expires_at", expireAfterSeconds=0)
+
+    # TTL index for per-account login failure counters
+    await db["login_failures"].create_index("expires_at", expireAfterSeconds=0)
+
+    # The old layout kept jti in its own unique index; jti is now _id and the field is gone,
+    # so that index would reject every second new token (duplicate null).
+    if "jti_1" in await db["refresh_tokens"].index_information():
+        await db["refresh_tokens"].drop_index("jti_1")
+
 
 def get_client() -> AsyncIOMotorClient:
     if _mongo_client is None:
         raise RuntimeError("Mongo client not initialized")
     return _mongo_client
+
+
+def pool_stats() -> dict:
+    return pool_metrics.snapshot(settings.MONGO_MAX_POOL_SIZE)
+
+
+async def readiness() -> tuple[bool, dict]:
+    """
+    Ping the primary within MONGO_READY_TIMEOUT_SECONDS and check that no pool is
+    exhausted (in-use at the saturation limit while callers queue for a connection).
+    """
+    report: dict = {"pools": pool_stats()}
+    try:
+        started = time.perf_counter()
+        await asyncio.wait_for(get_client().admin.command("ping"), settings.MONGO_READY_TIMEOUT_SECONDS)
+        report["ping_ms"] = round((time.perf_counter() - started) * 1000, 2)
+    except Exception as e:
+        report["error"] = f"ping failed: {type(e).__name__}"
+        return False, report
+    exhausted = [
+        address for address, p in report["pools"].items()
+        if p["waiting"] and p["saturation"] >= settings.MONGO_READY_MAX_SATURATION
+    ]
+    if exhausted:
+        report["error"] = f"connection pool exhausted: {', '.join(exhausted)}"
+        return False, report
+    return True, report
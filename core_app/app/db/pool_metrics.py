@@ -0,0 +1,105 @@
+# app/db/pool_metrics.py
+import threading
+
+from pymongo import monitoring
+
+class _PoolStats:
+    __slots__ = ("open", "in_use", "waiting", "checkouts", "failed", "wait_total", "wait_max", "cleared")
+
+    def __init__(self):
+        self.open = self.in_use = self.waiting = self.checkouts = self.failed = self.cleared = 0
+        self.wait_total = self.wait_max = 0.0
+
+class MongoPoolMetrics(monitoring.ConnectionPoolListener):
+    """
+    Per-server connection pool gauges from pymongo's CMAP events.
+
+    Callbacks run on whatever thread the driver uses, so updates take a lock; reads
+    for /metrics and /readyz copy a snapshot. Check-out wait comes from the
+    `duration` pymongo reports on each checked-out/failed event.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pools: dict[str, _PoolStats] = {}
+
+    def _pool(self, address) -> _PoolStats:
+        key = f"{address[0]}:{address[1]}"
+        stats = self._pools.get(key)
+        if stats is None:
+            stats = self._pools[key] = _PoolStats()
+        return stats
+
+    def pool_created(self, event):
+        with self._lock:
+            self._pool(event.address)
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        with self._lock:
+            self._pool(event.address).cleared += 1
+
+    def pool_closed(self, event):
+        with self._lock:
+            self._pools.pop(f"{event.address[0]}:{event.address[1]}", None)
+
+    def connection_created(self, event):
+        with self._lock:
+            self._pool(event.address).open += 1
+
+    def connection_ready(self, event):
+        pass
+
+    def connection_closed(self, event):
+        with self._lock:
+            self._pool(event.address).open -= 1
+
+    def connection_check_out_started(self, event):
+        with self._lock:
+            self._pool(event.address).waiting += 1
+
+    def connection_check_out_failed(self, event):
+        with self._lock:
+            p = self._pool(event.address)
+            p.waiting -= 1
+            p.failed += 1
+            self._record_wait(p, event.duration)
+
+    def connection_checked_out(self, event):
+        with self._lock:
+            p = self._pool(event.address)
+            p.waiting -= 1
+            p.in_use += 1
+            p.checkouts += 1
+            self._record_wait(p, event.duration)
+
+    def connection_checked_in(self, event):
+        with self._lock:
+            self._pool(event.address).in_use -= 1
+
+    @staticmethod
+    def _record_wait(p: _PoolStats, duration: float | None):
+        if duration is not None:
+            p.wait_total += duration
+            p.wait_max = max(p.wait_max, duration)
+
+    def snapshot(self, max_pool_size: int) -> dict:
+        with self._lock:
+            out = {}
+            for address, p in self._pools.items():
+                n = (p.checkouts + p.failed) or 1
+                out[address] = {
+                    "open": p.open,
+                    "in_use": p.in_use,
+                    "waiting": max(p.waiting, 0),
+                    "saturation": round(p.in_use / max_pool_size, 3) if max_pool_size else 0.0,
+                    "checkouts": p.checkouts,
+                    "checkout_failures": p.failed,
+                    "checkout_wait_ms_avg": round(p.wait_total / n * 1000, 3),
+                    "checkout_wait_ms_max": round(p.wait_max * 1000, 3),
+                    "cleared": p.cleared,
+                }
+            return out
+
+pool_metrics = MongoPoolMetrics()
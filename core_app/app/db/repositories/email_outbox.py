@@ -0,0 +1,85 @@
+# app/db/repositories/email_outbox.py
+from datetime import datetime, timedelta
+from typing import Optional
+
+from pymongo import ReturnDocument
+
+from app.core.config.settings import settings
+from app.db.models import EmailOutbox
+
+CLAIMABLE = ["pending", "sending"]  # "sending" only once its lease has run out
+
+def max_attempts() -> int:
+    return settings.EMAIL_SEND_RETRIES + 1
+
+class EmailOutboxRepo:
+    """
+    Durable mail queue. API handlers `add`; the email worker (scripts/email_worker.py)
+    `claim`s one message at a time under a lease, then marks it `sent` or schedules a
+    `retry`. A worker that dies mid-send leaves a lease that simply runs out; a message
+    whose lease ran out on its last allowed attempt is never claimed again and
+    `fail_abandoned` marks it failed (it may be what kills the worker).
+    """
+    def __init__(self, *_):
+        self._coll = EmailOutbox.get_motor_collection()
+
+    async def add(self, to: str, subject: str, html: str, text: Optional[str] = None):
+        await EmailOutbox(to=to, subject=subject, html=html, text=text).insert()
+
+    async def claim(self, owner: str) -> dict | None:
+        now = datetime.utcnow()
+        return await self._coll.find_one_and_update(
+            {"status": {"$in": CLAIMABLE}, "next_attempt_at": {"$lte": now}, "attempts": {"$lt": max_attempts()}},
+            {
+                "$set": {
+                    "status": "sending",
+                    "lease_owner": owner,
+                    "next_attempt_at": now + timedelta(seconds=settings.EMAIL_OUTBOX_LEASE_SECONDS),
+                },
+                "$inc": {"attempts": 1},
+            },
+            sort=[("next_attempt_at", 1)],
+            return_document=ReturnDocument.AFTER,
+        )
+
+    async def mark_sent(self, msg: dict, owner: str):
+        now = datetime.utcnow()
+        await self._coll.update_one(
+            {"_id": msg["_id"], "lease_owner": owner},
+            {"$set": {
+                "status": "sent", "sent_at": now, "lease_owner": None,
+                "purge_at": now + timedelta(days=settings.EMAIL_OUTBOX_KEEP_DAYS),
+            }},
+        )
+
+    async def retry(self, msg: dict, owner: str, error: str):
+        now = datetime.utcnow()
+        attempts = msg["attempts"]
+        if attempts > settings.EMAIL_SEND_RETRIES:
+            update = {
+                "status": "failed", "lease_owner": None, "last_error": error,
+                "purge_at": now + timedelta(days=settings.EMAIL_OUTBOX_KEEP_DAYS),
+            }
+        else:
+            delay = min(settings.EMAIL_RETRY_BASE_SECONDS * 2 ** (attempts - 1), settings.EMAIL_RETRY_MAX_SECONDS)
+            update = {
+                "status": "pending", "lease_owner": None, "last_error": error,
+                "next_attempt_at": now + timedelta(seconds=delay),
+            }
+        await self._coll.update_one({"_id": msg["_id"], "lease_owner": owner}, {"$set": update})
+
+    async def fail_abandoned(self) -> int:
+        now = datetime.utcnow()
+        res = await self._coll.update_many(
+            {"status": "sending", "next_attempt_at": {"$lte": now}, "attempts": {"$gte": max_attempts()}},
+            {"$set": {
+                "status": "failed", "lease_owner": None,
+                "last_error": "lease expired on the last attempt; no outcome was recorded",
+                "purge_at": now + timedelta(days=settings.EMAIL_OUTBOX_KEEP_DAYS),
+            }},
+        )
+        return res.modified_count
+
+    async def counts(self) -> dict:
+        rows = await self._coll.aggregate([{"$group": {"_id": "$status", "n": {"$sum": 1}}}]).to_list(None)
+        return {r["_id"]: r["n"] for r in rows}
@@ -0,0 +1,90 @@
+# app/db/repositories/known_emails.py
+import asyncio
+import logging
+import time
+from datetime import datetime, timedelta
+
+from app.core.config.settings import settings
+from app.db.models import User
+from app.utils.background import run_periodic
+from app.utils.bloom import BloomFilter
+from app.utils.emails import normalize_email
+
+log = logging.getLogger(__name__)
+
+SYNC_SKEW = timedelta(seconds=5)
+EWMA_ALPHA = 0.05
+
+class KnownEmails:
+    """
+    Bloom filter over every registered (normalised) email address.
+
+    Anonymous endpoints ask `might_exist` first: a "no" is certain, so the Mongo lookup
+    is skipped and `absent_delay()` sleeps for a moving average of real lookup
+    latency instead, keeping the response time of unknown addresses in line with
+    known ones. Users created here are added at once; other workers' signups arrive
+    with the next poll (EMAIL_FILTER_SYNC_SECONDS), and a periodic rebuild drops
+    addresses that have since changed.
+
+    Until the first load finishes, every address "might exist".
+    """
+    def __init__(self):
+        self._bloom: BloomFilter | None = None
+        self._cursor: datetime | None = None
+        self.loaded_at = 0.0
+        self.lookup_seconds = 0.002  # EWMA of real email lookups; seeded with a typical round trip
+        self.skipped = 0
+
+    def add(self, email: str):
+        if self._bloom is not None:
+            self._bloom.add(normalize_email(email))
+
+    def might_exist(self, email: str) -> bool:
+        bloom = self._bloom
+        if bloom is None or not settings.EMAIL_FILTER_ENABLED:
+            return True
+        if normalize_email(email) in bloom:
+            return True
+        self.skipped += 1
+        return False
+
+    def observe(self, seconds: float):
+        self.lookup_seconds += EWMA_ALPHA * (seconds - self.lookup_seconds)
+
+    async def absent_delay(self):
+        await asyncio.sleep(self.lookup_seconds)
+
+    async def load(self):
+        started = datetime.utcnow()
+        coll = User.get_motor_collection()
+        count = await coll.estimated_document_count()
+        bloom = BloomFilter(max(settings.EMAIL_FILTER_CAPACITY, 2 * count), settings.EMAIL_FILTER_ERROR_RATE)
+        # Covered by the unique email index; documents are never fetched.
+        async for doc in coll.find({}, {"_id": 0, "email": 1}).hint([("email", 1)]):
+            bloom.add(normalize_email(doc["email"]))
+        self._bloom = bloom
+        self._cursor = started - SYNC_SKEW
+        self.loaded_at = time.monotonic()
+
+    async def sync(self):
+        if self._bloom is None or self._bloom.saturated \
+                or time.monotonic() - self.loaded_at > settings.EMAIL_FILTER_REBUILD_SECONDS:
+            await self.load()
+            return
+        started = datetime.utcnow()
+        async for doc in User.get_motor_collection().find({"created_at": {"$gte": self._cursor}}, {"_id": 0, "email": 1}):
+            self._bloom.add(normalize_email(doc["email"]))
+        self._cursor = started - SYNC_SKEW
+
+    def start(self):
+        run_periodic(self.sync, settings.EMAIL_FILTER_SYNC_SECONDS, name="known-emails-sync")
+
+    def stats(self) -> dict:
+        return {
+            "loaded": self._bloom is not None,
+            "emails": self._bloom.count if self._bloom else 0,
+            "skipped_lookups": self.skipped,
+            "lookup_ms_ewma": round(self.lookup_seconds * 1000, 3),
+        }
+
+known_emails = KnownEmails()
@@ -0,0 +1,95 @@
+# app/db/repositories/loader.py
+"""
+Request-scoped identity map for users (DataLoader style).
+
+Every `load(user_id)` issued in the same event-loop tick is coalesced into a single
+projected `{"_id": {"$in": [...]}}` query returning UserRecords, and each id is read
+at most once per request.
+UserLoaderMiddleware binds a fresh loader per HTTP request; outside a request each
+UsersRepo gets its own short-lived loader.
+"""
+import asyncio
+from contextvars import ContextVar, Token
+
+from app.db.models import User
+from app.db.repositories.records import USER_RECORD_PROJECTION, UserRecord
+from app.utils.ids import ids_in
+
+class UserLoader:
+    def __init__(self):
+        self._futures: dict[str, asyncio.Future] = {}
+        self._pending: list[str] = []
+        self.queries = 0
+
+    def load(self, user_id: str) -> "asyncio.Future[UserRecord | None]":
+        fut = self._futures.get(user_id)
+        if fut is None:
+            loop = asyncio.get_running_loop()
+            fut = loop.create_future()
+            self._futures[user_id] = fut
+            if not self._pending:
+                loop.call_soon(self._dispatch)
+            self._pending.append(user_id)
+        return fut
+
+    def prime(self, user: UserRecord):
+        # Seed the map with a user fetched some other way (e.g. by email).
+        fut = self._futures.get(user.id)
+        if fut is None or fut.done():
+            fut = asyncio.get_running_loop().create_future()
+            fut.set_result(user)
+            self._futures[user.id] = fut
+
+    def forget(self, user_id: str):
+        fut = self._futures.get(user_id)
+        if fut is not None and fut.done():
+            del self._futures[user_id]
+
+    def _dispatch(self):
+        ids, self._pending = self._pending, []
+        asyncio.ensure_future(self._fetch(ids))
+
+    async def _fetch(self, ids: list[str]):
+        self.queries += 1
+        try:
+            cursor = User.get_motor_collection().find({"_id": {"$in": ids_in(ids)}}, USER_RECORD_PROJECTION)
+            users = [UserRecord.from_doc(d) for d in await cursor.to_list(None)]
+        except Exception as e:
+            for uid in ids:
+                fut = self._futures.pop(uid, None)
+                if fut is not None and not fut.done():
+                    fut.set_exception(e)
+            return
+        by_id = {u.id: u for u in users}
+        for uid in ids:
+            fut = self._futures.get(uid)
+            if fut is not None and not fut.done():
+                fut.set_result(by_id.get(uid))
+
+_current: ContextVar[UserLoader | None] = ContextVar("user_loader", default=None)
+
+def current_user_loader() -> UserLoader:
+    return _current.get() or UserLoader()
+
+def bind_user_loader() -> Token:
+    return _current.set(UserLoader())
+
+def reset_user_loader(token: Token):
+    _current.reset(token)
+
+class UserLoaderMiddleware:
+    """
+    Pure ASGI middleware (no extra task, unlike BaseHTTPMiddleware) so the
+    ContextVar set here is visible to the endpoint and its dependencies.
+    """
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        token = bind_user_loader()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            reset_user_loader(token)
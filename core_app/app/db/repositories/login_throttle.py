@@ -0,0 +1,185 @@
+# app/db/repositories/login_throttle.py
+import hashlib
+import logging
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
+
+from bson import Binary
+from pymongo import UpdateOne
+
+from app.core.config.settings import settings
+from app.db.mongo import get_client
+from app.utils.background import run_periodic
+from app.utils.emails import normalize_email
+
+log = logging.getLogger(__name__)
+
+COLLECTION = "login_failures"
+
+class LoginThrottle:
+    """
+    Per-account failed-login counters with exponential lockout, consulted before bcrypt.
+
+    State is one small tuple per account, keyed by a 16-byte digest of the normalised
+    email so unknown addresses are throttled exactly like real ones. Once an account
+    has LOGIN_LOCKOUT_THRESHOLD failures, each further failure locks it for
+    LOGIN_LOCKOUT_BASE_SECONDS * 2**(extra failures), capped at LOGIN_LOCKOUT_MAX_SECONDS.
+    Attempts still being verified count towards the threshold, so a burst of parallel
+    guesses cannot all reach bcrypt. Changes are written to Mongo in batches and
+    pulled back by every worker, like the access-token denylist.
+    """
+    def __init__(self, clock=time.time):
+        self._clock = clock
+        # digest -> (failures, locked_until, in_flight, last_failure); oldest activity first
+        self._state: "OrderedDict[bytes, tuple[int, float, int, float]]" = OrderedDict()
+        self._pending: dict[bytes, int] = {}  # digest -> failures not yet written
+        self._resets: dict[bytes, float] = {}  # digest -> time of a successful login not yet written
+        self._cursor: datetime | None = None
+        self.rejected = 0
+
+    @staticmethod
+    def key(email: str) -> bytes:
+        return hashlib.blake2b(normalize_email(email).encode("utf-8"), digest_size=16).digest()
+
+    def _coll(self):
+        return get_client()[settings.MONGO_DB_NAME][COLLECTION]
+
+    def _lock_for(self, failures: int, now: float) -> float:
+        extra = failures - settings.LOGIN_LOCKOUT_THRESHOLD
+        if extra < 0:
+            return 0.0
+        return now + min(settings.LOGIN_LOCKOUT_BASE_SECONDS * 2 ** min(extra, 32), settings.LOGIN_LOCKOUT_MAX_SECONDS)
+
+    def _sweep(self, now: float):
+        horizon = now - settings.LOGIN_FAILURE_RESET_SECONDS
+        while self._state:
+            digest, (failures, locked_until, in_flight, last) = next(iter(self._state.items()))
+            if last > horizon or locked_until > now or in_flight:
+                break
+            del self._state[digest]
+
+    def acquire(self, key: bytes) -> float:
+        """Admit one attempt for `key`, or return the seconds until it may be tried."""
+        now = self._clock()
+        self._sweep(now)
+        failures, locked_until, in_flight, last = self._state.get(key, (0, 0.0, 0, now))
+        if locked_until > now:
+            self.rejected += 1
+            return locked_until - now
+        if in_flight and failures + in_flight >= settings.LOGIN_LOCKOUT_THRESHOLD:
+            self.rejected += 1
+            return 1.0
+        self._state[key] = (failures, locked_until, in_flight + 1, last)
+        return 0.0
+
+    def release(self, key: bytes, failed: bool | None):
+        """End an attempt: True = wrong password, False = success, None = not decided (e.g. 503)."""
+        now = self._clock()
+        failures, locked_until, in_flight, last = self._state.get(key, (0, 0.0, 1, now))
+        in_flight = max(0, in_flight - 1)
+        if failed:
+            failures += 1
+            self._state[key] = (failures, self._lock_for(failures, now), in_flight, now)
+            self._state.move_to_end(key)
+            self._pending[key] = self._pending.get(key, 0) + 1
+            return
+        if failed is False and failures:
+            failures, locked_until = 0, 0.0
+            self._resets[key] = now
+            self._pending.pop(key, None)
+        if failures or in_flight:
+            self._state[key] = (failures, locked_until, in_flight, last)
+        else:
+            self._state.pop(key, None)  # clean accounts take no memory
+
+    async def flush(self):
+        if not self._pending and not self._resets:
+            return
+        pending, self._pending = self._pending, {}
+        resets, self._resets = self._resets, {}
+        now = datetime.utcnow()
+        ops = []
+        for digest, reset_at in resets.items():
+            # A reset is written as absolute state, not deleted: other workers only see
+            # documents whose updated_at moved, and must replace their counts (see _merge).
+            failures, locked_until = self._state.get(digest, (0, 0.0, 0, 0.0))[:2]
+            ops.append(UpdateOne(
+                {"_id": Binary(digest)},
+                {"$set": {
+                    "failures": failures,
+                    "locked_until": locked_until,
+                    "reset_at": reset_at,
+                    "updated_at": now,
+                    "expires_at": datetime.utcfromtimestamp(
+                        max(locked_until, reset_at) + settings.LOGIN_FAILURE_RESET_SECONDS
+                    ),
+                }},
+                upsert=True,
+            ))
+        for digest, delta in pending.items():
+            if digest in resets:
+                continue  # failures since the reset are already in its absolute counts
+            failures, locked_until, _, last = self._state.get(digest, (delta, 0.0, 0, self._clock()))
+            ops.append(UpdateOne(
+                {"_id": Binary(digest)},
+                {
+                    "$inc": {"failures": delta},
+                    "$max": {"locked_until": locked_until, "last_failure": last},
+                    "$set": {
+                        "updated_at": now,
+                        "expires_at": datetime.utcfromtimestamp(
+                            max(locked_until, self._clock()) + settings.LOGIN_FAILURE_RESET_SECONDS
+                        ),
+                    },
+                },
+                upsert=True,
+            ))
+        try:
+            await self._coll().bulk_write(ops, ordered=False)
+        except Exception:
+            # Keep the counts for the next round rather than forgetting failures.
+            for digest, delta in pending.items():
+                if digest not in self._pending:
+                    self._pending[digest] = delta
+            for digest, reset_at in resets.items():
+                self._resets.setdefault(digest, reset_at)
+            raise
+
+    def _merge(self, doc: dict):
+        digest = bytes(doc["_id"])
+        failures, locked_until, in_flight, last = self._state.get(digest, (0, 0.0, 0, 0.0))
+        doc_failures, doc_locked = int(doc.get("failures", 0)), float(doc.get("locked_until", 0.0))
+        # Compare failure and reset times as recorded by the workers' clocks, not flush times.
+        doc_last = float(doc.get("last_failure") or doc["updated_at"].replace(tzinfo=timezone.utc).timestamp())
+        reset_at = doc.get("reset_at")
+        if reset_at is not None and reset_at >= last:
+            # Successful login since our last local failure: the document is authoritative.
+            failures, locked_until = doc_failures, doc_locked
+        else:
+            failures, locked_until = max(failures, doc_failures), max(locked_until, doc_locked)
+        if failures or locked_until > self._clock() or in_flight:
+            self._state[digest] = (failures, locked_until, in_flight, max(last, doc_last))
+        else:
+            self._state.pop(digest, None)
+
+    async def load(self):
+        now = datetime.utcnow()
+        async for doc in self._coll().find({"expires_at": {"$gt": now}}):
+            self._merge(doc)
+        self._cursor = now
+
+    async def sync(self):
+        await self.flush()
+        started = datetime.utcnow()
+        async for doc in self._coll().find({"updated_at": {"$gte": self._cursor or started}}):
+            self._merge(doc)
+        self._cursor = started
+
+    def start(self):
+        run_periodic(self.sync, settings.LOGIN_THROTTLE_SYNC_SECONDS, name="login-throttle-sync")
+
+    def stats(self) -> dict:
+        return {"accounts": len(self._state), "pending": len(self._pending) + len(self._resets), "rejected": self.rejected}
+
+login_throttle = LoginThrottle()
@@ -1,11 +1,23 @@
-from app.db.models import OAuthAccount
+from datetime import datetime
+
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+
+from app.db.models import OAuthAccount, User
+from app.db.repositories.known_emails import known_emails
+from app.db.repositories.loader import current_user_loader
+from app.db.repositories.records import OAUTH_LINK_PROJECTION, USER_RECORD_PROJECTION, OAuthLinkRecord, UserRecord
+from app.utils.ids import from_db_id, new_user_id, to_db_id
 
 class OAuthAccountsRepo:
     def __init__(self, *_):
-        pass
+        self._loader = current_user_loader()
 
-    async def get_by_provider_sub(self, provider: str, provider_sub: str) -> OAuthAccount | None:
-        return await OAuthAccount.find_one({"provider": provider, "provider_sub": provider_sub})
+    async def get_by_provider_sub(self, provider: str, provider_sub: str) -> OAuthLinkRecord | None:
+        doc = await OAuthAccount.get_motor_collection().find_one(
+            {"provider": provider, "provider_sub": provider_sub}, OAUTH_LINK_PROJECTION
+        )
+        return OAuthLinkRecord.from_doc(doc) if doc else None
 
     async def create_link(
         self, *, provider: str, provider_sub: str, user_id: str,
@@ -17,3 +29,81 @@ class OAuthAccountsRepo:
         )
         await doc.insert()
         return doc
+
+    async def _upsert_user(self, email: str, full_name: str, allow_signup: bool) -> UserRecord | None:
+        users = User.get_motor_collection()
+        if not allow_signup:
+            doc = await users.find_one({"email": email}, USER_RECORD_PROJECTION)
+            return UserRecord.from_doc(doc) if doc else None
+
+        now = datetime.utcnow()
+        new_id = to_db_id(new_user_id())
+        for attempt in range(2):
+            try:
+                doc = await users.find_one_and_update(
+                    {"email": email},
+                    {"$setOnInsert": {
+                        "_id": new_id,
+                        "email": email,
+                        "full_name": full_name,
+                        "hashed_password": None,   # passwordless until they set one via reset
+                        "is_active": True,
+                        "email_verified_at": now,  # the provider verified it
+                        "roles": ["user"],
+                        "created_at": now,
+                        "updated_at": now,
+                    }},
+                    upsert=True,
+                    projection=USER_RECORD_PROJECTION,
+                    return_document=ReturnDocument.AFTER,
+                )
+                break
+            except DuplicateKeyError:
+                # A concurrent first login inserted the same email; the retry matches it.
+                if attempt:
+                    raise
+        if doc["_id"] == new_id:
+            known_emails.add(email)
+        return UserRecord.from_doc(doc)
+
+    async def link_or_create_user(
+        self, *, provider: str, provider_sub: str, email: str,
+        name: str | None, picture: str | None, allow_signup: bool
+    ) -> UserRecord | None:
+        """
+        Resolve a provider login to a local user: returning users cost one link update
+        plus one user read; first logins one user upsert (by email) plus one link upsert.
+        Concurrent first logins converge on the same user and link through the unique
+        email and (provider, provider_sub) indexes. None when signup is not allowed.
+        """
+        links = OAuthAccount.get_motor_collection()
+        key = {"provider": provider, "provider_sub": provider_sub}
+        profile = {"email": email, "name": name, "picture": picture, "updated_at": datetime.utcnow()}
+
+        link = await links.find_one_and_update(
+            key, {"$set": profile}, projection=OAUTH_LINK_PROJECTION, return_document=ReturnDocument.AFTER
+        )
+        if link:
+            return await self._loader.load(from_db_id(link["user_id"]))
+
+        user = await self._upsert_user(email, name or email.split("@")[0], allow_signup)
+        if user is None:
+            return None
+        for attempt in range(2):
+            try:
+                link = await links.find_one_and_update(
+                    key,
+                    {"$set": profile, "$setOnInsert": {"user_id": to_db_id(user.id), "created_at": profile["updated_at"]}},
+                    upsert=True,
+                    projection=OAUTH_LINK_PROJECTION,
+                    return_document=ReturnDocument.AFTER,
+                )
+                break
+            except DuplicateKeyError:
+                if attempt:
+                    raise
+        linked_id = from_db_id(link["user_id"])
+        if linked_id != user.id:
+            return await self._loader.load(linked_id)  # lost a race to a link for another account
+        self._loader.prime(user)
+        return user
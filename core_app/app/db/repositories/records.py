@@ -0,0 +1,58 @@
+# app/db/repositories/records.py
+"""
+Slotted read models for the auth hot path.
+
+Built straight from projected Motor documents, skipping Beanie document construction and
+Pydantic validation. Read-only: anything that writes a user goes through the Beanie model.
+"""
+from datetime import datetime
+from app.utils.ids import from_db_id
+
+USER_RECORD_PROJECTION = {
+    "email": 1,
+    "full_name": 1,
+    "hashed_password": 1,
+    "email_verified_at": 1,
+    "roles": 1,
+}
+
+class UserRecord:
+    __slots__ = ("id", "email", "full_name", "hashed_password", "email_verified_at", "roles")
+
+    def __init__(self, id: str, email: str, full_name: str, hashed_password: str | None,
+                 email_verified_at: datetime | None, roles: list[str]):
+        self.id = id
+        self.email = email
+        self.full_name = full_name
+        self.hashed_password = hashed_password
+        self.email_verified_at = email_verified_at
+        self.roles = roles
+
+    @classmethod
+    def from_doc(cls, doc: dict) -> "UserRecord":
+        return cls(
+            from_db_id(doc["_id"]),
+            doc.get("email"),
+            doc.get("full_name"),
+            doc.get("hashed_password"),
+            doc.get("email_verified_at"),
+            doc.get("roles", ["user"]) or [],  # same default as User.roles
+        )
+
+    @classmethod
+    def from_user(cls, user) -> "UserRecord":
+        return cls(user.id, user.email, user.full_name, user.hashed_password, user.email_verified_at, list(user.roles or []))
+
+OAUTH_LINK_PROJECTION = {"user_id": 1, "email": 1}
+
+class OAuthLinkRecord:
+    __slots__ = ("id", "user_id", "email")
+
+    def __init__(self, id, user_id: str, email: str | None):
+        self.id = id
+        self.user_id = user_id
+        self.email = email
+
+    @classmethod
+    def from_doc(cls, doc: dict) -> "OAuthLinkRecord":
+        return cls(doc["_id"], from_db_id(doc["user_id"]), doc.get("email"))
@@ -1,37 +1,189 @@
+import asyncio
+import base64
 import hashlib
-from datetime import datetime
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+from pymongo import DESCENDING, ReturnDocument
+from app.core.config.settings import settings
 from app.db.models import RefreshToken
+from app.utils.ids import id_filter
 
-def _sha256(s: str) -> str:
-    return hashlib.sha256(s.encode("utf-8")).hexdigest()
+SESSION_PROJECTION = {"ua_id": 1, "ip": 1, "created_at": 1, "expires_at": 1}
+USER_AGENTS_COLLECTION = "user_agents"
+USER_AGENT_MAX_LEN = 255
+
+def _sha256(s: str) -> bytes:
+    return hashlib.sha256(s.encode("utf-8")).digest()
+
+def ua_digest(user_agent: str) -> bytes:
+    # 12 bytes is plenty for the few thousand distinct UAs we see, and smaller than an ObjectId.
+    return hashlib.sha256(user_agent.encode("utf-8")).digest()[:12]
+
+class _UserAgentCache:
+    """
+    Process-wide digest -> user agent map. A UA is upserted into user_agents the first
+    time this process sees it; after that, storing a token costs no extra write.
+    """
+    def __init__(self, maxsize: int = 4096):
+        self.maxsize = maxsize
+        self._known: "OrderedDict[bytes, str]" = OrderedDict()
+
+    def _remember(self, digest: bytes, ua: str):
+        self._known[digest] = ua
+        self._known.move_to_end(digest)
+        while len(self._known) > self.maxsize:
+            self._known.popitem(last=False)
+
+    async def intern(self, ua: str, digest: bytes):
+        if digest in self._known:
+            self._known.move_to_end(digest)
+            return
+        await _user_agents().update_one({"_id": digest}, {"$setOnInsert": {"ua": ua}}, upsert=True)
+        self._remember(digest, ua)
+
+    async def resolve(self, digests: set[bytes]) -> dict[bytes, str]:
+        found = {d: self._known[d] for d in digests if d in self._known}
+        missing = [d for d in digests if d not in found]
+        if missing:
+            async for doc in _user_agents().find({"_id": {"$in": missing}}):
+                found[doc["_id"]] = doc["ua"]
+                self._remember(doc["_id"], doc["ua"])
+        return found
+
+def _user_agents():
+    return RefreshToken.get_motor_collection().database[USER_AGENTS_COLLECTION]
+
+user_agents = _UserAgentCache()
 
 class RefreshTokensRepo:
     def __init__(self, *_):
         pass
 
-    async def store(self, jti: str, user_id: str, raw_token: str, expires_at: datetime, user_agent: str | None, ip: str | None):
+    def build(self, jti: str, user_id: str, raw_token: str, expires_at: datetime, user_agent: str | None, ip: str | None) -> RefreshToken:
+        ua = user_agent[:USER_AGENT_MAX_LEN] if user_agent else None
         rec = RefreshToken(
-            jti=jti,
+            id=jti,
             user_id=user_id,
             token_hash=_sha256(raw_token),
+            ua_id=ua_digest(ua) if ua else None,
             expires_at=expires_at,  # UTC
-            user_agent=(user_agent[:255] if user_agent else None),
             ip=ip,
+            family=jti,  # a new login; rotate() carries the old token's family over
+        )
+        rec._user_agent = ua
+        return rec
+
+    async def _insert(self, rec: RefreshToken):
+        # ua_id is derived from the UA itself, so interning can run alongside the insert.
+        if rec._user_agent:
+            await asyncio.gather(rec.insert(), user_agents.intern(rec._user_agent, rec.ua_id))
+        else:
+            await rec.insert()
+
+    async def store(self, jti: str, user_id: str, raw_token: str, expires_at: datetime, user_agent: str | None, ip: str | None):
+        await self._insert(self.build(jti, user_id, raw_token, expires_at, user_agent, ip))
+
+    async def rotate(self, old_jti: str, old_raw_token: str, new_record: RefreshToken) -> bool:
+        """
+        Revoke `old_jti` and store `new_record`, in two round trips instead of find/revoke/insert.
+
+        The revoke is a single conditional find_one_and_update on `revoked_at: None`, so of
+        several concurrent refreshes with the same cookie exactly one wins; the rest get
+        False. The new record is only inserted by the winner.
+
+        Presenting a token that was rotated more than REFRESH_REUSE_GRACE_SECONDS ago means
+        a copy of it leaked: every live token of its family is revoked as well.
+        """
+        coll = RefreshToken.get_motor_collection()
+        now = datetime.utcnow()
+        owner = {"_id": old_jti, "user_id": id_filter(new_record.user_id), "token_hash": _sha256(old_raw_token)}
+        old = await coll.find_one_and_update(
+            {**owner, "revoked_at": None, "expires_at": {"$gt": now}},
+            {"$set": {"revoked_at": now, "replaced_by": new_record.id}},
+            projection={"family": 1},
+            return_document=ReturnDocument.BEFORE,
+        )
+        if old is None:
+            reused = await coll.find_one({**owner, "replaced_by": {"$ne": None}}, {"revoked_at": 1, "family": 1})
+            if reused and reused["revoked_at"] <= now - timedelta(seconds=settings.REFRESH_REUSE_GRACE_SECONDS):
+                await self._revoke_family(new_record.user_id, reused.get("family"))
+            return False
+        new_record.family = old.get("family") or old_jti
+        await self._insert(new_record)
+        return True
+
+    async def _revoke_family(self, user_id: str, family: str | None):
+        if family is None:
+            # Rotated before families were recorded: the chain can't be found, end every session.
+            await self.revoke_all_for_user(user_id)
+            return
+        await RefreshToken.get_motor_collection().update_many(
+            {"user_id": id_filter(user_id), "revoked_at": None, "family": family},
+            {"$set": {"revoked_at": datetime.utcnow()}},
         )
-        await rec.insert()
 
     async def get_valid(self, jti: str) -> RefreshToken | None:
         # Use raw query to avoid operator issues
-        return await RefreshToken.find_one({"jti": jti, "revoked_at": None})
+        return await RefreshToken.find_one({"_id": jti, "revoked_at": None})
 
     async def revoke(self, jti: str):
-        await RefreshToken.find({"jti": jti}).update({"$set": {"revoked_at": datetime.utcnow()}})
+        await RefreshToken.find({"_id": jti}).update({"$set": {"revoked_at": datetime.utcnow()}})
 
     async def revoke_all_for_user(self, user_id: str):
         # Update many with raw query (no '&' composition)
-        await RefreshToken.find({"user_id": user_id, "revoked_at": None}).update(
+        await RefreshToken.find({"user_id": id_filter(user_id), "revoked_at": None}).update(
             {"$set": {"revoked_at": datetime.utcnow()}}
         )
 
+    async def list_active_for_user(self, user_id: str, *, limit: int, cursor: str | None = None) -> tuple[list[dict], str | None]:
+        """
+        One page of a user's live sessions, newest expiry first, plus the cursor for the next page.
+        Keyset pagination over the user_active_sessions index: cost is per page, not per offset.
+        """
+        query: dict = {"user_id": id_filter(user_id), "revoked_at": None, "expires_at": {"$gt": datetime.utcnow()}}
+        if cursor:
+            exp, jti = _decode_cursor(cursor)
+            query["$or"] = [{"expires_at": {"$lt": exp}}, {"expires_at": exp, "_id": {"$lt": jti}}]
+        docs = await (
+            RefreshToken.get_motor_collection()
+            .find(query, SESSION_PROJECTION)
+            .sort([("expires_at", DESCENDING), ("_id", DESCENDING)])
+            .limit(limit + 1)
+            .to_list(None)
+        )
+        next_cursor = _encode_cursor(docs[limit - 1]) if len(docs) > limit else None
+        docs = docs[:limit]
+        agents = await user_agents.resolve({d["ua_id"] for d in docs if d.get("ua_id")})
+        sessions = [
+            {
+                "jti": d["_id"],
+                "user_agent": agents.get(d.get("ua_id")),
+                "ip": d.get("ip"),
+                "created_at": d["created_at"],
+                "expires_at": d["expires_at"],
+            }
+            for d in docs
+        ]
+        return sessions, next_cursor
+
+    async def revoke_for_user(self, user_id: str, jti: str) -> bool:
+        res = await RefreshToken.get_motor_collection().update_one(
+            {"_id": jti, "user_id": id_filter(user_id), "revoked_at": None},
+            {"$set": {"revoked_at": datetime.utcnow()}},
+        )
+        return res.modified_count == 1
+
     def matches(self, rec: RefreshToken, raw_token: str) -> bool:
         return rec.token_hash == _sha256(raw_token)
+
+def _encode_cursor(doc: dict) -> str:
+    exp_ms = int(doc["expires_at"].replace(tzinfo=timezone.utc).timestamp() * 1000)
+    return base64.urlsafe_b64encode(f"{exp_ms}:{doc['_id']}".encode()).decode().rstrip("=")
+
+def _decode_cursor(cursor: str) -> tuple[datetime, str]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        exp_ms, jti = raw.split(":", 1)
+        return datetime.fromtimestamp(int(exp_ms) / 1000, tz=timezone.utc).replace(tzinfo=None), jti
+    except Exception:
+        raise ValueError("Invalid cursor")
@@ -0,0 +1,115 @@
+# app/db/repositories/revocations.py
+import logging
+import time
+from datetime import datetime, timedelta
+
+from app.core.config.settings import settings
+from app.db.models import TokenRevocation
+from app.utils.background import run_periodic
+from app.utils.bloom import BloomFilter
+
+log = logging.getLogger(__name__)
+
+# Workers poll with this much overlap so a write committed just behind our cursor is not missed.
+SYNC_SKEW = timedelta(seconds=5)
+
+class AccessTokenDenylist:
+    """
+    Revoked access tokens, checked on every authenticated request with no I/O.
+
+    Two kinds of entries live in `token_revocations`: a single jti, or a per-user
+    watermark ("every token issued before T"). Both are mirrored into dicts fronted by
+    a Bloom filter, so the common case -- a token nobody revoked -- costs two probes.
+    Revocations apply locally at once and reach other workers within DENYLIST_SYNC_SECONDS.
+    """
+    def __init__(self):
+        self._jtis: set[str] = set()
+        self._users: dict[str, float] = {}     # user id -> not_before (iat cutoff)
+        self._bloom = BloomFilter(settings.DENYLIST_BLOOM_CAPACITY, settings.DENYLIST_BLOOM_ERROR_RATE)
+        self._cursor: datetime | None = None
+        self.loaded_at = 0.0
+        self.syncs = 0
+
+    @staticmethod
+    def _apply(doc: dict, jtis: set, users: dict, bloom: BloomFilter):
+        key = doc["_id"]
+        if doc["kind"] == "jti":
+            jti = key[len("jti:"):]
+            jtis.add(jti)
+            bloom.add("j:" + jti)
+        else:
+            user_id, not_before = key[len("user:"):], float(doc["not_before"])
+            if not_before > users.get(user_id, 0):
+                users[user_id] = not_before
+                bloom.add("u:" + user_id)
+
+    def is_revoked(self, claims: dict) -> bool:
+        bloom = self._bloom
+        jti = claims.get("jti")
+        if jti and ("j:" + jti) in bloom and jti in self._jtis:
+            return True
+        sub = claims.get("sub")
+        if sub and ("u:" + sub) in bloom:
+            return float(claims.get("iat", 0)) < self._users.get(sub, 0)
+        return False
+
+    async def revoke_token(self, jti: str, exp: int):
+        expires_at = datetime.utcfromtimestamp(exp)
+        await TokenRevocation.get_motor_collection().update_one(
+            {"_id": "jti:" + jti},
+            {"$set": {"kind": "jti", "expires_at": expires_at, "updated_at": datetime.utcnow()}},
+            upsert=True,
+        )
+        self._apply({"_id": "jti:" + jti, "kind": "jti", "expires_at": expires_at}, self._jtis, self._users, self._bloom)
+
+    async def revoke_user(self, user_id: str):
+        # Access tokens carry a millisecond iat: revoke what was issued before now, and
+        # nothing minted after (e.g. the re-login that follows a password reset).
+        not_before = round(time.time(), 3)
+        now = datetime.utcnow()
+        await TokenRevocation.get_motor_collection().update_one(
+            {"_id": "user:" + user_id},
+            {
+                "$max": {"not_before": not_before},
+                "$set": {
+                    "kind": "user",
+                    # Once every access token minted before the cutoff has expired, the entry is moot.
+                    "expires_at": now + timedelta(minutes=settings.ACCESS_TOKEN_TTL_MIN, seconds=1),
+                    "updated_at": now,
+                },
+            },
+            upsert=True,
+        )
+        self._apply({"_id": "user:" + user_id, "kind": "user", "not_before": not_before}, self._jtis, self._users, self._bloom)
+
+    async def load(self):
+        now = datetime.utcnow()
+        docs = await TokenRevocation.get_motor_collection().find({"expires_at": {"$gt": now}}).to_list(None)
+        jtis, users = set(), {}
+        bloom = BloomFilter(max(settings.DENYLIST_BLOOM_CAPACITY, 2 * len(docs)), settings.DENYLIST_BLOOM_ERROR_RATE)
+        for doc in docs:
+            self._apply(doc, jtis, users, bloom)
+        # Swap whole structures so request threads never see a half-built filter;
+        # expired entries are simply not carried over.
+        self._jtis, self._users, self._bloom = jtis, users, bloom
+        self._cursor = now - SYNC_SKEW
+        self.loaded_at = time.monotonic()
+
+    async def sync(self):
+        if self._cursor is None or self._bloom.saturated \
+                or time.monotonic() - self.loaded_at > settings.DENYLIST_REBUILD_SECONDS:
+            await self.load()
+            return
+        started = datetime.utcnow()
+        async for doc in TokenRevocation.get_motor_collection().find({"updated_at": {"$gte": self._cursor}}):
+            self._apply(doc, self._jtis, self._users, self._bloom)
+        self._cursor = started - SYNC_SKEW
+        self.syncs += 1
+
+    def start(self):
+        run_periodic(self.sync, settings.DENYLIST_SYNC_SECONDS, name="denylist-sync")
+
+    def stats(self) -> dict:
+        return {"jtis": len(self._jtis), "users": len(self._users), "bloom_items": self._bloom.count, "syncs": self.syncs}
+
+access_denylist = AccessTokenDenylist()
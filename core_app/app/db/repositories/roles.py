@@ -0,0 +1,107 @@
+# app/db/repositories/roles.py
+import asyncio
+import logging
+import time
+
+from pymongo.errors import OperationFailure
+
+from app.core.config.settings import settings
+from app.db.models import Role
+from app.utils.background import run_periodic, start_forever
+
+log = logging.getLogger(__name__)
+
+VERSIONS_COLLECTION = "cache_versions"
+ROLES_MARKER = "roles"
+CHANGE_STREAMS_UNSUPPORTED = 40573  # "$changeStream is only supported on replica sets"
+WATCH_RETRY_BASE_SECONDS = 1.0
+WATCH_RETRY_MAX_SECONDS = 60.0
+
+class RolePermissionsCache:
+    """
+    Process-wide role slug -> frozen permission set, resolved with no I/O.
+
+    Writers call `invalidate()`, which bumps a version marker in Mongo and reloads
+    locally; other workers notice the marker within ROLE_CACHE_POLL_SECONDS (or at
+    once through a change stream when ROLE_CACHE_CHANGE_STREAM is on).
+    """
+    def __init__(self):
+        self._perms: dict[str, frozenset[str]] = {}
+        self._resolved: dict[frozenset[str], frozenset[str]] = {}
+        self.version = 0
+        self.loaded_at = 0.0
+        self.reloads = 0
+
+    @property
+    def loaded(self) -> bool:
+        return self.loaded_at > 0
+
+    def _versions(self):
+        return Role.get_motor_collection().database[VERSIONS_COLLECTION]
+
+    async def _read_version(self) -> int:
+        doc = await self._versions().find_one({"_id": ROLES_MARKER})
+        return int(doc["version"]) if doc else 0
+
+    async def load(self):
+        version = await self._read_version()
+        roles = await Role.get_motor_collection().find({}, {"slug": 1, "permissions": 1}).to_list(None)
+        # Swap whole dicts so concurrent readers never see a half-built table.
+        self._perms = {r["slug"]: frozenset(r.get("permissions") or []) for r in roles}
+        self._resolved = {}
+        self.version = version
+        self.loaded_at = time.monotonic()
+        self.reloads += 1
+
+    def resolve(self, role_slugs) -> frozenset[str]:
+        key = frozenset(role_slugs)
+        perms = self._resolved.get(key)
+        if perms is None:
+            perms = frozenset().union(*(self._perms.get(s, frozenset()) for s in key))
+            self._resolved[key] = perms
+        return perms
+
+    async def permissions_for(self, role_slugs) -> frozenset[str]:
+        if not self.loaded:
+            await self.load()
+        return self.resolve(role_slugs)
+
+    async def invalidate(self):
+        await self._versions().update_one({"_id": ROLES_MARKER}, {"$inc": {"version": 1}}, upsert=True)
+        await self.load()
+
+    async def _poll(self):
+        stale = time.monotonic() - self.loaded_at > settings.ROLE_CACHE_MAX_AGE_SECONDS
+        if stale or await self._read_version() != self.version:
+            await self.load()
+
+    async def _watch(self):
+        delay = WATCH_RETRY_BASE_SECONDS
+        while True:
+            try:
+                async with Role.get_motor_collection().watch() as stream:
+                    delay = WATCH_RETRY_BASE_SECONDS
+                    async for _ in stream:
+                        await self.load()
+            except OperationFailure as e:
+                if e.code == CHANGE_STREAMS_UNSUPPORTED:
+                    # Standalone servers have no change streams; the poller still covers us.
+                    log.warning("Role change stream unavailable (%s); relying on polling", e)
+                    return
+                log.warning("Role change stream failed (%s); reopening in %.0fs", e, delay)
+            except Exception as e:
+                # Failovers, network errors: the poller covers the gap until the stream is back.
+                log.warning("Role change stream failed (%s); reopening in %.0fs", e, delay)
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, WATCH_RETRY_MAX_SECONDS)
+            try:
+                await self.load()  # changes made while the stream was down
+            except Exception:
+                pass
+
+    def start(self):
+        run_periodic(self._poll, settings.ROLE_CACHE_POLL_SECONDS, name="role-cache-poll")
+        if settings.ROLE_CACHE_CHANGE_STREAM:
+            start_forever(self._watch(), name="role-cache-watch")
+
+role_cache = RolePermissionsCache()
@@ -1,37 +1,126 @@
-from app.db.models import User, Role
-from app.core.security.passwords import hash_password
+import time
+from datetime import datetime
+from typing import NamedTuple
+from pymongo import ReturnDocument
+from app.db.models import User
+from app.core.security.passwords import hash_password_async
+from app.db.repositories.loader import current_user_loader
+from app.db.repositories.records import USER_RECORD_PROJECTION, UserRecord
+from app.db.repositories.roles import role_cache
+from app.db.repositories.known_emails import known_emails
+from app.utils.ids import id_filter
 
-# If you prefer the operator version, uncomment the next line and the 'In' usage below.
-# from beanie.operators import In
+class Identity(NamedTuple):
+    user: UserRecord
+    roles: list[str]
+    permissions: list[str]
 
 class UsersRepo:
     def __init__(self, *_):
-        pass
+        self._loader = current_user_loader()
 
-    async def get_by_email(self, email: str) -> User | None:
-        return await User.find_one(User.email == email)
+    async def get_by_id(self, user_id: str) -> UserRecord | None:
+        return await self._loader.load(user_id)
+
+    async def _screen(self, email: str, anonymous: bool) -> bool:
+        # anonymous=True: callers that may answer "no such user" a few seconds late
+        # (another worker's fresh signup) let known-absent addresses skip Mongo.
+        if anonymous and not known_emails.might_exist(email):
+            await known_emails.absent_delay()
+            return False
+        return True
+
+    async def get_by_email(self, email: str, *, anonymous: bool = False) -> UserRecord | None:
+        if not await self._screen(email, anonymous):
+            return None
+        started = time.perf_counter()
+        doc = await User.get_motor_collection().find_one({"email": email}, USER_RECORD_PROJECTION)
+        known_emails.observe(time.perf_counter() - started)
+        if not doc:
+            return None
+        user = UserRecord.from_doc(doc)
+        self._loader.prime(user)
+        return user
+
+    async def email_exists(self, email: str, *, anonymous: bool = False) -> bool:
+        if not await self._screen(email, anonymous):
+            return False
+        # Covered by the unique email index: no document fetch.
+        return await User.get_motor_collection().find_one({"email": email}, {"_id": 0, "email": 1}) is not None
 
     async def create(self, email: str, password: str, full_name: str) -> User:
-        user = User(email=email, full_name=full_name, hashed_password=hash_password(password))
+        user = User(email=email, full_name=full_name, hashed_password=await hash_password_async(password))
         await user.insert()
+        known_emails.add(user.email)
+        self._loader.prime(UserRecord.from_user(user))
         return user
 
+    async def set_password_hash(self, user_id: str, hashed: str, *, expected: str | None = None) -> bool:
+        # With expected set, only swap if nobody changed the password meanwhile (rehash-on-login).
+        query = {"_id": id_filter(user_id)}
+        if expected is not None:
+            query["hashed_password"] = expected
+        res = await User.get_motor_collection().update_one(
+            query, {"$set": {"hashed_password": hashed, "updated_at": datetime.utcnow()}}
+        )
+        self._loader.forget(user_id)
+        return res.modified_count == 1
+
+    # Targeted $set/$addToSet/$pull instead of Document.save(): save() filters on the
+    # encoded _id and upserts, which during an ID_STORAGE migration would write a
+    # binary-id duplicate of a user whose _id is still a string.
+
+    async def mark_email_verified(self, user_id: str) -> bool:
+        """Returns False if there is no such user (already verified counts as found)."""
+        coll = User.get_motor_collection()
+        now = datetime.utcnow()
+        res = await coll.update_one(
+            {"_id": id_filter(user_id), "email_verified_at": None},
+            {"$set": {"email_verified_at": now, "updated_at": now}},
+        )
+        if res.matched_count:
+            self._loader.forget(user_id)
+            return True
+        return await coll.find_one({"_id": id_filter(user_id)}, {"_id": 1}) is not None
+
+    async def add_role(self, user_id: str, slug: str) -> list[str] | None:
+        return await self._update_roles(user_id, {"$addToSet": {"roles": slug}})
+
+    async def remove_role(self, user_id: str, slug: str) -> list[str] | None:
+        return await self._update_roles(user_id, {"$pull": {"roles": slug}})
+
+    async def _update_roles(self, user_id: str, update: dict) -> list[str] | None:
+        doc = await User.get_motor_collection().find_one_and_update(
+            {"_id": id_filter(user_id)},
+            {**update, "$set": {"updated_at": datetime.utcnow()}},
+            projection={"_id": 0, "roles": 1},
+            return_document=ReturnDocument.AFTER,
+        )
+        self._loader.forget(user_id)
+        return None if doc is None else doc.get("roles") or []
+
     async def get_roles(self, user_id: str) -> list[str]:
-        u = await User.get(user_id)
+        u = await self.get_by_id(user_id)
         return (u.roles if u else []) or []
 
     async def get_permissions(self, user_id: str) -> list[str]:
-        u = await User.get(user_id)
+        u = await self.get_by_id(user_id)
         if not u or not u.roles:
             return []
+        return await self._permissions_for_roles(u.roles)
 
-        # --- Option A: raw $in (most compatible) ---
-        roles = await Role.find({"slug": {"$in": u.roles}}).to_list()
-
-        # --- Option B: operator API (works on recent Beanie) ---
-        # roles = await Role.find(In(Role.slug, u.roles)).to_list()
+    async def get_identity(self, user_id: str) -> Identity | None:
+        """
+        User, role slugs and resolved permissions in one call: at most one user read
+        per request (shared with get_by_email/get_by_id); roles come from role_cache.
+        """
+        u = await self.get_by_id(user_id)
+        if not u:
+            return None
+        roles = u.roles or []
+        perms = await self._permissions_for_roles(roles) if roles else []
+        return Identity(u, roles, perms)
 
-        perms: set[str] = set()
-        for r in roles:
-            perms.update(r.permissions or [])
-        return sorted(perms)
+    async def _permissions_for_roles(self, role_slugs: list[str]) -> list[str]:
+        # Served from the process-wide role cache; no roles query per login/refresh.
+        return sorted(await role_cache.permissions_for(role_slugs))
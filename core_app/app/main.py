@@ -1,9 +1,29 @@
-from fastapi import FastAPI
+from fastapi import Depends, FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
 from app.core.logging_config import configure_logging
 from app.core.config.settings import settings
 from app.api.routers import api_router
-from app.db.mongo import init_mongo
+from app.api.deps.rbac import require_metrics_access
+from app.db.mongo import init_mongo, pool_stats, readiness
+from app.core.security.passwords import (
+    PasswordHasherBusy,
+    configure_bcrypt_rounds,
+    init_password_pool,
+    shutdown_password_pool,
+)
+from app.utils.background import cancel_periodic_tasks, drain_background_tasks, spawn
+from app.utils.password_strength import warm_password_strength
+from app.core.security.token_cache import access_claims_cache
+from app.db.repositories.loader import UserLoaderMiddleware
+from app.db.repositories.roles import role_cache
+from app.db.repositories.revocations import access_denylist
+from app.core.ratelimit.limiter import limiter
+from app.db.repositories.login_throttle import login_throttle
+from app.db.repositories.known_emails import known_emails
+from app.utils.email_queue import EmailQueueFull, email_queue
+from app.core.security.oidc import providers
+from app.core.http import http_client
 
 configure_logging()
 app = FastAPI(title=settings.APP_NAME)
@@ -15,13 +35,69 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.add_middleware(UserLoaderMiddleware)
+
+@app.exception_handler(PasswordHasherBusy)
+async def password_hasher_busy(_: Request, exc: PasswordHasherBusy):
+    return JSONResponse(status_code=503, content={"detail": str(exc)}, headers={"Retry-After": "1"})
+
+@app.exception_handler(EmailQueueFull)
+async def email_queue_full(_: Request, exc: EmailQueueFull):
+    return JSONResponse(status_code=503, content={"detail": str(exc)}, headers={"Retry-After": "5"})
 
 @app.on_event("startup")
 async def on_startup():
     await init_mongo()
+    http_client.start()
+    await role_cache.load()
+    role_cache.start()
+    await access_denylist.load()
+    access_denylist.start()
+    await login_throttle.load()
+    login_throttle.start()
+    # Until this finishes every address "might exist", so startup need not wait for it.
+    spawn(known_emails.load(), name="known-emails-load")
+    known_emails.start()
+    configure_bcrypt_rounds()
+    init_password_pool()
+    await warm_password_strength()
+    if settings.EMAIL_DELIVERY == "queue":
+        email_queue.start()
+    for provider in providers:
+        spawn(provider.prewarm(), name=f"oidc-prewarm:{provider.name}")  # a login before this fetches on demand
+
+@app.on_event("shutdown")
+async def on_shutdown():
+    await email_queue.drain()
+    await cancel_periodic_tasks()
+    await login_throttle.flush()
+    await drain_background_tasks()
+    shutdown_password_pool()
+    await http_client.aclose()
 
 app.include_router(api_router)
 
 @app.get("/healthz")
 async def healthz():
     return {"ok": True}
+
+@app.get("/readyz")
+async def readyz():
+    # Unlike /healthz (liveness), this fails when Mongo is unreachable or our pool is exhausted.
+    ready, report = await readiness()
+    return JSONResponse(status_code=200 if ready else 503, content={"ready": ready, **report})
+
+@app.get("/metrics", dependencies=[Depends(require_metrics_access)])
+async def metrics():
+    return {
+        "access_token_cache": access_claims_cache.stats(),
+        "role_cache": {"version": role_cache.version, "reloads": role_cache.reloads},
+        "access_denylist": access_denylist.stats(),
+        "rate_limiter": limiter.stats(),
+        "login_throttle": login_throttle.stats(),
+        "known_emails": known_emails.stats(),
+        "email_queue": email_queue.stats(),
+        "oidc_providers": {p.name: p.stats() for p in providers},
+        "http_client": http_client.stats(),
+        "mongo_pools": pool_stats(),
+    }
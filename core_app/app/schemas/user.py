@@ -1,3 +1,5 @@
+from datetime import datetime
+from typing import Optional
 from pydantic import BaseModel, EmailStr
 
 class UserSafe(BaseModel):
@@ -7,3 +9,14 @@ class UserSafe(BaseModel):
     roles: list[str] = []
     permissions: list[str] = []
     verified: bool = False
+
+class SessionOut(BaseModel):
+    jti: str
+    user_agent: Optional[str] = None
+    ip: Optional[str] = None
+    created_at: datetime
+    expires_at: datetime
+
+class SessionsPage(BaseModel):
+    items: list[SessionOut]
+    next_cursor: Optional[str] = None
@@ -0,0 +1,56 @@
+import asyncio
+import logging
+from typing import Awaitable, Callable, Coroutine
+
+log = logging.getLogger(__name__)
+
+# Strong refs: the event loop only keeps weak references to running tasks.
+_tasks: set[asyncio.Task] = set()
+
+def _done(task: asyncio.Task):
+    _tasks.discard(task)
+    if not task.cancelled() and task.exception() is not None:
+        log.error("Background task %s failed", task.get_name(), exc_info=task.exception())
+
+def spawn(coro: Coroutine, *, name: str | None = None) -> asyncio.Task:
+    """
+    Fire-and-forget a coroutine from a request handler; failures are logged, not raised.
+    """
+    task = asyncio.create_task(coro, name=name)
+    _tasks.add(task)
+    task.add_done_callback(_done)
+    return task
+
+async def drain_background_tasks(timeout: float = 5.0):
+    if _tasks:
+        await asyncio.wait(set(_tasks), timeout=timeout)
+
+# Long-running loops (pollers, listeners) are cancelled on shutdown rather than drained.
+_periodic: set[asyncio.Task] = set()
+
+def run_periodic(fn: Callable[[], Awaitable], interval: float, *, name: str) -> asyncio.Task:
+    """
+    Call `await fn()` every `interval` seconds until shutdown; an exception is logged
+    and the loop keeps going.
+    """
+    async def loop():
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await fn()
+            except Exception:
+                log.exception("Periodic task %s failed", name)
+
+    return start_forever(loop(), name=name)
+
+def start_forever(coro: Coroutine, *, name: str) -> asyncio.Task:
+    task = asyncio.create_task(coro, name=name)
+    _periodic.add(task)
+    task.add_done_callback(_periodic.discard)
+    return task
+
+async def cancel_periodic_tasks():
+    for task in list(_periodic):
+        task.cancel()
+    if _periodic:
+        await asyncio.gather(*_periodic, return_exceptions=True)
@@ -0,0 +1,106 @@
+import asyncio
+import logging
+import time
+from typing import Callable, Optional
+
+from app.core.config.settings import settings
+from app.utils.emails import EmailSender, get_email_sender
+
+log = logging.getLogger(__name__)
+
+class EmailQueueFull(Exception):
+    pass
+
+class EmailQueue:
+    """
+    Bounded in-process mail queue: request handlers `enqueue` and return at once.
+
+    EMAIL_SENDERS tasks drain it, each owning one sender (so one long-lived SMTP
+    connection). A failed message is retried with exponential backoff; after the
+    last retry it is logged and dropped. `drain()` on shutdown waits up to
+    EMAIL_DRAIN_SECONDS for queued mail before closing the connections.
+    """
+    def __init__(self, maxsize: int, senders: int, sender_factory: Callable[[], EmailSender] = get_email_sender):
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize)
+        self._senders = senders
+        self._sender_factory = sender_factory
+        self._tasks: list[asyncio.Task] = []
+        self._active: list[EmailSender] = []
+        self.enqueued = 0
+        self.sent = 0
+        self.failed = 0
+        self.retried = 0
+        self.rejected = 0
+        self.latency_ewma = 0.0   # enqueue -> delivered, seconds
+        self.latency_max = 0.0
+
+    def enqueue(self, to: str, subject: str, html: str, text: Optional[str] = None):
+        try:
+            self._queue.put_nowait((time.monotonic(), to, subject, html, text))
+        except asyncio.QueueFull:
+            self.rejected += 1
+            raise EmailQueueFull("Email queue is full; try again shortly")
+        self.enqueued += 1
+
+    async def _deliver(self, sender: EmailSender, item: tuple):
+        queued_at, to, subject, html, text = item
+        delay = settings.EMAIL_RETRY_BASE_SECONDS
+        for attempt in range(settings.EMAIL_SEND_RETRIES + 1):
+            try:
+                await sender.send(to=to, subject=subject, html=html, text=text)
+                break
+            except Exception as e:
+                if attempt == settings.EMAIL_SEND_RETRIES:
+                    self.failed += 1
+                    log.error("Giving up on email %r to %s after %d attempts: %s", subject, to, attempt + 1, e)
+                    return
+                self.retried += 1
+                log.warning("Email %r to %s failed (%s); retrying in %.1fs", subject, to, e, delay)
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, settings.EMAIL_RETRY_MAX_SECONDS)
+        self.sent += 1
+        latency = time.monotonic() - queued_at
+        self.latency_ewma += 0.1 * (latency - self.latency_ewma)
+        self.latency_max = max(self.latency_max, latency)
+
+    async def _run(self, sender: EmailSender):
+        while True:
+            item = await self._queue.get()
+            try:
+                await self._deliver(sender, item)
+            finally:
+                self._queue.task_done()
+
+    def start(self):
+        for i in range(self._senders):
+            sender = self._sender_factory()
+            self._active.append(sender)
+            self._tasks.append(asyncio.create_task(self._run(sender), name=f"email-sender-{i}"))
+
+    async def drain(self, timeout: float | None = None):
+        timeout = settings.EMAIL_DRAIN_SECONDS if timeout is None else timeout
+        if self._tasks:
+            try:
+                await asyncio.wait_for(self._queue.join(), timeout)
+            except asyncio.TimeoutError:
+                log.warning("Shutting down with %d emails still queued", self._queue.qsize())
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        await asyncio.gather(*(s.close() for s in self._active), return_exceptions=True)
+        self._tasks, self._active = [], []
+
+    def stats(self) -> dict:
+        return {
+            "depth": self._queue.qsize(),
+            "maxsize": self._queue.maxsize,
+            "enqueued": self.enqueued,
+            "sent": self.sent,
+            "failed": self.failed,
+            "retried": self.retried,
+            "rejected": self.rejected,
+            "latency_ms_ewma": round(self.latency_ewma * 1000, 1),
+            "latency_ms_max": round(self.latency_max * 1000, 1),
+        }
+
+email_queue = EmailQueue(settings.EMAIL_QUEUE_MAX, settings.EMAIL_SENDERS)
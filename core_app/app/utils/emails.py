@@ -1,7 +1,7 @@
 import logging
 from typing import Optional
 from urllib.parse import urlencode
-from aiosmtplib import SMTP
+from aiosmtplib import SMTP, SMTPServerDisconnected
 from email.message import EmailMessage
 from app.core.config.settings import settings
 
@@ -11,31 +11,68 @@ class EmailSender:
     async def send(self, to: str, subject: str, html: str, text: Optional[str] = None):
         raise NotImplementedError
 
+    async def close(self):
+        pass
+
 class ConsoleEmailSender(EmailSender):
     async def send(self, to: str, subject: str, html: str, text: Optional[str] = None):
         log.info("=== DEV EMAIL ===\nTo: %s\nSubject: %s\nText: %s\nHTML:\n%s\n=== /DEV EMAIL ===", to, subject, text or "", html)
 
+def build_message(to: str, subject: str, html: str, text: Optional[str] = None) -> EmailMessage:
+    msg = EmailMessage()
+    msg["From"] = f"{settings.MAIL_FROM_NAME} <{settings.MAIL_FROM}>"
+    msg["To"] = to
+    msg["Subject"] = subject
+    if text:
+        msg.set_content(text)
+        msg.add_alternative(html, subtype="html")
+    else:
+        msg.set_content(html, subtype="html")
+    return msg
+
 class SmtpEmailSender(EmailSender):
+    """
+    Keeps one authenticated connection open across messages (connect, STARTTLS and
+    AUTH happen once) and reconnects when the server has dropped it. One instance
+    per concurrent sender; a connection is not shared between tasks.
+    """
+    def __init__(self):
+        self._smtp: Optional[SMTP] = None
+
+    async def _connection(self) -> SMTP:
+        if self._smtp is None or not self._smtp.is_connected:
+            smtp = SMTP(
+                hostname=settings.SMTP_HOST,
+                port=settings.SMTP_PORT,
+                use_tls=False,
+                start_tls=settings.SMTP_TLS,
+                username=settings.SMTP_USER if settings.SMTP_USER and settings.SMTP_PASS else None,
+                password=settings.SMTP_PASS if settings.SMTP_USER and settings.SMTP_PASS else None,
+                timeout=settings.SMTP_TIMEOUT,
+            )
+            await smtp.connect()
+            self._smtp = smtp
+        return self._smtp
+
     async def send(self, to: str, subject: str, html: str, text: Optional[str] = None):
-        msg = EmailMessage()
-        msg["From"] = f"{settings.MAIL_FROM_NAME} <{settings.MAIL_FROM}>"
-        msg["To"] = to
-        msg["Subject"] = subject
-        if text:
-            msg.set_content(text)
-            msg.add_alternative(html, subtype="html")
-        else:
-            msg.set_content(html, subtype="html")
-
-        async with SMTP(
-            hostname=settings.SMTP_HOST,
-            port=settings.SMTP_PORT,
-            use_tls=False,
-            start_tls=settings.SMTP_TLS,
-        ) as smtp:
-            if settings.SMTP_USER and settings.SMTP_PASS:
-                await smtp.login(settings.SMTP_USER, settings.SMTP_PASS)
-            await smtp.send_message(msg)
+        msg = build_message(to, subject, html, text)
+        try:
+            await (await self._connection()).send_message(msg)
+        except SMTPServerDisconnected:
+            # Servers close idle connections; one fresh connection before calling it a failure.
+            await self.close()
+            await (await self._connection()).send_message(msg)
+        except Exception:
+            await self.close()
+            raise
+
+    async def close(self):
+        smtp, self._smtp = self._smtp, None
+        if smtp is not None and smtp.is_connected:
+            try:
+                await smtp.quit()
+            except Exception:
+                smtp.close()
 
 def get_email_sender() -> EmailSender:
     # If SMTP_HOST missing, use console sender
@@ -43,6 +80,10 @@ def get_email_sender() -> EmailSender:
         return ConsoleEmailSender()
     return SmtpEmailSender()
 
+def normalize_email(email: str) -> str:
+    # For in-memory keys only; lookups still use the address as stored.
+    return email.strip().lower()
+
 def build_frontend_link(path: str, token: str) -> str:
     base = settings.FRONTEND_URL.rstrip("/")
     p = path if path.startswith("/") else f"/{path}"
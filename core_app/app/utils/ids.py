@@ -1,4 +1,83 @@
+import os
+import time
 import uuid
+from typing import Any
+
+from bson import Binary
+from pydantic_core import core_schema
+
+from app.core.config.settings import settings
+
+def uuid7() -> uuid.UUID:
+    """
+    Time-ordered UUID (RFC 9562 v7): 48-bit ms timestamp, then random bits. Consecutive
+    ids land next to each other in the _id index instead of all over it.
+    """
+    value = (time.time_ns() // 1_000_000 & ((1 << 48) - 1)) << 80 | int.from_bytes(os.urandom(10), "big")
+    value = value & ~(0xF << 76) | 0x7 << 76  # version
+    value = value & ~(0x3 << 62) | 0x2 << 62  # RFC 4122 variant
+    return uuid.UUID(int=value)
 
 def new_uuid() -> str:
-    return str(uuid.uuid4())
+    return str(uuid7() if settings.ID_UUID_VERSION == 7 else uuid.uuid4())
+
+# ----- Stored user ids -----
+# The public form of a user id is always the 36-char string (JWT `sub`, API payloads).
+# With ID_STORAGE=binary it is stored as BSON binary UUID (subtype 4): 18 bytes
+# instead of 41 in _id and every user_id foreign key.
+
+def _binary_storage() -> bool:
+    return settings.ID_STORAGE == "binary"
+
+def to_db_id(value: str) -> Any:
+    if not _binary_storage():
+        return value
+    try:
+        return Binary.from_uuid(uuid.UUID(value))
+    except (TypeError, ValueError, AttributeError):
+        return value  # not a UUID: can only ever match a legacy string id
+
+def id_filter(value: str) -> Any:
+    """
+    Query value for an id equality match. While ID_READ_LEGACY is on (online migration),
+    matches both the binary and the original string form.
+    """
+    db_value = to_db_id(value)
+    if settings.ID_READ_LEGACY and db_value is not value:
+        return {"$in": [db_value, value]}
+    return db_value
+
+def ids_in(values) -> list:
+    out = []
+    for v in values:
+        db_value = to_db_id(v)
+        out.append(db_value)
+        if settings.ID_READ_LEGACY and db_value is not v:
+            out.append(v)
+    return out
+
+def from_db_id(value: Any) -> str:
+    if isinstance(value, uuid.UUID):
+        return str(value)
+    if isinstance(value, Binary) and value.subtype == 4:
+        return str(value.as_uuid())
+    return value
+
+class UserId(str):
+    """
+    str subclass for user-id fields on Beanie models. Validates from any stored form and
+    is encoded by `encode_user_id` (register it in the model's bson_encoders).
+    """
+    @classmethod
+    def __get_pydantic_core_schema__(cls, source, handler):
+        return core_schema.no_info_before_validator_function(
+            lambda v: cls(from_db_id(v)),
+            core_schema.is_instance_schema(cls),
+            serialization=core_schema.plain_serializer_function_ser_schema(str),
+        )
+
+def encode_user_id(value: str) -> Any:
+    return to_db_id(value)
+
+def new_user_id() -> UserId:
+    return UserId(new_uuid())
@@ -8,9 +8,10 @@ ALGO = "HS256"
 def _now():
     return datetime.now(timezone.utc)
 
-def make_oauth_state(nonce: str | None = None, minutes: int = 10) -> str:
+def make_oauth_state(nonce: str | None = None, minutes: int = 10, provider: str | None = None) -> str:
     payload = {
         "type": "oauth-state",
+        "provider": provider,
         "nonce": nonce or new_uuid(),
         "iat": int(_now().timestamp()),
         "exp": int((_now() + timedelta(minutes=minutes)).timestamp()),
@@ -1,3 +1,9 @@
+import asyncio
+import hashlib
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
 from zxcvbn import zxcvbn
 from app.core.config.settings import settings
 
@@ -7,18 +13,73 @@ class PasswordTooWeak(Exception):
         self.score = score
         self.feedback = feedback
 
-def validate_password_strength(password: str, user_inputs: list[str] = []):
+# zxcvbn is pure Python and its cost grows with input length; one thread keeps it off the loop.
+_executor = ThreadPoolExecutor(max_workers=settings.PASSWORD_SCORE_WORKERS, thread_name_prefix="zxcvbn")
+
+# digest(password, user_inputs) -> (expires_at, score, feedback); never holds the raw password
+_memo: "OrderedDict[bytes, tuple[float, int, dict]]" = OrderedDict()
+_MEMO_MAX = 1024
+
+def _check_length(password: str):
     if len(password) < settings.MIN_PASSWORD_LENGTH:
         raise PasswordTooWeak(
             f"Password must be at least {settings.MIN_PASSWORD_LENGTH} characters long",
             score=0,
             feedback={"warning": "Too short", "suggestions": []},
         )
-    result = zxcvbn(password, user_inputs=user_inputs)
-    score = result.get("score", 0)  # 0-4
-    if score < settings.MIN_PASSWORD_SCORE:
+    if len(password) > settings.MAX_PASSWORD_LENGTH:
         raise PasswordTooWeak(
-            "Password is too weak",
-            score=score,
-            feedback=result.get("feedback", {}) or {},
+            f"Password must be at most {settings.MAX_PASSWORD_LENGTH} characters long",
+            score=0,
+            feedback={"warning": "Too long", "suggestions": []},
         )
+
+def _score(password: str, user_inputs: list[str]) -> tuple[int, dict]:
+    # bcrypt ignores everything past 72 bytes anyway; scoring the prefix bounds the cost.
+    cap = settings.PASSWORD_SCORE_MAX_CHARS
+    result = zxcvbn(password[:cap], user_inputs=[u[:cap] for u in user_inputs if u])
+    return result.get("score", 0), result.get("feedback", {}) or {}  # score 0-4
+
+def _raise_if_weak(score: int, feedback: dict):
+    if score < settings.MIN_PASSWORD_SCORE:
+        raise PasswordTooWeak("Password is too weak", score=score, feedback=feedback)
+
+def validate_password_strength(password: str, user_inputs: list[str] = []):
+    _check_length(password)
+    _raise_if_weak(*_score(password, user_inputs))
+
+def _memo_key(password: str, user_inputs: list[str]) -> bytes:
+    h = hashlib.sha256(password.encode("utf-8"))
+    for u in user_inputs:
+        h.update(b"\0" + (u or "").encode("utf-8"))
+    return h.digest()
+
+async def validate_password_strength_async(password: str, user_inputs: list[str] | None = None):
+    """
+    Same checks as validate_password_strength, scored in an executor and memoized
+    for PASSWORD_SCORE_CACHE_SECONDS (retried signups/resets re-submit the same input).
+    """
+    user_inputs = user_inputs or []
+    _check_length(password)
+
+    key = _memo_key(password, user_inputs)
+    now = time.monotonic()
+    hit = _memo.get(key)
+    if hit and hit[0] > now:
+        _memo.move_to_end(key)
+        score, feedback = hit[1], hit[2]
+    else:
+        loop = asyncio.get_running_loop()
+        score, feedback = await loop.run_in_executor(_executor, _score, password, user_inputs)
+        _memo[key] = (now + settings.PASSWORD_SCORE_CACHE_SECONDS, score, feedback)
+        _memo.move_to_end(key)
+        while len(_memo) > _MEMO_MAX:
+            _memo.popitem(last=False)
+    _raise_if_weak(score, feedback)
+
+async def warm_password_strength():
+    """
+    zxcvbn builds its ranked dictionaries on first use; pay that at startup, not on the first signup.
+    """
+    loop = asyncio.get_running_loop()
+    await loop.run_in_executor(_executor, _score, "warm-up Passw0rd!", ["warmup@example.com"])
@@ -0,0 +1,40 @@
+"""
+Show that the in-memory limiter costs the same per hit and stays bounded in memory
+however many distinct keys arrive.
+
+    python -m scripts.bench_ratelimit --keys 5000000 --limit 5/2
+
+Feeds a stream of never-repeating keys (the worst case: a scan from many IPs) and
+prints, per chunk, the mean cost of a hit and the number of keys held. With a limit
+window of W seconds the table should level off at about W seconds' worth of keys.
+"""
+import argparse
+import time
+import tracemalloc
+
+from app.core.ratelimit.limiter import Limit, MemoryRateLimiter
+
+def main(keys: int, chunk: int, spec: str, trace: bool):
+    limiter = MemoryRateLimiter()
+    limit = Limit(spec)
+    if trace:
+        tracemalloc.start()
+    print(f"{'hits':>12} {'ns/hit':>8} {'keys held':>10}" + (f" {'MiB':>8}" if trace else ""))
+    for lo in range(0, keys, chunk):
+        start = time.perf_counter_ns()
+        for i in range(lo, min(lo + chunk, keys)):
+            limiter.check(f"10.{i >> 16 & 255}.{i >> 8 & 255}.{i & 255}:{i}:login", limit)
+        per_hit = (time.perf_counter_ns() - start) / chunk
+        line = f"{lo + chunk:>12,} {per_hit:>8.0f} {limiter.size():>10,}"
+        if trace:
+            line += f" {tracemalloc.get_traced_memory()[0] / 2**20:>8.1f}"
+        print(line)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--keys", type=int, default=2_000_000)
+    parser.add_argument("--chunk", type=int, default=200_000)
+    parser.add_argument("--limit", default="5/2")
+    parser.add_argument("--trace", action="store_true", help="also report traced memory (slower)")
+    args = parser.parse_args()
+    main(args.keys, args.chunk, args.limit, args.trace)
@@ -0,0 +1,84 @@
+"""
+Show that session listing and revoke-all stay flat as refresh_tokens grows.
+
+    python -m scripts.bench_sessions --db core_bench --sizes 100000 1000000 10000000
+
+Uses a separate database whose refresh_tokens collection is emptied first. At each size it times the real
+RefreshTokensRepo calls for one user with a handful of sessions and prints the
+documents examined by the winning plan, which should not grow with the collection.
+"""
+import argparse
+import asyncio
+import time
+from datetime import datetime, timedelta
+
+from app.core.config.settings import settings
+from app.db.models import RefreshToken
+from app.db.mongo import get_client, init_mongo
+from app.db.repositories.refresh_tokens import RefreshTokensRepo
+
+PROBE_USER = "bench-probe-user"
+PROBE_SESSIONS = 25
+BATCH = 10_000
+
+def _doc(i: int, user_id: str, now: datetime) -> dict:
+    return {
+        "_id": f"bench-{i}",
+        "user_id": user_id,
+        "token_hash": bytes(32),
+        "expires_at": now + timedelta(days=7, seconds=i % 86400),
+        "revoked_at": None if i % 3 else now,
+        "created_at": now,
+    }
+
+async def _grow(coll, start: int, stop: int, users: int):
+    now = datetime.utcnow()
+    for lo in range(start, stop, BATCH):
+        hi = min(lo + BATCH, stop)
+        await coll.insert_many([_doc(i, f"user-{i % users}", now) for i in range(lo, hi)], ordered=False)
+
+async def _timed(fn, repeat: int = 20) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        await fn()
+    return (time.perf_counter() - start) / repeat * 1000
+
+async def main(db_name: str, sizes: list[int], users: int):
+    settings.MONGO_DB_NAME = db_name
+    await init_mongo()
+    await get_client()[db_name]["refresh_tokens"].delete_many({})
+    coll = RefreshToken.get_motor_collection()
+    repo = RefreshTokensRepo()
+    now = datetime.utcnow()
+    await coll.insert_many([_doc(-i - 1, PROBE_USER, now) | {"revoked_at": None} for i in range(PROBE_SESSIONS)])
+
+    print(f"{'docs':>12} {'list ms':>9} {'list examined':>14} {'revoke-all ms':>14} {'revoke examined':>16}")
+    have = 0
+    for size in sizes:
+        await _grow(coll, have, size, users)
+        have = size
+
+        list_ms = await _timed(lambda: repo.list_active_for_user(PROBE_USER, limit=20))
+        list_plan = await coll.find(
+            {"user_id": PROBE_USER, "revoked_at": None, "expires_at": {"$gt": now}}
+        ).sort([("expires_at", -1), ("_id", -1)]).limit(21).explain()
+
+        async def revoke_and_reset():
+            await repo.revoke_all_for_user(PROBE_USER)
+            await coll.update_many({"user_id": PROBE_USER}, {"$set": {"revoked_at": None}})
+
+        revoke_ms = await _timed(revoke_and_reset)
+        revoke_plan = await coll.find({"user_id": PROBE_USER, "revoked_at": None}).explain()
+
+        print(
+            f"{size:>12,} {list_ms:>9.2f} {list_plan['executionStats']['totalDocsExamined']:>14} "
+            f"{revoke_ms:>14.2f} {revoke_plan['executionStats']['totalDocsExamined']:>16}"
+        )
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--db", default="core_bench")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100_000, 1_000_000])
+    parser.add_argument("--users", type=int, default=200_000)
+    args = parser.parse_args()
+    asyncio.run(main(args.db, args.sizes, args.users))
@@ -0,0 +1,64 @@
+"""
+Compare full Beanie User loads with the projected UserRecord path used on login/refresh.
+
+    python -m scripts.bench_user_reads --iterations 2000
+
+Seeds one throwaway user in MONGO_DB_NAME, measures round trip + deserialization for both
+paths, then pure deserialization time and retained memory for 10k objects.
+"""
+import argparse
+import asyncio
+import time
+import tracemalloc
+
+from beanie.odm.utils.parsing import parse_obj
+
+from app.db.mongo import init_mongo
+from app.db.models import User
+from app.db.repositories.records import USER_RECORD_PROJECTION, UserRecord
+
+EMAIL = "bench-user-reads@example.com"
+
+def _report(label: str, seconds: float, n: int):
+    print(f"{label:<38} {seconds / n * 1e6:9.1f} us/op")
+
+async def main(iterations: int):
+    await init_mongo()
+    coll = User.get_motor_collection()
+    if not await coll.find_one({"email": EMAIL}):
+        await User(email=EMAIL, full_name="Bench User", hashed_password="$2b$12$" + "x" * 53).insert()
+
+    for label, fn in [
+        ("Beanie User.find_one", lambda: User.find_one(User.email == EMAIL)),
+        ("projected find_one -> UserRecord", lambda: _projected(coll)),
+    ]:
+        await fn()  # warm up
+        start = time.perf_counter()
+        for _ in range(iterations):
+            await fn()
+        _report(label, time.perf_counter() - start, iterations)
+
+    raw = await coll.find_one({"email": EMAIL})
+    n = 10_000
+    for label, build in [
+        ("parse_obj(User) only", lambda: parse_obj(User, dict(raw))),
+        ("UserRecord.from_doc only", lambda: UserRecord.from_doc(raw)),
+    ]:
+        tracemalloc.start()
+        start = time.perf_counter()
+        objs = [build() for _ in range(n)]
+        elapsed = time.perf_counter() - start
+        size, _ = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        _report(label, elapsed, n)
+        print(f"{'':<38} {size / n:9.0f} B/object retained")
+        del objs
+
+async def _projected(coll):
+    doc = await coll.find_one({"email": EMAIL}, USER_RECORD_PROJECTION)
+    return UserRecord.from_doc(doc)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--iterations", type=int, default=2000)
+    asyncio.run(main(parser.parse_args().iterations))
@@ -0,0 +1,17 @@
+import argparse
+from app.core.config.settings import settings
+from app.core.security.passwords import calibrate_bcrypt_rounds, measure_bcrypt_ms
+
+def main():
+    parser = argparse.ArgumentParser(description="Pick the highest bcrypt cost under a latency budget on this machine.")
+    parser.add_argument("--target-ms", type=float, default=settings.BCRYPT_TARGET_MS)
+    parser.add_argument("--min-rounds", type=int, default=settings.BCRYPT_MIN_ROUNDS)
+    args = parser.parse_args()
+
+    rounds = calibrate_bcrypt_rounds(args.target_ms, args.min_rounds)
+    for r in range(args.min_rounds, rounds + 2):
+        print(f"cost {r:2d}: {measure_bcrypt_ms(r, samples=1):8.1f} ms")
+    print(f"\nBCRYPT_ROUNDS={rounds}")
+
+if __name__ == "__main__":
+    main()
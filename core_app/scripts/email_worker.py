@@ -0,0 +1,72 @@
+"""
+Deliver mail from the email_outbox collection.
+
+    python -m scripts.email_worker [--senders 4]
+
+API workers started with EMAIL_DELIVERY=outbox (opt-in; the default "queue" sends
+in-process) only insert outbox documents; this process does all SMTP work. Each
+sender task keeps one long-lived connection and loops: claim the oldest due
+message under a lease (find_one_and_update), send it, then mark it sent or
+reschedule it with exponential backoff. Run as many copies as throughput needs;
+leases keep them from sending the same message twice, and a crashed worker's
+messages become claimable again after EMAIL_OUTBOX_LEASE_SECONDS.
+SIGTERM/SIGINT stop claiming and let in-flight sends finish.
+"""
+import argparse
+import asyncio
+import logging
+import os
+import signal
+import socket
+
+from app.core.config.settings import settings
+from app.core.logging_config import configure_logging
+from app.db.mongo import init_mongo
+from app.db.repositories.email_outbox import EmailOutboxRepo
+from app.utils.emails import EmailSender, get_email_sender
+
+log = logging.getLogger("email_worker")
+
+async def _sender_loop(name: str, repo: EmailOutboxRepo, sender: EmailSender, stop: asyncio.Event):
+    owner = f"{socket.gethostname()}:{os.getpid()}:{name}"
+    try:
+        while not stop.is_set():
+            msg = await repo.claim(owner)
+            if msg is None:
+                abandoned = await repo.fail_abandoned()
+                if abandoned:
+                    log.warning("Marked %d messages failed after their final lease expired", abandoned)
+                try:
+                    await asyncio.wait_for(stop.wait(), settings.EMAIL_OUTBOX_POLL_SECONDS)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            try:
+                await sender.send(to=msg["to"], subject=msg["subject"], html=msg["html"], text=msg.get("text"))
+            except Exception as e:
+                log.warning("Send of %s to %s failed (attempt %d): %s", msg["_id"], msg["to"], msg["attempts"], e)
+                await repo.retry(msg, owner, str(e)[:500])
+                continue
+            await repo.mark_sent(msg, owner)
+    finally:
+        await sender.close()
+
+async def main(senders: int):
+    configure_logging()
+    await init_mongo()
+    repo = EmailOutboxRepo()
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        loop.add_signal_handler(sig, stop.set)
+    log.info("Email worker started with %d senders; pending: %s", senders, await repo.counts())
+    await asyncio.gather(*(
+        _sender_loop(f"s{i}", repo, get_email_sender(), stop) for i in range(senders)
+    ))
+    log.info("Email worker stopped")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--senders", type=int, default=settings.EMAIL_SENDERS, help="concurrent SMTP connections")
+    args = parser.parse_args()
+    asyncio.run(main(args.senders))
@@ -0,0 +1,46 @@
+import argparse
+from datetime import datetime, timezone
+from pathlib import Path
+
+from cryptography.hazmat.primitives import serialization
+
+from app.core.security.keys import generate_private_key
+
+def generate(out: Path, alg: str, kid: str | None):
+    kid = kid or datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+    key = generate_private_key(alg)
+    out.mkdir(parents=True, exist_ok=True)
+    path = out / f"{kid}.pem"
+    path.write_bytes(key.private_bytes(
+        encoding=serialization.Encoding.PEM,
+        format=serialization.PrivateFormat.PKCS8,
+        encryption_algorithm=serialization.NoEncryption(),
+    ))
+    path.chmod(0o600)
+    print(f"Wrote {path} (kid={kid})")
+
+def retire(out: Path, kid: str):
+    # Keep verifying tokens signed by this key, but never sign with it again.
+    path = out / f"{kid}.pem"
+    key = serialization.load_pem_private_key(path.read_bytes(), password=None)
+    path.write_bytes(key.public_key().public_bytes(
+        encoding=serialization.Encoding.PEM,
+        format=serialization.PublicFormat.SubjectPublicKeyInfo,
+    ))
+    print(f"Replaced {path} with its public key")
+
+def main():
+    parser = argparse.ArgumentParser(description="Manage JWT signing keys in JWT_KEYS_DIR.")
+    parser.add_argument("--dir", required=True)
+    parser.add_argument("--alg", default="EdDSA", choices=["EdDSA", "ES256", "ES384"])
+    parser.add_argument("--kid", default=None, help="new key id; defaults to a UTC timestamp so the newest sorts last")
+    parser.add_argument("--retire", metavar="KID", default=None, help="strip the private half of an existing key")
+    args = parser.parse_args()
+
+    if args.retire:
+        retire(Path(args.dir), args.retire)
+    else:
+        generate(Path(args.dir), args.alg, args.kid)
+
+if __name__ == "__main__":
+    main()
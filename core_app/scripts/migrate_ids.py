@@ -0,0 +1,81 @@
+"""
+Online conversion of user ids from 36-char strings to BSON binary UUIDs.
+
+    1. deploy with ID_STORAGE=binary ID_READ_LEGACY=true  (reads match both forms)
+    2. python -m scripts.migrate_ids [--batch 500]
+    3. redeploy with ID_READ_LEGACY=false
+
+Per batch of users: rewrite the user_id foreign keys in refresh_tokens and
+oauth_accounts, then replace each user document with a binary-_id copy (delete +
+insert, since _id is immutable and email is unique). On a replica set each batch
+runs in a transaction; on a standalone server a user is briefly absent between
+its delete and insert. Re-runnable: only string _ids are picked up.
+"""
+import argparse
+import asyncio
+import uuid
+
+from bson import Binary
+from pymongo import UpdateMany
+
+from app.core.config.settings import settings
+from app.db.mongo import get_client, init_mongo
+
+FK_COLLECTIONS = ("refresh_tokens", "oauth_accounts")
+
+async def _convert_batch(db, users: list[dict], session=None):
+    pairs = [(u["_id"], Binary.from_uuid(uuid.UUID(u["_id"]))) for u in users]
+    for name in FK_COLLECTIONS:
+        await db[name].bulk_write(
+            [UpdateMany({"user_id": old}, {"$set": {"user_id": new}}) for old, new in pairs],
+            ordered=False, session=session,
+        )
+    await db["users"].delete_many({"_id": {"$in": [old for old, _ in pairs]}}, session=session)
+    await db["users"].insert_many([u | {"_id": new} for u, (_, new) in zip(users, pairs)], session=session)
+
+async def _supports_transactions(client) -> bool:
+    hello = await client.admin.command("hello")
+    return "setName" in hello or hello.get("msg") == "isdbgrid"
+
+async def main(batch: int):
+    if settings.ID_STORAGE != "binary" or not settings.ID_READ_LEGACY:
+        raise SystemExit("Run with ID_STORAGE=binary and ID_READ_LEGACY=true (see module docstring)")
+    await init_mongo()
+    client = get_client()
+    db = client[settings.MONGO_DB_NAME]
+    transactional = await _supports_transactions(client)
+    print(f"transactions: {'yes' if transactional else 'no (standalone)'}")
+
+    done, last = 0, ""
+    while True:
+        page = await db["users"].find({"_id": {"$type": "string", "$gt": last}}).sort("_id", 1).limit(batch).to_list(None)
+        if not page:
+            break
+        last = page[-1]["_id"]
+        users = [u for u in page if _is_uuid(u["_id"])]
+        if not users:
+            continue
+        if transactional:
+            async with await client.start_session() as s:
+                async with s.start_transaction():
+                    await _convert_batch(db, users, session=s)
+        else:
+            await _convert_batch(db, users)
+        done += len(users)
+        print(f"converted {done} users")
+
+    skipped = await db["users"].count_documents({"_id": {"$type": "string"}})
+    if skipped:
+        print(f"{skipped} users have non-UUID string ids and were left as-is")
+
+def _is_uuid(value: str) -> bool:
+    try:
+        uuid.UUID(value)
+        return True
+    except ValueError:
+        return False
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--batch", type=int, default=500)
+    asyncio.run(main(parser.parse_args().batch))
@@ -0,0 +1,97 @@
+"""
+Convert refresh_tokens to the compact layout and report the size change.
+
+    python -m scripts.migrate_refresh_tokens [--batch 5000] [--compact]
+
+Old documents: ObjectId _id, unique `jti` string, 64-char hex `token_hash`, inline
+`user_agent`. New documents: `_id` = jti, 32-byte binary `token_hash`, `ua_id`
+pointing into the `user_agents` lookup collection. Safe to re-run: converted
+documents have no `jti` field and are skipped. Run it right after deploying the new
+layout; sessions still in the old layout can't refresh until they are converted.
+"""
+import argparse
+import asyncio
+
+from pymongo import InsertOne, UpdateOne
+from pymongo.errors import BulkWriteError
+
+from app.core.config.settings import settings
+from app.db.mongo import get_client, init_mongo
+from app.db.repositories.refresh_tokens import USER_AGENT_MAX_LEN, USER_AGENTS_COLLECTION, ua_digest
+
+def _convert(doc: dict) -> tuple[dict, tuple[bytes, str] | None]:
+    ua = (doc.get("user_agent") or "")[:USER_AGENT_MAX_LEN] or None
+    token_hash = doc["token_hash"]
+    new = {
+        "_id": doc["jti"],
+        "user_id": doc["user_id"],
+        "token_hash": bytes.fromhex(token_hash) if isinstance(token_hash, str) else token_hash,
+        "ua_id": ua_digest(ua) if ua else None,
+        "ip": doc.get("ip"),
+        "expires_at": doc["expires_at"],
+        "revoked_at": doc.get("revoked_at"),
+        "replaced_by": doc.get("replaced_by"),
+        "created_at": doc.get("created_at"),
+    }
+    return new, ((new["ua_id"], ua) if ua else None)
+
+async def _stats(db, name: str) -> dict:
+    s = await db.command("collStats", name)
+    return {k: s.get(k, 0) for k in ("count", "size", "storageSize", "totalIndexSize")}
+
+def _fmt(n: int) -> str:
+    return f"{n / 1024 / 1024:10.2f} MiB"
+
+async def main(batch: int, compact: bool):
+    await init_mongo()  # also drops the legacy unique jti index
+    db = get_client()[settings.MONGO_DB_NAME]
+    coll = db["refresh_tokens"]
+    agents = db[USER_AGENTS_COLLECTION]
+    before = await _stats(db, "refresh_tokens")
+
+    converted = 0
+    while True:
+        old = await coll.find({"jti": {"$exists": True}}).limit(batch).to_list(None)
+        if not old:
+            break
+        inserts, uas = [], {}
+        for doc in old:
+            new, ua = _convert(doc)
+            inserts.append(InsertOne(new))
+            if ua:
+                uas[ua[0]] = ua[1]
+        if uas:
+            await agents.bulk_write(
+                [UpdateOne({"_id": d}, {"$setOnInsert": {"ua": ua}}, upsert=True) for d, ua in uas.items()],
+                ordered=False,
+            )
+        try:
+            await coll.bulk_write(inserts, ordered=False)
+        except BulkWriteError as e:
+            # Duplicate _id means an earlier interrupted run already converted that token.
+            if any(err["code"] != 11000 for err in e.details.get("writeErrors", [])):
+                raise
+        await coll.delete_many({"_id": {"$in": [d["_id"] for d in old]}})
+        converted += len(old)
+        print(f"converted {converted} tokens")
+
+    if compact:
+        await db.command("compact", "refresh_tokens")
+    after = await _stats(db, "refresh_tokens")
+    ua_stats = await _stats(db, USER_AGENTS_COLLECTION)
+
+    print(f"\n{'':<16}{'before':>16}{'after':>16}")
+    print(f"{'documents':<16}{before['count']:>16,}{after['count']:>16,}")
+    for key in ("size", "storageSize", "totalIndexSize"):
+        print(f"{key:<16}{_fmt(before[key]):>16}{_fmt(after[key]):>16}")
+    print(f"\nuser_agents: {ua_stats['count']:,} docs, {_fmt(ua_stats['size']).strip()} data, "
+          f"{_fmt(ua_stats['totalIndexSize']).strip()} indexes")
+    if not compact:
+        print("storageSize only shrinks after compaction; re-run with --compact to reclaim it.")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--batch", type=int, default=5000)
+    parser.add_argument("--compact", action="store_true")
+    args = parser.parse_args()
+    asyncio.run(main(args.batch, args.compact))
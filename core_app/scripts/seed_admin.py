@@ -1,11 +1,12 @@
 import asyncio
 from app.db.mongo import init_mongo
-from app.db.models.user import User
 from app.db.models.role import Role
+from app.db.repositories.roles import role_cache
+from app.db.repositories.users import UsersRepo
 
 ADMIN_ROLE = {
     "slug": "admin", #
-    "permissions": ["users:read", "users:write", "roles:manage"]
+    "permissions": ["users:read", "users:write", "roles:manage", "metrics:read"]
 }
 
 async def main():
@@ -15,17 +16,19 @@ async def main():
     if not r:
         r = Role(**ADMIN_ROLE)
         await r.insert()
+        await role_cache.invalidate()  # running workers pick the new role up on their next poll
         print("Created role 'admin'")
 
     # pick a user by email to promote
     email = "alice@example.com"  # <-- change
-    u = await User.find_one(User.email == email)
+    users = UsersRepo()
+    u = await users.get_by_email(email)
     if not u:
         print("User not found:", email)
         return
     if "admin" not in (u.roles or []):
-        u.roles = (u.roles or []) + ["admin"]
-        await u.save()
+        # Targeted $addToSet: save() would duplicate a string-_id user during an ID_STORAGE migration.
+        await users.add_role(u.id, "admin")
         print("Added 'admin' to user:", email)
     else:
         print("User already admin:", email)
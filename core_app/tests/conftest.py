@@ -0,0 +1,14 @@
+import os
+
+import pytest
+
+# Settings() requires MONGO_URI; unit tests never connect, so any URI will do.
+os.environ.setdefault("MONGO_URI", "mongodb://localhost:27017")
+
+@pytest.fixture
+def jwks_stub():
+    """A local JWKS endpoint (see tests/jwks_stub.py)."""
+    from jwks_stub import JWKSStub
+    stub = JWKSStub()
+    yield stub
+    stub.close()
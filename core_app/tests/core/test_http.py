@@ -0,0 +1,58 @@
+import asyncio
+
+import httpx
+import pytest
+
+from app.core.config.settings import settings
+from app.core.http import HttpClient
+
+def test_per_host_cap_and_counters(monkeypatch):
+    monkeypatch.setattr(settings, "HTTP_CLIENT_PER_HOST", 2)
+    release = asyncio.Event()
+
+    async def handler(request):
+        if request.url.host == "down.example":
+            raise httpx.ConnectError("refused", request=request)
+        await release.wait()
+        return httpx.Response(200, json={"ok": True})
+
+    async def run():
+        http = HttpClient(transport=httpx.MockTransport(handler))
+        try:
+            slow = [asyncio.ensure_future(http.get("https://idp.example/certs")) for _ in range(5)]
+            other = asyncio.ensure_future(http.get("https://other.example/certs"))
+            await asyncio.sleep(0.05)
+            hosts = http.stats()["hosts"]
+            assert (hosts["idp.example"]["in_flight"], hosts["idp.example"]["waiting"]) == (2, 3)
+            assert hosts["other.example"]["in_flight"] == 1  # not held up by idp.example's queue
+
+            release.set()
+            assert all(r.status_code == 200 for r in await asyncio.gather(*slow, other))
+            with pytest.raises(httpx.ConnectError):
+                await http.post("https://down.example/token")
+
+            hosts = http.stats()["hosts"]
+            idp = hosts["idp.example"]
+            assert (idp["requests"], idp["errors"], idp["in_flight"], idp["waiting"]) == (5, 0, 0, 0)
+            assert idp["avg_wait_ms"] > 0  # three callers queued behind the cap
+            assert (hosts["down.example"]["requests"], hosts["down.example"]["errors"]) == (1, 1)
+        finally:
+            await http.aclose()
+    asyncio.run(run())
+
+def test_lazy_start_and_close():
+    async def run():
+        http = HttpClient(transport=httpx.MockTransport(lambda request: httpx.Response(204)))
+        assert http.stats()["open"] is False
+        assert (await http.get("https://idp.example/")).status_code == 204  # scripts never call start()
+        assert http.stats()["open"] is True
+        client = http._client
+        http.start()  # idempotent: keeps the pooled client
+        assert http._client is client
+
+        await http.aclose()
+        assert http.stats()["open"] is False
+        await http.aclose()  # closing twice is harmless
+        assert (await http.get("https://idp.example/")).status_code == 204  # reopens on demand
+        await http.aclose()
+    asyncio.run(run())
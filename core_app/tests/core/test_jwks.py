@@ -0,0 +1,71 @@
+import asyncio
+
+import jwt
+import pytest
+
+from app.core.config.settings import settings
+from app.core.http import HttpClient
+from app.core.security.jwks import RemoteJWKS, cache_seconds
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+    def __call__(self):
+        return self.now
+
+def _run(scenario):
+    # One loop and one pooled client per test; the pool must not cross event loops.
+    async def run():
+        http = HttpClient()
+        try:
+            return await scenario(http)
+        finally:
+            await http.aclose()
+    return asyncio.run(run())
+
+def test_cache_seconds_honours_and_clamps_max_age():
+    assert cache_seconds("public, max-age=19204, must-revalidate") == 19204
+    assert cache_seconds("max-age=1") == settings.JWKS_CACHE_MIN_SECONDS
+    assert cache_seconds(None) == settings.JWKS_CACHE_DEFAULT_SECONDS
+
+def test_keys_are_cached_until_max_age(jwks_stub):
+    clock = FakeClock()
+    token = jwks_stub.sign({"sub": "123"})
+
+    async def scenario(http):
+        store = RemoteJWKS(jwks_stub.url, http=http, clock=clock)
+
+        async def verify():
+            key = await store.get_key(jwt.get_unverified_header(token)["kid"])
+            return jwt.decode(token, key.key, algorithms=["RS256"])
+
+        assert (await verify())["sub"] == "123"
+        assert (await verify())["sub"] == "123"
+        assert jwks_stub.requests == 1
+        clock.now += 301
+        await verify()
+        assert jwks_stub.requests == 2
+        assert http.stats()["hosts"]["127.0.0.1"]["requests"] == 2
+
+    _run(scenario)
+
+def test_unknown_kid_triggers_one_coalesced_refetch(jwks_stub):
+    clock = FakeClock()
+
+    async def scenario(http):
+        store = RemoteJWKS(jwks_stub.url, http=http, clock=clock)
+        await store.refresh()
+        new_kid = jwks_stub.rotate(keep_old=True)
+        jwks_stub.delay = 0.2
+        clock.now += settings.JWKS_MIN_REFETCH_SECONDS
+
+        keys = await asyncio.gather(*(store.get_key(new_kid) for _ in range(20)))
+        assert all(k.key_id == new_kid for k in keys)
+        assert jwks_stub.requests == 2
+
+        # A bogus kid right after a fetch does not hit the network again.
+        with pytest.raises(jwt.PyJWKClientError):
+            await store.get_key("forged")
+        assert jwks_stub.requests == 2
+
+    _run(scenario)
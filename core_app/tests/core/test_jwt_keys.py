@@ -0,0 +1,55 @@
+import time
+
+import jwt
+import pytest
+
+from app.core.config.settings import settings
+from app.core.security import jwt as tokens
+from app.core.security.keys import Keyring, _key_from_private, generate_private_key
+
+@pytest.fixture
+def rotated_keyring(monkeypatch):
+    old = _key_from_private("EdDSA", "old", generate_private_key("EdDSA"))
+    new = _key_from_private("EdDSA", "new", generate_private_key("EdDSA"))
+    ring = Keyring([old, new], active_kid="old")
+    monkeypatch.setattr(tokens, "keyring", ring)
+    return ring, old, new
+
+def test_tokens_carry_kid_and_verify_after_rotation(monkeypatch, rotated_keyring):
+    ring, old, new = rotated_keyring
+    before = tokens.create_access_token("u1", ["user"], [])
+    assert jwt.get_unverified_header(before)["kid"] == "old"
+
+    monkeypatch.setattr(tokens, "keyring", Keyring([old, new], active_kid="new"))
+    after = tokens.create_access_token("u1", ["user"], [])
+    assert jwt.get_unverified_header(after)["kid"] == "new"
+    assert tokens.decode_token(before)["sub"] == tokens.decode_token(after)["sub"] == "u1"
+
+def test_unknown_kid_rejected(rotated_keyring):
+    ring, old, _ = rotated_keyring
+    forged = jwt.encode({"sub": "u1"}, old.signing_key, algorithm="EdDSA", headers={"kid": "nope"})
+    with pytest.raises(jwt.InvalidTokenError):
+        tokens.decode_token(forged)
+
+def test_jwks_publishes_only_public_keys(rotated_keyring):
+    ring, _, _ = rotated_keyring
+    body, etag = ring.jwks()
+    assert b'"d"' not in body and b'"kid":"old"' in body and etag
+
+def _legacy(iat, ttl=600):
+    return jwt.encode({"sub": "admin", "iat": iat, "exp": iat + ttl}, settings.JWT_SECRET, algorithm="HS256")
+
+def test_kidless_hs256_rejected_under_asymmetric_alg(monkeypatch, rotated_keyring):
+    monkeypatch.setattr(settings, "JWT_ALG", "EdDSA")
+    now = int(time.time())
+    with pytest.raises(jwt.InvalidTokenError):
+        tokens.decode_token(_legacy(now))
+
+    # Migration window: only pre-cutover tokens with a normal lifetime.
+    monkeypatch.setattr(settings, "JWT_ACCEPT_LEGACY_HS256", True)
+    monkeypatch.setattr(settings, "JWT_LEGACY_HS256_CUTOVER", now - 60)
+    assert tokens.decode_token(_legacy(now - 120))["sub"] == "admin"
+    with pytest.raises(jwt.InvalidTokenError):
+        tokens.decode_token(_legacy(now))
+    with pytest.raises(jwt.InvalidTokenError):
+        tokens.decode_token(_legacy(now - 120, ttl=365 * 86400))
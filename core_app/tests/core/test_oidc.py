@@ -0,0 +1,97 @@
+import asyncio
+import time
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+
+from app.core.http import HttpClient
+from app.core.security.oidc import OIDCError, OIDCProvider
+
+def _run(scenario):
+    async def run():
+        http = HttpClient()
+        try:
+            return await scenario(http)
+        finally:
+            await http.aclose()
+    return asyncio.run(run())
+
+def _claims(stub, **extra):
+    now = int(time.time())
+    return {"iss": stub.issuer, "aud": "client-1", "sub": "s1", "iat": now, "exp": now + 60, "nonce": "n1", **extra}
+
+def test_discovery_and_keys_are_fetched_once(jwks_stub):
+    async def scenario(http):
+        p = OIDCProvider("stub", issuer=jwks_stub.issuer, client_id="client-1", redirect_uri="https://app/cb", http=http)
+        url = urlparse(await p.authorization_url("st", "n1"))
+        assert url.path == "/authorize" and parse_qs(url.query)["nonce"] == ["n1"]
+        for _ in range(3):
+            claims = await p.verify_id_token(jwks_stub.sign(_claims(jwks_stub)), nonce="n1")
+            assert claims["sub"] == "s1"
+        assert jwks_stub.requests == 2  # one discovery document, one key set
+
+    _run(scenario)
+
+@pytest.mark.parametrize("bad", [{"aud": "someone-else"}, {"iss": "https://evil.example"}, {"nonce": "replayed"}])
+def test_rejects_foreign_tokens(jwks_stub, bad):
+    async def scenario(http):
+        p = OIDCProvider("stub", issuer=jwks_stub.issuer, client_id="client-1", redirect_uri="https://app/cb", http=http)
+        with pytest.raises(OIDCError):
+            await p.verify_id_token(jwks_stub.sign(_claims(jwks_stub, **bad)), nonce="n1")
+
+    _run(scenario)
+
+def test_algorithm_is_pinned_to_the_key_not_discovery(jwks_stub):
+    jwks_stub.algorithms = ["RS256", "PS256", "HS256"]  # what the issuer's metadata claims
+
+    async def scenario(http):
+        p = OIDCProvider("stub", issuer=jwks_stub.issuer, client_id="client-1", redirect_uri="https://app/cb", http=http)
+        with pytest.raises(OIDCError):
+            await p.verify_id_token(jwks_stub.sign(_claims(jwks_stub), algorithm="PS256"), nonce="n1")
+        configured = OIDCProvider("stub", issuer=jwks_stub.issuer, client_id="client-1", redirect_uri="https://app/cb",
+                                  algorithms=("PS256",), http=http)
+        claims = await configured.verify_id_token(jwks_stub.sign(_claims(jwks_stub), algorithm="PS256"), nonce="n1")
+        assert claims["sub"] == "s1"
+
+    _run(scenario)
+
+def test_callback_maps_unreachable_provider_to_503(monkeypatch):
+    from fastapi import HTTPException
+    from app.api.routers import oidc as oidc_router
+    from app.core.security.oidc import ProviderRegistry
+    from app.utils.oauth_state import make_oauth_state
+
+    async def scenario(http):
+        down = OIDCProvider("down", issuer="http://127.0.0.1:1", client_id="c", redirect_uri="https://app/cb", http=http)
+        monkeypatch.setattr(oidc_router, "providers", ProviderRegistry([down]))
+        state = make_oauth_state(nonce="n1", provider="down")
+        with pytest.raises(HTTPException) as e:
+            await oidc_router.oidc_callback("down", request=None, response=None, code="x", state=state)
+        assert e.value.status_code == 503
+
+    _run(scenario)
+
+def test_unreachable_jwks_is_an_outage_not_a_bad_token(jwks_stub, monkeypatch):
+    from fastapi import HTTPException
+    from app.api.routers import oidc as oidc_router
+    from app.core.security.oidc import OIDCUnavailable, ProviderRegistry
+    from app.utils.oauth_state import make_oauth_state
+
+    jwks_stub.jwks_uri = "http://127.0.0.1:1/certs"  # discovery answers, keys don't
+    token = jwks_stub.sign(_claims(jwks_stub))
+
+    async def scenario(http):
+        p = OIDCProvider("stub", issuer=jwks_stub.issuer, client_id="client-1", redirect_uri="https://app/cb", http=http)
+        with pytest.raises(OIDCUnavailable):
+            await p.verify_id_token(token, nonce="n1")
+
+        async def exchange_code(code):
+            return {"id_token": token}
+        p.exchange_code = exchange_code
+        monkeypatch.setattr(oidc_router, "providers", ProviderRegistry([p]))
+        with pytest.raises(HTTPException) as e:
+            await oidc_router.oidc_callback("stub", request=None, response=None, code="x",
+                                            state=make_oauth_state(nonce="n1", provider="stub"))
+        assert e.value.status_code == 503 and "127.0.0.1" not in str(e.value.detail)
+
+    _run(scenario)
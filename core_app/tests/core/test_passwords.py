@@ -0,0 +1,35 @@
+import asyncio
+
+import pytest
+
+from app.core.config.settings import settings
+from app.core.security import passwords
+from app.core.security.passwords import PasswordHasherBusy, hash_password_async, verify_password_async
+
+def test_async_hash_roundtrip(monkeypatch):
+    monkeypatch.setattr(settings, "PASSWORD_HASH_WORKERS", 0)
+
+    async def run():
+        hashed = await hash_password_async("correct horse")
+        return await verify_password_async("correct horse", hashed), await verify_password_async("nope", hashed)
+
+    assert asyncio.run(run()) == (True, False)
+
+def test_saturated_pool_fails_fast(monkeypatch):
+    monkeypatch.setattr(settings, "PASSWORD_HASH_WORKERS", 0)
+    monkeypatch.setattr(settings, "PASSWORD_HASH_MAX_PENDING", 0)
+    with pytest.raises(PasswordHasherBusy):
+        asyncio.run(hash_password_async("correct horse"))
+    assert passwords.pending_hash_jobs() == 0
+
+def test_needs_rehash_tracks_configured_cost(monkeypatch):
+    monkeypatch.setattr(settings, "BCRYPT_ROUNDS", 4)
+    hashed = passwords.hash_password("correct horse")
+    assert passwords.bcrypt_rounds_of(hashed) == 4
+    assert not passwords.needs_rehash(hashed)
+    monkeypatch.setattr(settings, "BCRYPT_ROUNDS", 5)
+    assert passwords.needs_rehash(hashed)
+
+def test_calibration_respects_floor():
+    # An impossible budget still yields the configured minimum cost.
+    assert passwords.calibrate_bcrypt_rounds(target_ms=0, min_rounds=4) == 4
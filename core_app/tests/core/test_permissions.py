@@ -0,0 +1,19 @@
+from app.core.security.permissions import PERMISSION_REGISTRY, decode_permissions, encode_permissions
+
+def test_roundtrip_with_unregistered_permission():
+    perms = list(PERMISSION_REGISTRY) + ["reports:export"]
+    claims = encode_permissions(perms)
+    assert claims["perms"] == ["reports:export"]
+    assert sorted(decode_permissions(claims)) == sorted(perms)
+
+def test_bitmap_stays_small():
+    claims = encode_permissions(PERMISSION_REGISTRY)
+    assert "perms" not in claims and len(claims["pb"]) <= 2
+
+def test_pre_bitmap_tokens_still_decode():
+    assert decode_permissions({"perms": ["users:read"]}) == ["users:read"]
+
+def test_bits_from_newer_registry_are_ignored():
+    claims = encode_permissions(["users:read"])
+    claims["pb"] = "AQEB"  # extra bytes beyond our registry
+    assert decode_permissions(claims) == ["users:read"]
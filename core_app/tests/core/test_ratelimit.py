@@ -0,0 +1,107 @@
+import asyncio
+import os
+
+import pytest
+from fastapi import HTTPException
+
+from app.core.ratelimit.limiter import Limit, MemoryRateLimiter, RateLimitBackend, RateLimiter, parse_limit
+from app.core.ratelimit.shared import SharedMemoryRateLimiter
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+    def __call__(self):
+        return self.now
+
+def test_parse_limit_units():
+    assert parse_limit("30/min") == (30, 60)
+    assert parse_limit("100/5m") == (100, 300)
+    assert parse_limit("5/300") == (5, 300)
+    with pytest.raises(ValueError):
+        Limit("five/min")
+
+def test_gcra_burst_then_steady_rate():
+    clock = FakeClock()
+    lim = MemoryRateLimiter(clock)
+    limit = Limit("5/300")
+    assert all(lim.check("ip:login", limit) == 0 for _ in range(5))
+    assert lim.check("ip:login", limit) == pytest.approx(60)
+    assert lim.check("other:login", limit) == 0  # keys are independent
+    clock.now += 60
+    assert lim.check("ip:login", limit) == 0
+    assert lim.check("ip:login", limit) > 0
+
+def test_idle_keys_are_evicted():
+    clock = FakeClock()
+    lim = MemoryRateLimiter(clock)
+    limit = Limit("10/1")
+    for i in range(1000):
+        lim.check(f"k{i}", limit)
+    assert lim.size() == 1000
+    clock.now += 2
+    lim.check("fresh", limit)
+    assert lim.size() == 1
+
+class CountingBackend(RateLimitBackend):
+    def __init__(self, clock):
+        self.inner = MemoryRateLimiter(clock)
+        self.calls = 0
+
+    async def acquire(self, key, limit, n=1):
+        self.calls += 1
+        return self.inner.check(key, limit, n)
+
+def test_front_reserves_locally_and_caches_refusals():
+    clock = FakeClock()
+    backend = CountingBackend(clock)
+    front = RateLimiter(backend, local_fraction=0.1, local_ttl=5, clock=clock)
+    limit = Limit("100/60")
+
+    async def run(hits):
+        refused = 0
+        for _ in range(hits):
+            try:
+                await front.hit("ip:scope", limit)
+            except HTTPException as e:
+                assert e.status_code == 429 and "Retry-After" in e.headers
+                refused += 1
+        return refused
+
+    assert asyncio.run(run(100)) == 0
+    assert backend.calls == 10  # batches of 10
+    assert asyncio.run(run(50)) == 50
+    assert backend.calls == 12  # one batch try, one single try, then refused locally
+
+def test_shared_memory_table_is_shared_between_instances():
+    name = f"core_app_rl_test_{os.getpid()}"
+    clock = FakeClock()
+    a = SharedMemoryRateLimiter(name, 1024, 16, clock=clock)
+    b = SharedMemoryRateLimiter(name, 1024, 16, clock=clock)
+    limit = Limit("3/60")
+    try:
+        assert a.check("ip:login", limit) == 0
+        assert b.check("ip:login", limit) == 0
+        assert a.check("ip:login", limit) == 0
+        assert b.check("ip:login", limit) == pytest.approx(20)
+        assert b.check("other:login", limit) == 0
+        clock.now += 61
+        assert a.check("ip:login", limit) == 0  # expired slot is reused
+    finally:
+        b.close()
+        a.unlink()
+
+def test_burst_is_the_gcra_tolerance():
+    clock = FakeClock()
+    lim = MemoryRateLimiter(clock)
+    limit = Limit("5/300")
+    limit.burst = 0.0  # no tolerance: strictly one request per interval
+    assert lim.check("k", limit) == 0
+    assert lim.check("k", limit) == pytest.approx(limit.interval)
+    clock.now += limit.interval
+    assert lim.check("k", limit) == 0
+
+def test_incomplete_backend_fails_at_construction():
+    class NoAcquire(RateLimitBackend):
+        pass
+    with pytest.raises(TypeError):
+        NoAcquire()
@@ -0,0 +1,25 @@
+import pytest
+from fastapi import HTTPException
+
+from app.api.deps.rbac import require_metrics_access
+from app.core.config.settings import settings
+from app.core.security.jwt import create_access_token
+
+def _status(token):
+    try:
+        require_metrics_access(token)
+    except HTTPException as e:
+        return e.status_code
+    return 200
+
+def test_metrics_need_the_shared_secret_or_metrics_read(monkeypatch):
+    monkeypatch.setattr(settings, "METRICS_TOKEN", "scrape-secret")
+    assert _status("scrape-secret") == 200
+    assert _status("scrape-secreT") == 401
+    assert _status(create_access_token("u1", ["user"], ["users:read"])) == 403
+    assert _status(create_access_token("u2", ["ops"], ["metrics:read"])) == 200
+
+def test_no_shared_secret_configured(monkeypatch):
+    monkeypatch.setattr(settings, "METRICS_TOKEN", None)
+    with pytest.raises(HTTPException):
+        require_metrics_access("")
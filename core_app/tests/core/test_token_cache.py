@@ -0,0 +1,19 @@
+import time
+
+from app.core.security.token_cache import VerifiedClaimsCache
+
+def test_hit_miss_and_lru_eviction():
+    cache = VerifiedClaimsCache(maxsize=2)
+    exp = int(time.time()) + 60
+    cache.put("a", exp, {"id": "a"})
+    cache.put("b", exp, {"id": "b"})
+    assert cache.get("a") == {"id": "a"}  # a is now most recent
+    cache.put("c", exp, {"id": "c"})      # evicts b
+    assert cache.get("b") is None
+    assert cache.stats()["hits"] == 1 and cache.stats()["misses"] == 1
+
+def test_expired_entry_is_never_served():
+    cache = VerifiedClaimsCache(maxsize=10)
+    cache.put("t", int(time.time()) - 1, {"id": "t"})
+    assert cache.get("t") is None
+    assert cache.stats()["size"] == 0
@@ -0,0 +1,43 @@
+import asyncio
+import time
+from datetime import datetime
+
+from app.core.security.jwt import create_access_token, decode_token
+from app.db.repositories import revocations
+from app.db.repositories.revocations import AccessTokenDenylist
+
+def _denylist(*docs):
+    deny = AccessTokenDenylist()
+    for doc in docs:
+        deny._apply(doc, deny._jtis, deny._users, deny._bloom)
+    return deny
+
+def test_revoked_jti():
+    deny = _denylist({"_id": "jti:abc", "kind": "jti", "expires_at": datetime.utcnow()})
+    assert deny.is_revoked({"sub": "u1", "jti": "abc", "iat": 100})
+    assert not deny.is_revoked({"sub": "u1", "jti": "abd", "iat": 100})
+
+def test_user_watermark_only_hits_older_tokens():
+    deny = _denylist(
+        {"_id": "user:u1", "kind": "user", "not_before": 200},
+        {"_id": "user:u1", "kind": "user", "not_before": 150},  # a stale poll never lowers it
+    )
+    assert deny.is_revoked({"sub": "u1", "jti": "x", "iat": 199})
+    assert not deny.is_revoked({"sub": "u1", "jti": "y", "iat": 200})
+    assert not deny.is_revoked({"sub": "u2", "jti": "z", "iat": 1})
+
+class FakeRevocations:
+    def get_motor_collection(self):
+        return self
+
+    async def update_one(self, query, update, upsert=False):
+        pass
+
+def test_token_issued_right_after_user_revocation_is_valid(monkeypatch):
+    monkeypatch.setattr(revocations, "TokenRevocation", FakeRevocations())
+    deny = AccessTokenDenylist()
+    before = decode_token(create_access_token("u1", ["user"], []))
+    time.sleep(0.002)  # iat has millisecond resolution
+    asyncio.run(deny.revoke_user("u1"))
+    after = decode_token(create_access_token("u1", ["user"], []))
+    assert deny.is_revoked(before) and not deny.is_revoked(after)
@@ -0,0 +1,130 @@
+import asyncio
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+from app.core.config.settings import settings
+from app.db.repositories import email_outbox as outbox_mod
+from app.db.repositories.email_outbox import EmailOutboxRepo
+
+class FakeOutbox:
+    """Just enough of the email_outbox collection for claim/mark_sent/retry."""
+    def __init__(self, docs):
+        self.docs = [dict(d) for d in docs]
+
+    def get_motor_collection(self):
+        return self
+
+    OPS = {
+        "$in": lambda have, v: have in v,
+        "$lte": lambda have, v: have <= v,
+        "$lt": lambda have, v: have < v,
+        "$gte": lambda have, v: have >= v,
+    }
+
+    @classmethod
+    def _ok(cls, doc, key, want):
+        if isinstance(want, dict):
+            return all(cls.OPS[op](doc.get(key), v) for op, v in want.items())
+        return doc.get(key) == want
+
+    def _matches(self, query):
+        return [d for d in self.docs if all(self._ok(d, k, v) for k, v in query.items())]
+
+    async def find_one_and_update(self, query, update, sort=None, return_document=None):
+        docs = sorted(self._matches(query), key=lambda d: d[sort[0][0]])
+        if not docs:
+            return None
+        doc = docs[0]
+        doc.update(update["$set"])
+        for k, v in update.get("$inc", {}).items():
+            doc[k] = doc.get(k, 0) + v
+        return dict(doc)
+
+    async def update_one(self, query, update):
+        docs = self._matches(query)
+        for d in docs[:1]:
+            d.update(update["$set"])
+        return SimpleNamespace(matched_count=len(docs[:1]))
+
+    async def update_many(self, query, update):
+        docs = self._matches(query)
+        for d in docs:
+            d.update(update["$set"])
+        return SimpleNamespace(modified_count=len(docs))
+
+def _repo(monkeypatch, docs):
+    coll = FakeOutbox(docs)
+    monkeypatch.setattr(outbox_mod, "EmailOutbox", coll)
+    return EmailOutboxRepo(), coll
+
+def _msg(i, due):
+    return {"_id": i, "status": "pending", "attempts": 0, "lease_owner": None, "next_attempt_at": due}
+
+def test_claims_oldest_due_message_under_a_lease(monkeypatch):
+    now = datetime.utcnow()
+    repo, coll = _repo(monkeypatch, [_msg(1, now - timedelta(seconds=1)), _msg(2, now - timedelta(seconds=5)),
+                                     _msg(3, now + timedelta(hours=1))])
+
+    async def run():
+        first = await repo.claim("w1")
+        second = await repo.claim("w2")
+        assert (first["_id"], second["_id"]) == (2, 1)
+        assert first["status"] == "sending" and first["attempts"] == 1
+        assert first["next_attempt_at"] > now + timedelta(seconds=settings.EMAIL_OUTBOX_LEASE_SECONDS - 5)
+        assert await repo.claim("w3") is None  # 3 not due, 1 and 2 leased
+
+        await repo.mark_sent(first, "w2")      # not the lease owner: no effect
+        assert coll.docs[1]["status"] == "sending"
+        await repo.mark_sent(first, "w1")
+        assert coll.docs[1]["status"] == "sent" and coll.docs[1]["purge_at"] > now
+    asyncio.run(run())
+
+def test_expired_lease_is_reclaimed_and_stale_owner_cannot_finish(monkeypatch):
+    now = datetime.utcnow()
+    crashed = {**_msg(1, now - timedelta(seconds=1)), "status": "sending", "lease_owner": "dead", "attempts": 1}
+    repo, coll = _repo(monkeypatch, [crashed])
+
+    async def run():
+        msg = await repo.claim("w1")
+        assert msg["lease_owner"] == "w1" and msg["attempts"] == 2
+        await repo.retry(crashed, "dead", "late")  # the old owner's outcome is ignored
+        assert coll.docs[0]["lease_owner"] == "w1"
+    asyncio.run(run())
+
+def test_retry_backs_off_then_gives_up(monkeypatch):
+    monkeypatch.setattr(settings, "EMAIL_SEND_RETRIES", 2)
+    monkeypatch.setattr(settings, "EMAIL_RETRY_BASE_SECONDS", 10)
+    now = datetime.utcnow()
+    repo, coll = _repo(monkeypatch, [_msg(1, now)])
+
+    async def run():
+        delays = []
+        for _ in range(3):
+            coll.docs[0]["next_attempt_at"] = datetime.utcnow()
+            msg = await repo.claim("w1")
+            await repo.retry(msg, "w1", "smtp down")
+            delays.append(coll.docs[0].get("next_attempt_at") - datetime.utcnow())
+        return delays
+    delays = asyncio.run(run())
+
+    doc = coll.docs[0]
+    assert timedelta(seconds=9) < delays[0] <= timedelta(seconds=10)
+    assert timedelta(seconds=19) < delays[1] <= timedelta(seconds=20)
+    assert doc["status"] == "failed" and doc["attempts"] == 3 and doc["last_error"] == "smtp down"
+
+def test_message_whose_final_lease_expires_is_failed_not_reclaimed(monkeypatch):
+    monkeypatch.setattr(settings, "EMAIL_SEND_RETRIES", 1)
+    now = datetime.utcnow()
+    # Its worker crashed while sending on the last allowed attempt, before recording anything.
+    crashed = {**_msg(1, now - timedelta(seconds=1)), "status": "sending", "lease_owner": "dead", "attempts": 2}
+    retryable = {**_msg(2, now - timedelta(seconds=1)), "status": "sending", "lease_owner": "dead", "attempts": 1}
+    repo, coll = _repo(monkeypatch, [crashed, retryable])
+
+    async def run():
+        assert (await repo.claim("w1"))["_id"] == 2
+        assert await repo.claim("w1") is None
+        assert await repo.fail_abandoned() == 1
+    asyncio.run(run())
+
+    assert coll.docs[0]["status"] == "failed" and coll.docs[0]["lease_owner"] is None
+    assert coll.docs[0]["purge_at"] > now and coll.docs[1]["status"] == "sending"
@@ -0,0 +1,24 @@
+import asyncio
+
+from app.db.repositories.known_emails import KnownEmails
+from app.utils.bloom import BloomFilter
+
+def test_unloaded_filter_never_screens_out():
+    known = KnownEmails()
+    assert known.might_exist("nobody@example.com")
+
+def test_screens_unknown_addresses_case_insensitively():
+    known = KnownEmails()
+    known._bloom = BloomFilter(100, 0.001)
+    known.add("Alice@Example.com")
+    assert known.might_exist("alice@example.com ")
+    assert not known.might_exist("mallory@example.com")
+    assert known.stats()["skipped_lookups"] == 1
+
+def test_absent_delay_tracks_real_lookups():
+    known = KnownEmails()
+    for _ in range(200):
+        known.observe(0.010)
+    assert abs(known.lookup_seconds - 0.010) < 0.001
+    known.lookup_seconds = 0.0
+    asyncio.run(known.absent_delay())
@@ -0,0 +1,86 @@
+import asyncio
+
+from app.core.config.settings import settings
+from app.db.repositories.login_throttle import LoginThrottle
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1_700_000_000.0
+    def __call__(self):
+        return self.now
+
+def _fail(throttle, key, times):
+    for _ in range(times):
+        assert throttle.acquire(key) == 0
+        throttle.release(key, True)
+
+def test_exponential_lockout_and_reset_on_success():
+    clock = FakeClock()
+    throttle = LoginThrottle(clock)
+    key = throttle.key(" Alice@Example.com ")
+    assert key == throttle.key("alice@example.com")
+
+    _fail(throttle, key, settings.LOGIN_LOCKOUT_THRESHOLD)
+    assert throttle.acquire(key) == settings.LOGIN_LOCKOUT_BASE_SECONDS
+    clock.now += settings.LOGIN_LOCKOUT_BASE_SECONDS
+    _fail(throttle, key, 1)
+    assert throttle.acquire(key) == 2 * settings.LOGIN_LOCKOUT_BASE_SECONDS
+
+    clock.now += 2 * settings.LOGIN_LOCKOUT_BASE_SECONDS
+    assert throttle.acquire(key) == 0
+    throttle.release(key, False)
+    assert throttle.stats()["accounts"] == 0
+
+def test_parallel_attempts_count_towards_threshold():
+    throttle = LoginThrottle(FakeClock())
+    key = throttle.key("bob@example.com")
+    _fail(throttle, key, settings.LOGIN_LOCKOUT_THRESHOLD - 1)
+    assert throttle.acquire(key) == 0   # one guess in flight
+    assert throttle.acquire(key) > 0    # a second parallel guess never reaches bcrypt
+    throttle.release(key, None)         # undecided (e.g. hasher busy) is not a failure
+    assert throttle.acquire(key) == 0
+
+class SharedFailures:
+    """The login_failures collection two workers flush to and sync from."""
+    def __init__(self):
+        self.docs = {}
+
+    async def bulk_write(self, ops, ordered=True):
+        for op in ops:
+            doc = self.docs.setdefault(op._filter["_id"], {"_id": op._filter["_id"], "failures": 0, "locked_until": 0.0})
+            update = op._doc
+            doc["failures"] += update.get("$inc", {}).get("failures", 0)
+            for k, v in update.get("$max", {}).items():
+                doc[k] = max(doc.get(k, v), v)
+            doc.update(update["$set"])
+
+    def find(self, query):
+        (field, cond), = query.items()
+        docs = [dict(d) for d in self.docs.values() if d[field] >= next(iter(cond.values()))]
+
+        async def gen():
+            for d in docs:
+                yield d
+        return gen()
+
+def test_success_on_one_worker_resets_the_other():
+    clock, shared = FakeClock(), SharedFailures()
+    a, b = LoginThrottle(clock), LoginThrottle(clock)
+    a._coll = b._coll = lambda: shared
+    key = a.key("carol@example.com")
+
+    async def run():
+        await b.load()
+        _fail(a, key, settings.LOGIN_LOCKOUT_THRESHOLD - 1)
+        await a.flush()
+        await b.sync()
+        assert b._state[key][0] == settings.LOGIN_LOCKOUT_THRESHOLD - 1
+
+        assert a.acquire(key) == 0
+        a.release(key, False)
+        await a.flush()
+        await b.sync()
+        assert key not in b._state
+        _fail(b, key, 1)                # would have tripped the lockout with the stale count
+        assert b.acquire(key) == 0
+    asyncio.run(run())
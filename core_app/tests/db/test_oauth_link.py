@@ -0,0 +1,79 @@
+import asyncio
+from types import SimpleNamespace
+
+from app.db.repositories import loader as loader_mod
+from app.db.repositories import oauth_accounts as oauth_mod
+from app.db.repositories.loader import UserLoader
+from app.db.repositories.oauth_accounts import OAuthAccountsRepo
+
+class FakeCollection:
+    """Just enough of a Motor collection for equality filters and $set/$setOnInsert upserts."""
+    def __init__(self, docs=()):
+        self.docs = [dict(d) for d in docs]
+        self.ops = 0
+
+    def get_motor_collection(self):
+        return self
+
+    def _match(self, query):
+        return next((d for d in self.docs if all(d.get(k) == v for k, v in query.items())), None)
+
+    async def find_one(self, query, projection=None):
+        self.ops += 1
+        return self._match(query)
+
+    async def find_one_and_update(self, query, update, upsert=False, projection=None, return_document=None):
+        self.ops += 1
+        doc = self._match(query)
+        if doc is None:
+            if not upsert:
+                return None
+            doc = {"_id": len(self.docs), **query, **update.get("$setOnInsert", {})}
+            self.docs.append(doc)
+        doc.update(update.get("$set", {}))
+        return doc
+
+    def find(self, query, projection):
+        self.ops += 1
+        wanted = query["_id"]["$in"]
+
+        async def to_list(_length):
+            return [d for d in self.docs if d["_id"] in wanted]
+
+        return SimpleNamespace(to_list=to_list)
+
+def _setup(monkeypatch, users=()):
+    users, links = FakeCollection(users), FakeCollection()
+    monkeypatch.setattr(oauth_mod, "User", users)
+    monkeypatch.setattr(loader_mod, "User", users)
+    monkeypatch.setattr(oauth_mod, "OAuthAccount", links)
+    monkeypatch.setattr(oauth_mod, "current_user_loader", UserLoader)
+    return users, links
+
+def _login(email="ann@example.com", allow_signup=True):
+    return asyncio.run(OAuthAccountsRepo().link_or_create_user(
+        provider="google", provider_sub="sub-1", email=email, name="Ann", picture=None, allow_signup=allow_signup,
+    ))
+
+def test_first_login_creates_a_verified_passwordless_user_then_reuses_the_link(monkeypatch):
+    users, links = _setup(monkeypatch)
+    user = _login()
+    assert user.email == "ann@example.com" and user.hashed_password is None
+    assert user.email_verified_at is not None
+    assert users.ops + links.ops == 3
+    assert links.docs[0]["user_id"] == users.docs[0]["_id"]
+
+    users.ops = links.ops = 0
+    again = _login()
+    assert again.id == user.id
+    assert users.ops + links.ops == 2
+    assert len(users.docs) == 1 and len(links.docs) == 1
+
+def test_links_existing_account_by_email_or_refuses_signup(monkeypatch):
+    users, links = _setup(monkeypatch, [{"_id": "u1", "email": "ann@example.com", "full_name": "Ann", "hashed_password": "h"}])
+    user = _login()
+    assert user.id == "u1" and user.hashed_password == "h"
+    assert links.docs[0]["user_id"] == "u1"
+
+    _setup(monkeypatch)
+    assert _login(allow_signup=False) is None
@@ -0,0 +1,26 @@
+from pymongo import monitoring
+
+from app.db.pool_metrics import MongoPoolMetrics
+
+ADDR = ("db", 27017)
+
+def test_pool_metrics_tracks_checkouts_and_waits():
+    m = MongoPoolMetrics()
+    m.pool_created(monitoring.PoolCreatedEvent(ADDR, {}))
+    for conn_id in (1, 2):
+        m.connection_created(monitoring.ConnectionCreatedEvent(ADDR, conn_id))
+        m.connection_check_out_started(monitoring.ConnectionCheckOutStartedEvent(ADDR))
+        m.connection_checked_out(monitoring.ConnectionCheckedOutEvent(ADDR, conn_id, 0.010 * conn_id))
+    m.connection_check_out_started(monitoring.ConnectionCheckOutStartedEvent(ADDR))
+
+    p = m.snapshot(max_pool_size=2)["db:27017"]
+    assert (p["open"], p["in_use"], p["waiting"], p["saturation"]) == (2, 2, 1, 1.0)
+    assert p["checkout_wait_ms_avg"] == 15.0 and p["checkout_wait_ms_max"] == 20.0
+
+    m.connection_check_out_failed(monitoring.ConnectionCheckOutFailedEvent(ADDR, "timeout", 0.5))
+    m.connection_checked_in(monitoring.ConnectionCheckedInEvent(ADDR, 1))
+    p = m.snapshot(max_pool_size=2)["db:27017"]
+    assert (p["in_use"], p["waiting"], p["checkout_failures"]) == (1, 0, 1)
+
+    m.pool_closed(monitoring.PoolClosedEvent(ADDR))
+    assert m.snapshot(max_pool_size=2) == {}
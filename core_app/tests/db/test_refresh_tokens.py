@@ -0,0 +1,265 @@
+import asyncio
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+import pytest
+
+from app.core.config.settings import settings
+from app.db.repositories import refresh_tokens as rt_mod
+from app.db.repositories.refresh_tokens import RefreshTokensRepo
+
+def _matches(doc, query):
+    for key, want in query.items():
+        if key == "$or":
+            if not any(_matches(doc, q) for q in want):
+                return False
+            continue
+        have = doc.get(key)
+        if isinstance(want, dict):
+            for op, v in want.items():
+                ok = {
+                    "$gt": lambda: have is not None and have > v,
+                    "$lt": lambda: have is not None and have < v,
+                    "$in": lambda: have in v,
+                    "$ne": lambda: have != v,
+                }[op]()
+                if not ok:
+                    return False
+        elif have != want:
+            return False
+    return True
+
+class FakeCursor:
+    def __init__(self, docs):
+        self.docs = docs
+
+    def sort(self, keys):
+        for key, direction in reversed(keys):
+            self.docs.sort(key=lambda d: d[key], reverse=direction < 0)
+        return self
+
+    def limit(self, n):
+        self.docs = self.docs[:n]
+        return self
+
+    async def to_list(self, _length):
+        return self.docs
+
+    def __aiter__(self):
+        async def gen():
+            for d in self.docs:
+                yield d
+        return gen()
+
+class FakeCollection:
+    def __init__(self):
+        self.docs: dict = {}
+        self.database = {}
+
+    def find(self, query, projection=None):
+        return FakeCursor([dict(d) for d in self.docs.values() if _matches(d, query)])
+
+    async def find_one(self, query, projection=None):
+        return next((dict(d) for d in self.docs.values() if _matches(d, query)), None)
+
+    async def find_one_and_update(self, query, update, upsert=False, projection=None, return_document=None):
+        await asyncio.sleep(0)  # let concurrent callers interleave
+        doc = next((d for d in self.docs.values() if _matches(d, query)), None)
+        if doc is None:
+            return None
+        before = dict(doc)
+        doc.update(update["$set"])
+        return before
+
+    async def update_one(self, query, update, upsert=False):
+        doc = next((d for d in self.docs.values() if _matches(d, query)), None)
+        if doc is None and upsert:
+            doc = self.docs.setdefault(query["_id"], dict(query))
+            doc.update(update.get("$setOnInsert", {}))
+        elif doc is not None:
+            doc.update(update.get("$set", {}))
+        n = int(doc is not None)
+        return SimpleNamespace(matched_count=n, modified_count=n)
+
+    async def update_many(self, query, update):
+        hits = [d for d in self.docs.values() if _matches(d, query)]
+        for d in hits:
+            d.update(update["$set"])
+        return SimpleNamespace(modified_count=len(hits))
+
+class FakeRefreshToken:
+    """Stands in for the Beanie model: same fields, documents kept in one FakeCollection."""
+    coll: FakeCollection
+
+    def __init__(self, id, user_id, token_hash, expires_at, ua_id=None, ip=None, family=None):
+        self.id, self.user_id, self.token_hash, self.ua_id, self.ip = id, user_id, token_hash, ua_id, ip
+        self.expires_at = expires_at.replace(tzinfo=None)
+        self.family = family
+        self.revoked_at = self.replaced_by = None
+        self.created_at = datetime.utcnow()
+        self._user_agent = None
+
+    @classmethod
+    def get_motor_collection(cls):
+        return cls.coll
+
+    @classmethod
+    async def find_one(cls, query):
+        doc = await cls.coll.find_one(query)
+        return SimpleNamespace(**doc) if doc else None
+
+    async def insert(self):
+        doc = {k: v for k, v in vars(self).items() if not k.startswith("_")}
+        doc["_id"] = doc.pop("id")
+        self.coll.docs[doc["_id"]] = doc
+
+@pytest.fixture
+def tokens(monkeypatch):
+    coll = FakeCollection()
+    coll.database[rt_mod.USER_AGENTS_COLLECTION] = FakeCollection()
+    monkeypatch.setattr(FakeRefreshToken, "coll", coll, raising=False)
+    monkeypatch.setattr(rt_mod, "RefreshToken", FakeRefreshToken)
+    monkeypatch.setattr(rt_mod, "user_agents", rt_mod._UserAgentCache())
+    return coll
+
+def _exp(days=7):
+    return datetime.utcnow() + timedelta(days=days)
+
+def _build(jti, user_id="u1", raw=None, ua="Firefox"):
+    return RefreshTokensRepo().build(jti, user_id, raw or f"raw-{jti}", _exp(), ua, "10.0.0.1")
+
+def test_rotate_replaces_token_within_its_family(tokens):
+    repo = RefreshTokensRepo()
+
+    async def run():
+        await repo.store("a", "u1", "raw-a", _exp(), "Firefox", "10.0.0.1")
+        assert await repo.rotate("a", "raw-a", _build("b"))
+        assert await repo.rotate("b", "raw-b", _build("c"))
+        assert not await repo.rotate("c", "wrong-raw", _build("x"))  # hash must match
+    asyncio.run(run())
+
+    assert tokens.docs["a"]["replaced_by"] == "b" and tokens.docs["a"]["revoked_at"]
+    assert tokens.docs["c"]["family"] == tokens.docs["b"]["family"] == "a"
+    assert tokens.docs["c"]["revoked_at"] is None and "x" not in tokens.docs
+
+def test_reusing_a_rotated_token_revokes_its_family(tokens, monkeypatch):
+    monkeypatch.setattr(settings, "REFRESH_REUSE_GRACE_SECONDS", 0)
+    repo = RefreshTokensRepo()
+
+    async def run():
+        await repo.store("a", "u1", "raw-a", _exp(), None, None)
+        await repo.store("other", "u1", "raw-other", _exp(), None, None)  # another device
+        assert await repo.rotate("a", "raw-a", _build("b"))
+        assert not await repo.rotate("a", "raw-a", _build("evil"))
+    asyncio.run(run())
+
+    assert tokens.docs["b"]["revoked_at"] is not None
+    assert tokens.docs["other"]["revoked_at"] is None
+    assert "evil" not in tokens.docs
+
+def test_concurrent_rotations_have_one_winner(tokens):
+    repo = RefreshTokensRepo()
+
+    async def run():
+        await repo.store("a", "u1", "raw-a", _exp(), None, None)
+        return await asyncio.gather(*(repo.rotate("a", "raw-a", _build(f"n{i}")) for i in range(5)))
+    results = asyncio.run(run())
+
+    assert sorted(results) == [False] * 4 + [True]
+    winner = tokens.docs["a"]["replaced_by"]
+    live = [jti for jti, d in tokens.docs.items() if d["revoked_at"] is None]
+    assert live == [winner]  # losers inside the grace window don't revoke the winner
+
+def _seed_sessions(tokens, user_id, n):
+    # Mongo keeps millisecond datetimes; two pairs share an expiry to exercise the _id tie-break.
+    base = datetime.utcnow().replace(microsecond=0) + timedelta(days=3)
+    for i in range(n):
+        tokens.docs[f"{user_id}-{i}"] = {
+            "_id": f"{user_id}-{i}", "user_id": user_id, "revoked_at": None, "ua_id": None, "ip": None,
+            "created_at": base, "expires_at": base + timedelta(seconds=i // 2),
+        }
+
+def test_session_pages_walk_every_session_once(tokens):
+    _seed_sessions(tokens, "u1", 5)
+    _seed_sessions(tokens, "u2", 2)
+    repo = RefreshTokensRepo()
+
+    async def run():
+        pages, cursor = [], None
+        while True:
+            page, cursor = await repo.list_active_for_user("u1", limit=2, cursor=cursor)
+            pages.append([s["jti"] for s in page])
+            if cursor is None:
+                return pages
+    pages = asyncio.run(run())
+
+    assert pages == [["u1-4", "u1-3"], ["u1-2", "u1-1"], ["u1-0"]]
+
+def test_exact_page_has_no_next_cursor(tokens):
+    _seed_sessions(tokens, "u1", 2)
+    page, cursor = asyncio.run(RefreshTokensRepo().list_active_for_user("u1", limit=2))
+    assert len(page) == 2 and cursor is None
+
+def test_cursor_round_trip_and_malformed_cursors():
+    exp = datetime(2030, 1, 2, 3, 4, 5, 678000)
+    assert rt_mod._decode_cursor(rt_mod._encode_cursor({"expires_at": exp, "_id": "j:1"})) == (exp, "j:1")
+    for bad in ("", "!!!", "bm9jb2xvbg", "YWJjOmRlZg"):  # not base64 / no separator / non-numeric expiry
+        with pytest.raises(ValueError):
+            rt_mod._decode_cursor(bad)
+
+def test_sessions_endpoint_rejects_bad_cursor_and_foreign_jti(tokens):
+    from fastapi import HTTPException
+    from app.api.routers.users import my_sessions, revoke_my_session
+
+    _seed_sessions(tokens, "u1", 1)
+    _seed_sessions(tokens, "u2", 1)
+
+    async def run():
+        with pytest.raises(HTTPException) as bad:
+            await my_sessions(user={"id": "u1"}, limit=10, cursor="!!!")
+        assert bad.value.status_code == 400
+        with pytest.raises(HTTPException) as foreign:
+            await revoke_my_session("u2-0", user={"id": "u1"})
+        assert foreign.value.status_code == 404
+        await revoke_my_session("u1-0", user={"id": "u1"})
+    asyncio.run(run())
+
+    assert tokens.docs["u2-0"]["revoked_at"] is None
+    assert tokens.docs["u1-0"]["revoked_at"] is not None
+
+def test_store_get_valid_and_list_resolve_interned_user_agent(tokens, monkeypatch):
+    repo = RefreshTokensRepo()
+    agents = tokens.database[rt_mod.USER_AGENTS_COLLECTION]
+    ua = "Mozilla/5.0 " + "x" * 400
+
+    async def run():
+        await repo.store("a", "u1", "raw-a", _exp(), ua, "10.0.0.1")
+        await repo.store("b", "u1", "raw-b", _exp(), ua, "10.0.0.2")
+        rec = await repo.get_valid("a")
+        assert repo.matches(rec, "raw-a") and not repo.matches(rec, "raw-b")
+        # A fresh process resolves the digest from user_agents rather than its own cache.
+        monkeypatch.setattr(rt_mod, "user_agents", rt_mod._UserAgentCache())
+        return await repo.list_active_for_user("u1", limit=10)
+    sessions, _ = asyncio.run(run())
+
+    doc = tokens.docs["a"]
+    assert "jti" not in doc and isinstance(doc["token_hash"], bytes) and len(doc["token_hash"]) == 32
+    assert doc["ua_id"] == rt_mod.ua_digest(ua[:rt_mod.USER_AGENT_MAX_LEN]) and "user_agent" not in doc
+    assert len(agents.docs) == 1  # interned once for both tokens
+    assert {s["user_agent"] for s in sessions} == {ua[:rt_mod.USER_AGENT_MAX_LEN]}
+    assert {s["jti"] for s in sessions} == {"a", "b"}
+
+def test_migration_converts_legacy_documents():
+    from scripts.migrate_refresh_tokens import _convert
+
+    legacy = {
+        "_id": "65f0c0ffee", "jti": "j1", "user_id": "u1", "token_hash": "ab" * 32,
+        "user_agent": "Firefox", "ip": "10.0.0.1", "expires_at": _exp(), "revoked_at": None,
+        "created_at": datetime.utcnow(),
+    }
+    new, ua = _convert(legacy)
+    assert new["_id"] == "j1" and "jti" not in new and "user_agent" not in new
+    assert new["token_hash"] == bytes.fromhex("ab" * 32)
+    assert ua == (rt_mod.ua_digest("Firefox"), "Firefox") and new["ua_id"] == ua[0]
+    assert _convert({**legacy, "token_hash": new["token_hash"], "user_agent": None})[0]["token_hash"] == new["token_hash"]
+    assert _convert({**legacy, "user_agent": ""})[1] is None
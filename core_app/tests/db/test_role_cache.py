@@ -0,0 +1,58 @@
+import asyncio
+
+from pymongo.errors import AutoReconnect, OperationFailure
+
+from app.db.repositories import roles as roles_mod
+from app.db.repositories.roles import RolePermissionsCache
+
+def test_resolve_unions_roles_without_io():
+    cache = RolePermissionsCache()
+    cache._perms = {"admin": frozenset({"roles:manage", "users:read"}), "user": frozenset({"users:read"})}
+    assert cache.resolve(["user", "admin"]) == {"roles:manage", "users:read"}
+    assert cache.resolve(["ghost"]) == frozenset()
+    assert cache.resolve(["admin", "user"]) is cache.resolve(["user", "admin"])
+
+class FlakyRoles:
+    """watch(): a failover error, then a stream with one change, then no change-stream support."""
+    def __init__(self):
+        self.opened = 0
+
+    def get_motor_collection(self):
+        return self
+
+    def watch(self):
+        self.opened += 1
+        return FakeStream([AutoReconnect("primary stepped down"), None, OperationFailure("standalone", code=40573)][self.opened - 1])
+
+class FakeStream:
+    def __init__(self, error):
+        self.error = error
+
+    async def __aenter__(self):
+        if self.error:
+            raise self.error
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    def __aiter__(self):
+        async def gen():
+            yield {"operationType": "update"}
+        return gen()
+
+def test_watch_survives_transient_errors_and_stops_when_unsupported(monkeypatch):
+    roles = FlakyRoles()
+    monkeypatch.setattr(roles_mod, "Role", roles)
+    monkeypatch.setattr(roles_mod, "WATCH_RETRY_BASE_SECONDS", 0)
+    cache = RolePermissionsCache()
+    loads = []
+
+    async def load():
+        loads.append(roles.opened)
+    cache.load = load
+
+    asyncio.run(asyncio.wait_for(cache._watch(), 1))
+    assert roles.opened == 3
+    # catch-up reload after the failover, the change event, catch-up after the stream closed
+    assert loads == [1, 2, 2]
@@ -0,0 +1,37 @@
+import asyncio
+from types import SimpleNamespace
+
+from app.db.repositories import loader as loader_mod
+from app.db.repositories.loader import UserLoader
+
+class FakeUsers:
+    def __init__(self, ids):
+        self.ids = ids
+        self.queries = []
+
+    def get_motor_collection(self):
+        return self
+
+    def find(self, query, projection):
+        wanted = query["_id"]["$in"]
+        self.queries.append(list(wanted))
+
+        async def to_list(_length):
+            return [{"_id": i, "email": f"{i}@example.com"} for i in wanted if i in self.ids]
+
+        return SimpleNamespace(to_list=to_list)
+
+def test_concurrent_loads_batch_into_one_query(monkeypatch):
+    fake = FakeUsers({"a", "b"})
+    monkeypatch.setattr(loader_mod, "User", fake)
+
+    async def run():
+        loader = UserLoader()
+        a, b, missing, a_again = await asyncio.gather(
+            loader.load("a"), loader.load("b"), loader.load("zzz"), loader.load("a")
+        )
+        again = await loader.load("b")  # served from the identity map
+        return a.id, b.id, missing, a_again.id, again.id
+
+    assert asyncio.run(run()) == ("a", "b", None, "a", "b")
+    assert fake.queries == [["a", "b", "zzz"]]
@@ -0,0 +1,74 @@
+import asyncio
+import uuid
+from types import SimpleNamespace
+
+from app.core.config.settings import settings
+from app.db.repositories import loader as loader_mod
+from app.db.repositories import users as users_mod
+from app.db.repositories.users import UsersRepo
+
+class FakeUsers:
+    """Motor-ish users collection matching `_id` filters the way Mongo does, `$in` included."""
+    def __init__(self, docs):
+        self.docs = [dict(d) for d in docs]
+
+    def get_motor_collection(self):
+        return self
+
+    def _match(self, query):
+        def ok(doc, key, want):
+            if isinstance(want, dict) and "$in" in want:
+                return doc.get(key) in want["$in"]
+            return doc.get(key) == want
+        return next((d for d in self.docs if all(ok(d, k, v) for k, v in query.items())), None)
+
+    def _apply(self, doc, update):
+        doc.update(update.get("$set", {}))
+        for k, v in update.get("$addToSet", {}).items():
+            if v not in doc.setdefault(k, []):
+                doc[k].append(v)
+        for k, v in update.get("$pull", {}).items():
+            doc[k] = [x for x in doc.get(k, []) if x != v]
+
+    async def find_one(self, query, projection=None):
+        return self._match(query)
+
+    async def update_one(self, query, update):
+        doc = self._match(query)
+        if doc is not None:
+            self._apply(doc, update)
+        n = int(doc is not None)
+        return SimpleNamespace(matched_count=n, modified_count=n)
+
+    async def find_one_and_update(self, query, update, projection=None, return_document=None):
+        doc = self._match(query)
+        if doc is not None:
+            self._apply(doc, update)
+        return doc
+
+def test_updates_reach_legacy_string_ids_during_binary_migration(monkeypatch):
+    monkeypatch.setattr(settings, "ID_STORAGE", "binary")
+    monkeypatch.setattr(settings, "ID_READ_LEGACY", True)
+    uid = str(uuid.uuid4())
+    users = FakeUsers([{"_id": uid, "email": "ann@example.com", "full_name": "Ann",
+                        "hashed_password": "old", "email_verified_at": None, "roles": ["user"]}])
+    monkeypatch.setattr(users_mod, "User", users)
+    monkeypatch.setattr(loader_mod, "User", users)
+
+    async def run():
+        repo = UsersRepo()
+        assert await repo.mark_email_verified(uid)
+        assert await repo.mark_email_verified(uid)  # already verified still counts as found
+        assert await repo.set_password_hash(uid, "new")
+        assert await repo.add_role(uid, "admin") == ["user", "admin"]
+        assert await repo.add_role(uid, "admin") == ["user", "admin"]
+        assert await repo.remove_role(uid, "user") == ["admin"]
+        missing = str(uuid.uuid4())
+        assert not await repo.mark_email_verified(missing)
+        assert await repo.add_role(missing, "admin") is None
+    asyncio.run(run())
+
+    assert len(users.docs) == 1  # updated in place: no binary-_id duplicate
+    doc = users.docs[0]
+    assert doc["_id"] == uid and doc["email_verified_at"] is not None
+    assert doc["hashed_password"] == "new" and doc["roles"] == ["admin"]
@@ -0,0 +1,90 @@
+"""
+Local stand-in for an identity provider's JWKS endpoint.
+
+Serves RSA signing keys from a background thread on 127.0.0.1, counts requests,
+and can rotate keys or slow responses down. It doubles as an OpenID Connect issuer:
+`/.well-known/openid-configuration` points back at its own `/certs`. Tests get it via the `jwks_stub`
+fixture; `python tests/jwks_stub.py` serves one for manual runs.
+"""
+import json
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import jwt
+from cryptography.hazmat.primitives.asymmetric import rsa
+from jwt.algorithms import RSAAlgorithm
+
+class JWKSStub:
+    def __init__(self, cache_control: str = "public, max-age=300"):
+        self.cache_control = cache_control
+        self.delay = 0.0
+        self.requests = 0
+        self.algorithms = ["RS256"]  # advertised in discovery
+        self.jwks_uri: str | None = None  # advertised instead of our own /certs when set
+        self._keys: list[tuple[str, rsa.RSAPrivateKey]] = []
+        self.rotate()
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                stub.requests += 1
+                time.sleep(stub.delay)
+                if self.path.endswith("/.well-known/openid-configuration"):
+                    body = json.dumps(stub.discovery()).encode()
+                else:
+                    body = json.dumps(stub.jwks()).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Cache-Control", stub.cache_control)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.issuer = f"http://127.0.0.1:{self._server.server_port}"
+        self.url = f"{self.issuer}/certs"
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+
+    def rotate(self, keep_old: bool = False) -> str:
+        kid = uuid.uuid4().hex[:16]
+        key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+        self._keys = (self._keys if keep_old else []) + [(kid, key)]
+        return kid
+
+    def jwks(self) -> dict:
+        keys = []
+        for kid, key in self._keys:
+            jwk = RSAAlgorithm.to_jwk(key.public_key(), as_dict=True)
+            keys.append({**jwk, "kid": kid, "alg": "RS256", "use": "sig"})
+        return {"keys": keys}
+
+    def discovery(self) -> dict:
+        return {
+            "issuer": self.issuer,
+            "authorization_endpoint": f"{self.issuer}/authorize",
+            "token_endpoint": f"{self.issuer}/token",
+            "jwks_uri": self.jwks_uri or self.url,
+            "id_token_signing_alg_values_supported": self.algorithms,
+        }
+
+    def sign(self, claims: dict, algorithm: str = "RS256") -> str:
+        kid, key = self._keys[-1]
+        return jwt.encode(claims, key, algorithm=algorithm, headers={"kid": kid})
+
+    def close(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+if __name__ == "__main__":
+    stub = JWKSStub()
+    print(f"Serving JWKS at {stub.url} (Ctrl+C to stop)")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        stub.close()
@@ -0,0 +1,10 @@
+from app.utils.bloom import BloomFilter
+
+def test_no_false_negatives_and_bounded_false_positives():
+    bloom = BloomFilter(1000, 0.01)
+    for i in range(1000):
+        bloom.add(f"in-{i}")
+    assert all(f"in-{i}" in bloom for i in range(1000))
+    false_positives = sum(f"out-{i}" in bloom for i in range(10_000))
+    assert false_positives < 300  # ~1% expected
+    assert not bloom.saturated
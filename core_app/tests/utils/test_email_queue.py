@@ -0,0 +1,46 @@
+import asyncio
+
+import pytest
+
+from app.core.config.settings import settings
+from app.utils.email_queue import EmailQueue, EmailQueueFull
+from app.utils.emails import EmailSender
+
+class FlakySender(EmailSender):
+    def __init__(self, failures: int):
+        self.failures = failures
+        self.sent = []
+        self.closed = False
+
+    async def send(self, to, subject, html, text=None):
+        if self.failures:
+            self.failures -= 1
+            raise ConnectionError("smtp down")
+        self.sent.append(to)
+
+    async def close(self):
+        self.closed = True
+
+def test_enqueue_is_bounded():
+    queue = EmailQueue(maxsize=1, senders=1, sender_factory=lambda: FlakySender(0))
+    queue.enqueue("a@example.com", "s", "<p>x</p>")
+    with pytest.raises(EmailQueueFull):
+        queue.enqueue("b@example.com", "s", "<p>x</p>")
+    assert queue.stats()["rejected"] == 1
+
+def test_retries_then_drains_on_shutdown(monkeypatch):
+    monkeypatch.setattr(settings, "EMAIL_RETRY_BASE_SECONDS", 0)
+    sender = FlakySender(failures=2)
+
+    async def run():
+        queue = EmailQueue(maxsize=10, senders=1, sender_factory=lambda: sender)
+        queue.start()
+        queue.enqueue("a@example.com", "s", "<p>x</p>")
+        queue.enqueue("b@example.com", "s", "<p>x</p>")
+        await queue.drain(timeout=5)
+        return queue.stats()
+
+    stats = asyncio.run(run())
+    assert sender.sent == ["a@example.com", "b@example.com"]
+    assert sender.closed
+    assert stats["sent"] == 2 and stats["retried"] == 2 and stats["depth"] == 0
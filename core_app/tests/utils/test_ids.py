@@ -0,0 +1,29 @@
+import uuid
+
+from bson import Binary
+from beanie.odm.utils.encoder import Encoder
+
+from app.core.config.settings import settings
+from app.utils.ids import UserId, encode_user_id, from_db_id, id_filter, uuid7
+
+def test_uuid7_is_time_ordered():
+    a, b = uuid7(), uuid7()
+    assert a.version == 7 and a.int >> 80 <= b.int >> 80
+
+def test_binary_storage_keeps_public_string_form(monkeypatch):
+    monkeypatch.setattr(settings, "ID_STORAGE", "binary")
+    uid = UserId(str(uuid.uuid4()))
+    stored = Encoder(custom_encoders={UserId: encode_user_id}).encode({"_id": uid})["_id"]
+    assert isinstance(stored, Binary) and stored.subtype == 4
+    assert from_db_id(stored) == uid
+    assert from_db_id(stored.as_uuid()) == uid
+
+def test_legacy_reads_match_both_forms(monkeypatch):
+    monkeypatch.setattr(settings, "ID_STORAGE", "binary")
+    monkeypatch.setattr(settings, "ID_READ_LEGACY", True)
+    uid = str(uuid.uuid4())
+    assert id_filter(uid) == {"$in": [Binary.from_uuid(uuid.UUID(uid)), uid]}
+
+def test_string_storage_is_untouched():
+    uid = str(uuid.uuid4())
+    assert id_filter(uid) == uid
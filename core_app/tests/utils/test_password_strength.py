@@ -0,0 +1,28 @@
+import asyncio
+
+import pytest
+
+from app.utils import password_strength
+from app.utils.password_strength import PasswordTooWeak, validate_password_strength_async
+
+def test_overlong_password_rejected_before_scoring(monkeypatch):
+    monkeypatch.setattr(password_strength, "_score", lambda *_: pytest.fail("scored an overlong password"))
+    with pytest.raises(PasswordTooWeak) as exc:
+        asyncio.run(validate_password_strength_async("x" * 10_000))
+    assert exc.value.feedback["warning"] == "Too long"
+
+def test_repeated_checks_are_memoized(monkeypatch):
+    calls = []
+
+    def fake_score(password, user_inputs):
+        calls.append(password)
+        return 4, {}
+
+    monkeypatch.setattr(password_strength, "_score", fake_score)
+
+    async def run():
+        for _ in range(3):
+            await validate_password_strength_async("memo-check-password", ["alice@example.com"])
+
+    asyncio.run(run())
+    assert calls == ["memo-check-password"]